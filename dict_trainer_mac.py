@@ -13,6 +13,8 @@
 - .xlsx / .xlsm（需要 openpyxl）
 - .csv / .tsv / .txt
 - .json（形如 [[A,B], ...] 或 [{"A":...,"B":...}, ...]）
+- .jsonl（每行一个 [A,B] 或 {"A":...,"B":...}）
+- 以上文本格式的 .gz / .bz2 / .xz 压缩版本（流式解压）
 
 Windows：需要 pip install windows-curses
 
@@ -24,23 +26,20 @@ Windows：需要 pip install windows-curses
 
 from __future__ import annotations
 
-import argparse
-import csv
+import bisect
 import curses
-import json
+import functools
 import locale
 import os
 import random
 import re
 import time
-import uuid
-import unicodedata
-import difflib
-import hashlib
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
-locale.setlocale(locale.LC_ALL, "")
+# 启动只导入菜单必需的模块；csv/json/difflib/hashlib/uuid/unicodedata 等
+# 只在对应格式或模式第一次用到时再导入（见 dtm_bench.py startup 的导入预算）。
+# locale 在 main() 进入 curses 前由 _init_locale() 设置，不在导入期设置。
 
 # --------------------------- Utilities ---------------------------
 
@@ -98,9 +97,79 @@ def is_correct_fuzzy(user: str, correct: str, *, threshold: float = 0.80, min_le
         return False
 
     # 相似度（SequenceMatcher 基于编辑/块匹配，够用且无依赖）
+    import difflib
     ratio = difflib.SequenceMatcher(None, u2, c2).ratio()
     return ratio >= threshold
 
+# --------------------------- Perf HUD ---------------------------
+# 出题、保存错题本各包一层计时（两次 perf_counter，常开也几乎没有开销），记下最近一次的耗时；
+# 词典加载耗时和错题本大小属于具体词典，记在 State 上（open_deck_state / save_wrong_book 写入），
+# 预加载后被丢弃的词典、迁移时读的旧错题本都不会串到当前显示里。
+# 开了 HUD（--hud 或菜单里按 H）时，每帧在标题框第二行左侧显示：加载耗时、常驻内存、
+# 最近出题耗时、最近保存耗时、错题本大小，不用退出就能看出是词典慢还是磁盘慢。
+
+PERF_STATS: Dict[str, Optional[float]] = {"build": None, "save": None}
+PERF_HUD = False
+
+
+# perf_timed（计时装饰器），用于把函数最近一次的耗时（秒）记到 PERF_STATS[slot]。
+def perf_timed(slot: str):
+    def deco(fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PERF_STATS[slot] = time.perf_counter() - t0
+        return timed
+    return deco
+
+
+# current_rss（常驻内存），用于取进程常驻内存（字节）；没有 /proc 的系统（macOS）退回峰值 RSS。
+def current_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # macOS 是字节，Linux 是 KiB
+
+
+# _fmt_secs（格式化耗时），用于 HUD 里的耗时显示。
+def _fmt_secs(t: Optional[float]) -> str:
+    if t is None:
+        return "—"
+    return f"{t * 1000:.1f}ms" if t < 1 else f"{t:.2f}s"
+
+
+# _fmt_bytes（格式化字节数），用于 HUD 里的大小显示。
+def _fmt_bytes(n: Optional[float]) -> str:
+    if n is None:
+        return "—"
+    for unit in ("B", "K", "M"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}G"
+
+
+# perf_hud_text（HUD 文本），用于拼出一行性能状态。
+def perf_hud_text(state: Optional["State"]) -> str:
+    if state is None:
+        load, wrong = "—", "—"
+    else:
+        load, wrong = _fmt_secs(state.load_secs), f"{len(state.wrong_db)}条/{_fmt_bytes(state.wrong_bytes)}"
+    return (f"加载 {load}  内存 {_fmt_bytes(current_rss())}  "
+            f"出题 {_fmt_secs(PERF_STATS['build'])}  保存 {_fmt_secs(PERF_STATS['save'])}  错题 {wrong}")
+
+
 # _pref_path（偏好路径），用于偏好路径。
 def _pref_path() -> str:
     # 放在项目同目录（最符合你“可复用、可携带”的诉求）
@@ -110,6 +179,7 @@ def _pref_path() -> str:
 
 # load_prefs（加载偏好设置），用于加载偏好设置。
 def load_prefs() -> dict:
+    import json
     p = _pref_path()
     try:
         with open(p, "r", encoding="utf-8") as f:
@@ -119,6 +189,7 @@ def load_prefs() -> dict:
 
 # save_prefs（保存偏好设置），用于保存偏好设置。
 def save_prefs(d: dict) -> None:
+    import json
     p = _pref_path()
     try:
         with open(p, "w", encoding="utf-8") as f:
@@ -131,53 +202,164 @@ def normalize_deck_path(path: str) -> str:
     return os.path.abspath(os.path.expanduser(path))
 
 # get_last_deck_info（获取上次词典信息），用于获取上次词典信息。
-def get_last_deck_info() -> tuple[str | None, int, str | None]:
+def get_last_deck_info() -> tuple[str | None, int, str | None, int | None]:
+    """返回 (path, col, sep, col_b)；col_b 为 None 表示 B 取 col 的下一列。"""
     d = load_prefs()
     path = d.get("last_deck_path")
     if path:
         path = normalize_deck_path(path)
-    if path and os.path.isfile(path):
+    if path and deck_source_exists(path):
         col = d.get("last_deck_col", 1)
         sep = d.get("last_deck_sep")
+        col_b = d.get("last_deck_col_b")
         try:
             col = int(col)
         except Exception:
             col = 1
-        return path, max(1, col), sep
-    return None, 1, None
+        try:
+            col_b = max(1, int(col_b)) if col_b is not None else None
+        except Exception:
+            col_b = None
+        return path, max(1, col), sep, col_b
+    return None, 1, None, None
 
 # set_last_deck_info（设置上次词典信息），用于设置上次词典信息。
-def set_last_deck_info(path: str, col: int, sep: str | None) -> None:
+def set_last_deck_info(path: str, col: int, sep: str | None, col_b: int | None = None) -> None:
     d = load_prefs()
     d["last_deck_path"] = normalize_deck_path(path)
     d["last_deck_col"] = int(col)
     d["last_deck_sep"] = sep
+    d["last_deck_col_b"] = int(col_b) if col_b is not None else None
     save_prefs(d)
 
-# ensure_deck_ready（确保词典就绪），用于确保词典就绪。
-def ensure_deck_ready(stdscr, state) -> bool:
-    """
-    若当前仍是内置默认词典（2条 bonjour/merci）且存在上次词典，
-    则提示是否应用上次词典。用户选择否，则继续使用当前词典。
-    返回 True 表示可以继续进入训练模式；False 表示用户取消返回菜单。
-    """
-    last_path, last_col, last_sep = get_last_deck_info()
-    if not last_path:
-        return True
-
+# _is_default_deck（是否内置默认词典），用于判断是否内置默认词典。
+def _is_default_deck(state) -> bool:
     # 你现在的“默认词典”识别方式：按你描述就是两条 bonjour/merci
     # 用更稳妥的方法：deck_path 是 "<内置示例>" 或 len(deck)==2 且内容匹配
     try:
-        is_default = (
+        return (
             getattr(state, "deck_path", "") == "<内置示例>" or
             (len(state.deck) == 2 and
              norm_text(state.deck[0].get("A","")) == "bonjour" and
              norm_text(state.deck[1].get("A","")) == "merci")
         )
     except Exception:
-        is_default = False
+        return False
+
+
+class DeckPreloader:
+    """后台线程里预加载上次词典；确认应用时直接取结果，拒绝时丢弃。"""
+
+    def __init__(self, path: str, col: int, sep: str | None, col_b: int | None = None):
+        import threading
+        self.key = (path, col, sep, col_b)
+        self._result: Optional["State"] = None
+        self._error: Optional[Exception] = None
+        self._discarded = False
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="deck-preload", daemon=True)
+
+    # start（启动），用于启动。
+    def start(self) -> "DeckPreloader":
+        self._thread.start()
+        return self
+
+    # _run（运行），用于运行。
+    def _run(self) -> None:
+        # 异常不能让线程抛出去：默认的线程异常钩子会把 traceback 打在 curses 画面上；存下来由 take 重新抛出
+        result = None
+        try:
+            result = open_deck_state(*self.key)
+            if len(result.deck) < 1:
+                raise RuntimeError("上次词典里没读到任何有效 A-B 行")
+        except Exception as e:
+            self._error = e
+            _stop_state_stream(result)
+            result = None
+        with self._lock:
+            if self._discarded:
+                _stop_state_stream(result)  # 已被丢弃：流式加载别再在后台读下去
+            else:
+                self._result = result
+        self._done.set()
+
+    # done（是否完成），用于是否完成。
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    # take（取结果），用于取结果；后台加载失败时在这里重新抛出异常。
+    def take(self) -> Optional["State"]:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        result, self._result = self._result, None
+        return result
+
+    # discard（丢弃），用于丢弃。
+    def discard(self) -> None:
+        # 线程无法中途取消：已加载完就停掉结果里的流式读取，否则由 _run 结束时停
+        with self._lock:
+            self._discarded = True
+            result, self._result = self._result, None
+        _stop_state_stream(result)
+
 
-    if not is_default:
+# _stop_state_stream（停止状态的流式加载），用于停掉被丢弃 / 被替换的 State 仍在后台读的词典流。
+def _stop_state_stream(state: Optional["State"]) -> None:
+    if state is not None and state.stream is not None:
+        state.stream.stop()
+
+
+_PRELOADER: Optional[DeckPreloader] = None
+
+
+# start_last_deck_preload（启动上次词典预加载），用于启动上次词典预加载。
+def start_last_deck_preload(state) -> None:
+    """当前是内置默认词典且存在上次词典时，程序一启动就在后台开始加载。"""
+    global _PRELOADER
+    if not _is_default_deck(state):
+        return
+    last_path, last_col, last_sep, last_col_b = get_last_deck_info()
+    if last_path:
+        _PRELOADER = DeckPreloader(last_path, last_col, last_sep, last_col_b).start()
+
+
+# _take_preloaded（取预加载结果），用于取预加载结果。
+def _take_preloaded(path: str, col: int, sep: str | None, col_b: int | None) -> tuple[bool, Optional["State"]]:
+    """返回 (命中, 结果)；未命中时调用方自己同步加载。"""
+    global _PRELOADER
+    pre, _PRELOADER = _PRELOADER, None
+    if pre is None or pre.key != (path, col, sep, col_b):
+        if pre is not None:
+            pre.discard()
+        return False, None
+    return True, pre.take()
+
+
+# _discard_preloaded（丢弃预加载结果），用于丢弃预加载结果。
+def _discard_preloaded() -> None:
+    global _PRELOADER
+    pre, _PRELOADER = _PRELOADER, None
+    if pre is not None:
+        pre.discard()
+
+
+# ensure_deck_ready（确保词典就绪），用于确保词典就绪。
+def ensure_deck_ready(stdscr, state) -> bool:
+    """
+    若当前仍是内置默认词典（2条 bonjour/merci）且存在上次词典，
+    则提示是否应用上次词典。用户选择否，则继续使用当前词典。
+    返回 True 表示可以继续进入训练模式；False 表示用户取消返回菜单。
+    上次词典已在后台预加载（start_last_deck_preload），选择 y 时直接切换。
+    """
+    last_path, last_col, last_sep, last_col_b = get_last_deck_info()
+    if not last_path:
+        _discard_preloaded()
+        return True
+
+    if not _is_default_deck(state):
+        _discard_preloaded()
         return True
 
     # 弹窗询问（你项目里如果已有 yes/no 弹窗函数就用你的）
@@ -185,32 +367,42 @@ def ensure_deck_ready(stdscr, state) -> bool:
     center_text(stdscr, 6, "当前未导入词典。是否应用上次使用的词典？")
     safe_addstr(stdscr, 8, 4, f"上次词典：{last_path}")
     safe_addstr(stdscr, 10, 4, "按 y 应用；按 n 继续使用当前默认词典；按 Esc 返回")
-    stdscr.refresh()
+    present(stdscr)
 
-    k = wait_key(stdscr)
+    # 注意：wait_key 只区分 esc/any，这里要分辨 y/n，直接读键
+    ch = stdscr.getch()
+    k = "esc" if ch in (27, ord("x"), ord("X")) else (chr(ch) if 0 <= ch < 256 else "")
     if k == "esc":
+        _discard_preloaded()
         return False
     if k in ("y", "Y"):
         # 复用你现有的“加载词典”底层函数
         # 你代码里大概率有类似：load_deck_from_path(path) 或 read_pairs(path)
         try:
-            new_state = load_deck_into_state(state, last_path, last_col, last_sep)
+            if _PRELOADER is not None and not _PRELOADER.done():
+                safe_addstr(stdscr, 12, 4, "⏳ 正在加载……")
+                present(stdscr)
+            hit, new_state = _take_preloaded(last_path, last_col, last_sep, last_col_b)
+            if not hit:
+                new_state = load_deck_into_state(state, last_path, last_col, last_sep, last_col_b)
             if new_state is None:
                 raise RuntimeError("读取上次词典失败")
-            # 如果你 load 函数返回 new_state
-            state.deck = new_state.deck
-            state.deck_path = new_state.deck_path
-            state.deck_id = new_state.deck_id
-            state.wrong_path = new_state.wrong_path
-            state.wrong_db = new_state.wrong_db
+            # 整个 State 一次换过去（逐字段拷贝会漏掉新加的字段，如 source_sig 丢了热重载就失效）；
+            # 随机源跟着会话走，不用预加载状态里的
+            new_state.rng = state.rng
+            if new_state is not state:
+                _stop_state_stream(state)
+            vars(state).update(vars(new_state))
+            adopt_loaded_state(state)
             return True
         except Exception as e:
             draw_header(stdscr, "应用失败")
             center_text(stdscr, 6, "❌ 读取上次词典失败，已继续使用默认词典。")
             safe_addstr(stdscr, 8, 4, str(e)[:200])
-            stdscr.refresh()
+            present(stdscr)
             wait_key(stdscr)
             return True
+    _discard_preloaded()
     return True
 
 
@@ -224,53 +416,217 @@ def _init_locale():
 
 
 # load_deck_into_state（加载词典到状态），用于加载词典到状态。
-def load_deck_into_state(state: "State", path: str, col: int, sep: str | None) -> Optional["State"]:
-    path = normalize_deck_path(path)
+def load_deck_into_state(state: "State", path: str, col: int, sep: str | None,
+                         col_b: int | None = None) -> Optional["State"]:
     try:
-        new_deck = load_deck(path, start_col_1based=col, sep=sep)
+        new_state = open_deck_state(path, col, sep, col_b)
     except Exception:
         return None
-    if len(new_deck) < 1:
+    if len(new_state.deck) < 1:
         return None
-    new_id = deck_id_from_path(path)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    wrong_path = os.path.join(script_dir, f"wrong_book_{new_id}.json")
+    return new_state
+
+
+# open_deck_state（打开词典状态），用于打开词典状态（优先命中内存 LRU）。
+def open_deck_state(path: str, col: int, sep: str | None, col_b: int | None = None) -> "State":
+    """读取词典 + 错题本并组装 State；加载失败时抛异常，由调用方决定如何提示。"""
+    t0 = time.perf_counter()
+    path = normalize_deck_path(path)
+    cached = DECK_CACHE.get(path, col, sep, col_b)
+    if cached is not None:
+        return cached
+    stream = None
+    sig = deck_source_sig(path)  # 先取签名：解析期间文件再被改，下一次轮询会再重载
+    if _should_stream(path):
+        new_deck, stream = open_deck_stream(path, col, sep, col_b)
+    elif DECK_STORAGE == "arena" and split_deck_ext(path)[0] != GMSDECK_EXT:
+        new_deck = load_deck_compiled_cached(path, col, sep, col_b)
+    else:
+        new_deck = load_deck(path, start_col_1based=col, sep=sep, col_b_1based=col_b)
+    # 这里只读盘：迁移旧错题本、写指纹缓存等都记进 pending_adopt，采用时（adopt_loaded_state）才落盘
+    new_id, old_ids, new_fp = resolve_deck_id(path, col, sep, col_b, sig, None if stream is not None else new_deck)
+    wrong_path = wrong_book_path(new_id)
     wrong_db = load_wrong_db(wrong_path)
-    return State(deck=new_deck, deck_path=path, deck_id=new_id, wrong_path=wrong_path, wrong_db=wrong_db)
+    orphans = migrate_orphan_wrong_books(wrong_db, new_id, wrong_path, old_ids)
+    todo = PendingAdopt(orphan_paths=tuple(orphans), fingerprint=new_fp, save_wrong=bool(orphans),
+                        stream_fingerprint=stream is not None and new_id == deck_id_from_path(path))
+    wrong_sig = _file_sig(wrong_path)
+    new_state = State(deck=new_deck, deck_path=path, deck_id=new_id, wrong_path=wrong_path, wrong_db=wrong_db,
+                      deck_col=col, deck_sep=sep, deck_col_b=col_b, stream=stream, source_sig=sig,
+                      load_secs=time.perf_counter() - t0, wrong_bytes=wrong_sig[0] if wrong_sig else None,
+                      pending_adopt=todo)
+    if stream is None and resolve_wrong_items(new_state):
+        todo.save_wrong = True
+    if stream is None and new_deck:
+        # 冲突索引要扫全表，放在加载里建（预加载时就在后台线程里），别等到第一道题才卡一下；
+        # 流式词典边读边长，仍由 conflict_index 出题时增量补齐
+        new_state.conflicts = ConflictIndex().sync(new_deck)
+    if new_deck and stream is None:
+        DECK_CACHE.put(new_state)
+    return new_state
+
+
+# --------------------------- Display width ---------------------------
+# 终端显示宽度：East Asian Width 为 W/F 的字符占 2 列，控制字符不占列，其余占 1 列。
+# 宽字符区间表由 unicodedata（Unicode 14.0）预先生成，未分配码位并入相邻区间；
+# 运行时 ASCII 走快路径，其余按码位二分查表，不再逐字符调用 unicodedata。
+# 同一题干每帧都要重画，(文本, 宽度) → 结果 用 LRU 缓存。
+
+_WIDE_RANGES = (
+    (0x1100, 0x115F), (0x231A, 0x231B), (0x2329, 0x232A), (0x23E9, 0x23EC), (0x23F0, 0x23F0),
+    (0x23F3, 0x23F3), (0x25FD, 0x25FE), (0x2614, 0x2615), (0x2648, 0x2653), (0x267F, 0x267F),
+    (0x2693, 0x2693), (0x26A1, 0x26A1), (0x26AA, 0x26AB), (0x26BD, 0x26BE), (0x26C4, 0x26C5),
+    (0x26CE, 0x26CE), (0x26D4, 0x26D4), (0x26EA, 0x26EA), (0x26F2, 0x26F3), (0x26F5, 0x26F5),
+    (0x26FA, 0x26FA), (0x26FD, 0x26FD), (0x2705, 0x2705), (0x270A, 0x270B), (0x2728, 0x2728),
+    (0x274C, 0x274C), (0x274E, 0x274E), (0x2753, 0x2755), (0x2757, 0x2757), (0x2795, 0x2797),
+    (0x27B0, 0x27B0), (0x27BF, 0x27BF), (0x2B1B, 0x2B1C), (0x2B50, 0x2B50), (0x2B55, 0x2B55),
+    (0x2E80, 0x303E), (0x3041, 0x3247), (0x3250, 0x4DBF), (0x4E00, 0xA4C6), (0xA960, 0xA97C),
+    (0xAC00, 0xD7A3), (0xF900, 0xFAD9), (0xFE10, 0xFE19), (0xFE30, 0xFE6B), (0xFF01, 0xFF60),
+    (0xFFE0, 0xFFE6), (0x16FE0, 0x1B2FB), (0x1F004, 0x1F004), (0x1F0CF, 0x1F0CF), (0x1F18E, 0x1F18E),
+    (0x1F191, 0x1F19A), (0x1F200, 0x1F320), (0x1F32D, 0x1F335), (0x1F337, 0x1F37C), (0x1F37E, 0x1F393),
+    (0x1F3A0, 0x1F3CA), (0x1F3CF, 0x1F3D3), (0x1F3E0, 0x1F3F0), (0x1F3F4, 0x1F3F4), (0x1F3F8, 0x1F43E),
+    (0x1F440, 0x1F440), (0x1F442, 0x1F4FC), (0x1F4FF, 0x1F53D), (0x1F54B, 0x1F54E), (0x1F550, 0x1F567),
+    (0x1F57A, 0x1F57A), (0x1F595, 0x1F596), (0x1F5A4, 0x1F5A4), (0x1F5FB, 0x1F64F), (0x1F680, 0x1F6C5),
+    (0x1F6CC, 0x1F6CC), (0x1F6D0, 0x1F6D2), (0x1F6D5, 0x1F6DF), (0x1F6EB, 0x1F6EC), (0x1F6F4, 0x1F6FC),
+    (0x1F7E0, 0x1F7F0), (0x1F90C, 0x1F93A), (0x1F93C, 0x1F945), (0x1F947, 0x1F9FF), (0x1FA70, 0x1FAF6),
+    (0x20000, 0x3134A),
+)
+_WIDE_STARTS = tuple(a for a, _ in _WIDE_RANGES)
+
+
+# char_width（字符宽度），用于单个字符的显示宽度。
+def char_width(ch: str) -> int:
+    cp = ord(ch)
+    if cp < 32:
+        return 0
+    if cp < 0x1100:
+        return 1
+    k = bisect.bisect_right(_WIDE_STARTS, cp) - 1
+    return 2 if k >= 0 and cp <= _WIDE_RANGES[k][1] else 1
+
 
 # display_width（显示宽度），用于显示宽度。
 def display_width(s: str) -> int:
-    """粗略计算终端显示宽度（处理 CJK 宽字符）。"""
-    w = 0
-    for ch in s:
-        if ch == "\n" or ch == "\r":
-            continue
-        # 控制字符
-        if ord(ch) < 32:
-            continue
-        ea = unicodedata.east_asian_width(ch)
-        w += 2 if ea in ("W", "F") else 1
-    return w
+    """计算终端显示宽度（处理 CJK 宽字符）。"""
+    if s.isascii() and s.isprintable():
+        return len(s)
+    return _display_width_cached(s)
+
+
+@functools.lru_cache(maxsize=4096)
+def _display_width_cached(s: str) -> int:
+    return sum(char_width(ch) for ch in s)
+
 
 # truncate_to_width（截断到宽度），用于截断到宽度。
 def truncate_to_width(s: str, max_w: int) -> str:
     if max_w <= 0:
         return ""
+    if s.isascii() and s.isprintable():
+        return s[:max_w]
+    return _truncate_cached(s, max_w)
+
+
+@functools.lru_cache(maxsize=4096)
+def _truncate_cached(s: str, max_w: int) -> str:
     out = []
     w = 0
     for ch in s:
         if ch in ("\n", "\r"):
             break
-        if ord(ch) < 32:
+        cw = char_width(ch)
+        if not cw:
             continue
-        ea = unicodedata.east_asian_width(ch)
-        cw = 2 if ea in ("W", "F") else 1
         if w + cw > max_w:
             break
         out.append(ch)
         w += cw
     return "".join(out)
 
+# wrap_text（按宽度折行），用于把文本按显示宽度折成多行（结果按 (文本, 宽度) 缓存）。
+@functools.lru_cache(maxsize=1024)
+def wrap_text(text: str, width: int) -> Tuple[str, ...]:
+    """
+    按显示宽度折行：CJK 任意字间可断；拉丁文尽量在空格处断，单词超过整行才硬断。
+    显式换行保留。终端尺寸变化时（KEY_RESIZE）由 handle_resize 清空缓存。
+    """
+    width = max(1, width)
+    out: List[str] = []
+    for para in text.split("\n"):
+        if para.isascii() and para.isprintable() and len(para) <= width:
+            out.append(para)
+            continue
+        line: List[str] = []
+        lw = 0
+        space_at = -1  # line 里最后一个空格的位置
+        for ch in para:
+            cw = char_width(ch)
+            while lw + cw > width and line:
+                if ch == " ":
+                    cw = -1  # 行尾的空格直接吞掉
+                    break
+                if space_at > 0:
+                    tail = line[space_at + 1:]
+                    out.append("".join(line[:space_at]).rstrip())
+                    line = tail
+                    lw = sum(char_width(c) for c in tail)
+                else:
+                    out.append("".join(line))
+                    line = []
+                    lw = 0
+                space_at = -1
+            if cw < 0:
+                out.append("".join(line))
+                line, lw, space_at = [], 0, -1
+                continue
+            if ch == " ":
+                if not line and out:
+                    continue  # 折行后的行首空格不要
+                space_at = len(line)
+            line.append(ch)
+            lw += cw
+        out.append("".join(line))
+    return tuple(out)
+
+
+# wrap_lines（多行折行），用于对多行文本逐行折行后拼在一起。
+def wrap_lines(lines: List[str], width: int) -> List[str]:
+    out: List[str] = []
+    for line in lines:
+        out.extend(wrap_text(str(line), width))
+    return out
+
+
+# --------------------------- Rendering ---------------------------
+# 画面只在内存里的虚拟屏上改（draw_header 用 erase() 而不是 clear()），
+# 一帧画完后 present() 调 noutrefresh() + doupdate()，curses 只把和终端上不同的字符发出去；
+# clear() 会强制整屏重绘，SSH 上就是闪烁加带宽。
+# 光标移动（菜单、选择题）只重写两行。RENDER_STATS 统计写入虚拟屏的字符数和帧数，
+# 终端实际收到的字节数用 `python dtm_bench.py render` 在伪终端里测。
+
+RENDER_STATS = {"frames": 0, "chars": 0, "frame_chars": 0}
+
+
+# curses_call（调用 curses 全局函数），用于 echo/noecho/curs_set/doupdate 等；
+# 没有真实终端（dtm_headless 的内存屏幕，未 initscr）时静默跳过。
+def curses_call(name: str, *args) -> None:
+    try:
+        getattr(curses, name)(*args)
+    except curses.error:
+        pass
+
+
+# present（提交画面），用于把本帧的改动一次性刷到终端（只发送有变化的部分）。
+def present(stdscr) -> None:
+    if PERF_HUD:
+        draw_perf_hud(stdscr)
+    stdscr.noutrefresh()
+    curses_call("doupdate")
+    RENDER_STATS["frames"] += 1
+    RENDER_STATS["frame_chars"] = RENDER_STATS["chars"]
+    RENDER_STATS["chars"] = 0
+
+
 # safe_addstr（安全写入字符串），用于安全写入字符串。
 def safe_addstr(stdscr, y: int, x: int, s: str, attr: int = 0):
     """在 macOS 上更稳的 addstr：自动裁剪 + 吞掉 curses.error。"""
@@ -278,6 +634,7 @@ def safe_addstr(stdscr, y: int, x: int, s: str, attr: int = 0):
         h, w = stdscr.getmaxyx()
         max_w = max(0, w - x - 1)
         s2 = truncate_to_width(str(s), max_w)
+        RENDER_STATS["chars"] += len(s2)
         if attr:
             stdscr.addstr(y, x, s2, attr)
         else:
@@ -326,6 +683,7 @@ def strip_accents(s: str) -> str:
     """
     if not s:
         return s
+    import unicodedata
     return "".join(
         ch for ch in unicodedata.normalize("NFD", s)
         if unicodedata.category(ch) != "Mn"
@@ -343,115 +701,1066 @@ def choose_delimiter(first_line: str, forced: Optional[str]) -> str:
 def deck_id_from_path(path: str) -> str:
     # 用文件绝对路径生成稳定 ID（避免不同词典共用错题本）
     # 注意：内置 hash() 在不同进程会变化，因此用 sha1 做稳定哈希
+    import hashlib
     ap = os.path.abspath(path)
     return hashlib.sha1(ap.encode("utf-8")).hexdigest()[:12]
 
 
-# --------------------------- Loaders ---------------------------
+# --------------------------- Input streams ---------------------------
+# .gz / .bz2 / .xz 由标准库解压流按块解码，叠在 CSV/JSON/JSONL 读取器下面，
+# 不会把整个文件解压到内存或磁盘。格式按内层扩展名判断：dict.csv.gz → .csv。
 
-# load_deck_from_csv（加载词典从CSV），用于加载词典从CSV。
-def load_deck_from_csv(path: str, start_col_1based: int = 1, sep: Optional[str] = None) -> List[Dict[str, str]]:
-    start = max(1, int(start_col_1based))
-    idx_a = start - 1
-    idx_b = start
+COMPRESSED_EXTS = (".gz", ".bz2", ".xz")
+
+
+# split_deck_ext（拆分词典扩展名），用于拆分词典扩展名。
+def split_deck_ext(path: str) -> Tuple[str, str]:
+    """返回 (格式扩展名, 压缩扩展名)，如 ("dict.csv.gz") → (".csv", ".gz")；未压缩时第二项为 ""。"""
+    root, ext = os.path.splitext(path)
+    ext = ext.lower()
+    if ext in COMPRESSED_EXTS:
+        return os.path.splitext(root)[1].lower(), ext
+    return ext, ""
+
+
+# open_deck_text（打开词典文本流），用于打开词典文本流（透明解压）。
+def open_deck_text(path: str, encoding: str = "utf-8-sig", newline: Optional[str] = None):
+    """
+    返回 (文本流, 原始文件)。原始文件的 tell() 是已读取的源文件字节数
+    （压缩文件即压缩字节数），可直接和 os.path.getsize 比出进度。
+    """
+    import io
+    raw = open(path, "rb")
+    try:
+        codec = split_deck_ext(path)[1]
+        if codec == ".gz":
+            import gzip
+            binf = gzip.GzipFile(fileobj=raw, mode="rb")
+        elif codec == ".bz2":
+            import bz2
+            binf = bz2.BZ2File(raw, mode="rb")
+        elif codec == ".xz":
+            import lzma
+            binf = lzma.LZMAFile(raw, mode="rb")
+        else:
+            binf = raw
+        return io.TextIOWrapper(binf, encoding=encoding, newline=newline), raw
+    except Exception:
+        raw.close()
+        raise
+
+
+# --------------------------- Columnar cache ---------------------------
+# 表格文件按“文件版本”（size + mtime）整表解析一次，保存全部列；
+# 换 --col / 列号只是在已解析的列上重新配对，不再读源文件。
+
+COLUMNAR_CACHE_MAX_ENTRIES = 4
 
-    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+
+class ColumnarTable:
+    """一个文件版本的全部列：columns[c][r]（已 safe_str，短行补 ""）。"""
+
+    __slots__ = ("columns", "nrows")
+
+    def __init__(self, columns: List[List[str]], nrows: int):
+        self.columns = columns
+        self.nrows = nrows
+
+    # from_rows（从行构建），用于从行构建。
+    @classmethod
+    def from_rows(cls, rows) -> "ColumnarTable":
+        columns: List[List[str]] = []
+        nrows = 0
+        for row in rows:
+            if not row:
+                continue
+            n = len(row)
+            while len(columns) < n:
+                columns.append([""] * nrows)
+            for c in range(n):
+                columns[c].append(safe_str(row[c]))
+            for c in range(n, len(columns)):
+                columns[c].append("")
+            nrows += 1
+        return cls(columns, nrows)
+
+    # pair（配对），用于把任意两列配成 A-B 词典（两列都非空的行才保留）。
+    def pair(self, idx_a: int, idx_b: int) -> List[Dict[str, str]]:
+        if idx_a < 0 or idx_b < 0 or idx_a >= len(self.columns) or idx_b >= len(self.columns):
+            return []
+        return [{"A": a, "B": b} for a, b in zip(self.columns[idx_a], self.columns[idx_b]) if a and b]
+
+
+_COLUMNAR_CACHE: Dict[tuple, Tuple[Optional[Tuple[int, int]], ColumnarTable]] = {}
+
+
+# get_columnar_table（获取列式缓存），用于获取列式缓存（未命中时调用 parse 解析整表）。
+def get_columnar_table(path: str, variant, parse) -> ColumnarTable:
+    key = (os.path.abspath(path), variant)
+    sig = _file_sig(path)
+    hit = _COLUMNAR_CACHE.pop(key, None)
+    if hit is not None and sig is not None and hit[0] == sig:
+        _COLUMNAR_CACHE[key] = hit  # 重新插入 = 移到最近使用
+        return hit[1]
+    table = parse()
+    _COLUMNAR_CACHE[key] = (sig, table)
+    while len(_COLUMNAR_CACHE) > COLUMNAR_CACHE_MAX_ENTRIES:
+        _COLUMNAR_CACHE.pop(next(iter(_COLUMNAR_CACHE)))
+    return table
+
+
+# _pair_indices（配对列下标），用于把 1-based 列号转成 0-based 下标。
+def _pair_indices(start_col_1based: int, col_b_1based: Optional[int]) -> Tuple[int, int]:
+    idx_a = max(1, int(start_col_1based)) - 1
+    idx_b = max(1, int(col_b_1based)) - 1 if col_b_1based is not None else idx_a + 1
+    return idx_a, idx_b
+
+
+# parse_col_spec（解析列号输入），用于解析“3”或“3,5”形式的列号输入。
+def parse_col_spec(text: str) -> Tuple[int, Optional[int]]:
+    parts = [p for p in re.split(r"[,，\s]+", safe_str(text)) if p]
+    try:
+        col = max(1, int(parts[0])) if parts else 1
+    except ValueError:
+        return 1, None
+    col_b = None
+    if len(parts) > 1:
+        try:
+            col_b = max(1, int(parts[1]))
+        except ValueError:
+            col_b = None
+    return col, col_b
+
+
+# parse_csv_columns（解析CSV全部列），用于解析CSV全部列。
+def parse_csv_columns(path: str, sep: Optional[str] = None) -> ColumnarTable:
+    import csv
+    f, _raw = open_deck_text(path, newline="")
+    with f:
         # 先读一行猜分隔符
         pos = f.tell()
         first = f.readline()
         f.seek(pos)
         delimiter = choose_delimiter(first, sep)
-        reader = csv.reader(f, delimiter=delimiter)
-        deck: List[Dict[str, str]] = []
-        for row in reader:
-            if not row:
-                continue
-            # 补齐
-            if len(row) <= idx_b:
-                continue
-            a = safe_str(row[idx_a])
-            b = safe_str(row[idx_b])
-            if not a or not b:
-                continue
-            deck.append({"A": a, "B": b})
-        return deck
+        return ColumnarTable.from_rows(csv.reader(f, delimiter=delimiter))
+
+
+# parse_xlsx_columns（解析XLSX全部列），用于解析XLSX全部列。
+def parse_xlsx_columns(path: str, sheet: Optional[str] = None) -> ColumnarTable:
+    """sheet 为 None 时读活动工作表；指定表名时以只读模式只解析该表。"""
+    openpyxl = _import_openpyxl()
+    if sheet is None:
+        wb = openpyxl.load_workbook(path, data_only=True)
+        ws = wb.active
+        return ColumnarTable.from_rows(row for row in ws.iter_rows(values_only=True) if row is not None)
+    wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
+    try:
+        if sheet not in wb.sheetnames:
+            raise RuntimeError(f"工作簿里没有工作表：{sheet}")
+        ws = wb[sheet]
+        return ColumnarTable.from_rows(row for row in ws.iter_rows(values_only=True) if row is not None)
+    finally:
+        wb.close()
 
 
-# load_deck_from_xlsx（加载词典从XLSX），用于加载词典从XLSX。
-def load_deck_from_xlsx(path: str, start_col_1based: int = 1) -> List[Dict[str, str]]:
+# _import_openpyxl（导入openpyxl），用于导入openpyxl。
+def _import_openpyxl():
     try:
         import openpyxl  # type: ignore
     except Exception as e:
         raise RuntimeError("读取 .xlsx 需要 openpyxl：pip install openpyxl") from e
+    return openpyxl
 
-    start = max(1, int(start_col_1based))
-    col_a = start
-    col_b = start + 1
 
-    wb = openpyxl.load_workbook(path, data_only=True)
-    ws = wb.active
-    deck: List[Dict[str, str]] = []
-    for row in ws.iter_rows(values_only=True):
-        if row is None:
+# xlsx_sheet_names（工作表名列表），用于工作表名列表。
+def xlsx_sheet_names(path: str) -> List[str]:
+    openpyxl = _import_openpyxl()
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+# wrong_book_path（错题本路径），用于按词典标识得到错题本路径。
+def wrong_book_path(deck_id: str) -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, f"wrong_book_{deck_id}.json")
+
+
+# --------------------------- Deck identity ---------------------------
+# 词典标识 = 规范化后 (A, B) 序列的 BLAKE2 指纹（16 位十六进制），与文件放在哪、叫什么无关：
+# 挪动/改名不丢错题本，同一词典的多份拷贝共用一本。指纹按 (路径, 列, 分隔符) + 文件签名
+# 缓存在 .gms_cache/fingerprints.json，重复启动不必重新哈希。
+# 旧版按路径生成的 ID（deck_id_from_path）仍用作流式加载首次打开时的临时标识，
+# 以及迁移时查找旧错题本。
+
+FINGERPRINT_CACHE_NAME = "fingerprints.json"
+
+_FP_CACHE: Optional[Dict[str, Dict[str, str]]] = None
+
+
+# deck_fingerprint（词典指纹），用于对规范化后的 (A, B) 序列做流式 BLAKE2 哈希。
+def deck_fingerprint(deck) -> str:
+    """首尾空白去掉、非 ASCII 做 NFC；按块喂给哈希，不拼出整个词典的大字符串。"""
+    import hashlib
+    import unicodedata
+    h = hashlib.blake2b(digest_size=8, person=b"gmsdeck1")
+    arena = isinstance(deck, ArenaDeck)
+    parts: List[str] = []
+    for i in range(len(deck)):
+        if arena:
+            a, b = deck.cell(2 * i), deck.cell(2 * i + 1)
+        else:
+            row = deck[i]
+            a, b = row["A"], row["B"]
+        a = a.strip()
+        b = b.strip()
+        if not a.isascii():
+            a = unicodedata.normalize("NFC", a)
+        if not b.isascii():
+            b = unicodedata.normalize("NFC", b)
+        parts += (a, "\x1f", b, "\x1e")
+        if len(parts) >= 16384:
+            h.update("".join(parts).encode("utf-8"))
+            parts.clear()
+    if parts:
+        h.update("".join(parts).encode("utf-8"))
+    return h.hexdigest()
+
+
+# _fp_cache_file（指纹缓存文件），用于指纹缓存文件路径。
+def _fp_cache_file() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ".gms_cache", FINGERPRINT_CACHE_NAME)
+
+
+# _fp_cache（指纹缓存），用于读取（并在进程内保留）指纹缓存。
+def _fp_cache() -> Dict[str, Dict[str, str]]:
+    global _FP_CACHE
+    if _FP_CACHE is None:
+        import json
+        try:
+            with open(_fp_cache_file(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            _FP_CACHE = data if isinstance(data, dict) else {}
+        except Exception:
+            _FP_CACHE = {}
+    return _FP_CACHE
+
+
+# _fp_cache_key（指纹缓存键），用于指纹缓存键。
+def _fp_cache_key(path: str, col: int, sep: Optional[str], col_b: Optional[int]) -> str:
+    return json_dumps_compact([os.path.abspath(path), col, sep, col_b])
+
+
+# cached_fingerprint（缓存的指纹），用于文件签名未变时直接取缓存的指纹。
+def cached_fingerprint(path: str, col: int, sep: Optional[str], col_b: Optional[int], sig) -> Optional[str]:
+    if sig is None:
+        return None
+    ent = _fp_cache().get(_fp_cache_key(path, col, sep, col_b))
+    if ent and ent.get("sig") == json_dumps_compact(sig):
+        return ent.get("fp")
+    return None
+
+
+# remember_fingerprint（记录指纹），用于写入指纹缓存；返回该路径此前记录的（不同的）指纹。
+def remember_fingerprint(path: str, col: int, sep: Optional[str], col_b: Optional[int], sig, fp: str) -> Optional[str]:
+    cache = _fp_cache()
+    key = _fp_cache_key(path, col, sep, col_b)
+    prev = (cache.get(key) or {}).get("fp")
+    cache[key] = {"sig": json_dumps_compact(sig), "fp": fp}
+    import json
+    target = _fp_cache_file()
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp, target)
+    except OSError:
+        pass  # 缓存写不进去只是下次要重新哈希
+    return prev if prev != fp else None
+
+
+# resolve_deck_id（确定词典标识），用于得到词典标识，并返回可能需要迁移的旧标识。
+def resolve_deck_id(path: str, col: int, sep: Optional[str], col_b: Optional[int], sig,
+                    deck=None) -> Tuple[str, List[str], Optional[str]]:
+    """
+    缓存命中直接用；否则有完整词典（deck 非空）就当场哈希；都没有则退回路径 ID。
+    第二项是旧标识：路径 ID（升级前的错题本）和该路径上次记录的指纹（词典被离线编辑过）。
+    第三项是当场算出、尚未写入指纹缓存的指纹；只读不写，由 adopt_loaded_state 落盘。
+    """
+    legacy = deck_id_from_path(path)
+    fp = cached_fingerprint(path, col, sep, col_b, sig)
+    if fp is not None:
+        return fp, [legacy], None
+    if not deck or sig is None:
+        return legacy, [], None
+    fp = deck_fingerprint(deck)
+    prev = (_fp_cache().get(_fp_cache_key(path, col, sep, col_b)) or {}).get("fp")
+    return fp, [legacy] + ([prev] if prev and prev != fp else []), fp
+
+
+# fingerprint_after_stream（流式加载后补指纹），用于流式词典读完后在后台补算指纹，供下次启动使用。
+def fingerprint_after_stream(stream: "DeckStream", path: str, col: int, sep: Optional[str],
+                             col_b: Optional[int], sig) -> None:
+    import threading
+
+    def work():
+        stream.wait()
+        if stream.error is None and not stream._stop and stream.deck:
+            remember_fingerprint(path, col, sep, col_b, sig, deck_fingerprint(stream.deck))
+
+    threading.Thread(target=work, name="deck-fingerprint", daemon=True).start()
+
+
+# migrate_orphan_wrong_books（迁移孤立错题本），用于把旧标识的错题本并入当前错题本（只改内存）。
+def migrate_orphan_wrong_books(wrong_db: List[Dict], deck_id: str, wrong_path: str, old_ids: List[str]) -> List[str]:
+    """返回并入了的旧错题本路径；改名为 *.json.merged 备份和保存留到 adopt_loaded_state。"""
+    merged: List[str] = []
+    for oid in dict.fromkeys(old_ids):
+        if not oid or oid == deck_id:
             continue
-        if len(row) < col_b:
+        op = wrong_book_path(oid)
+        if not os.path.exists(op):
             continue
-        a = safe_str(row[col_a - 1])
-        b = safe_str(row[col_b - 1])
-        if not a or not b:
+        old = load_wrong_db(op)
+        for e in old:
+            e["deck_id"] = deck_id
+        wrong_db.extend(old)
+        merged.append(op)
+    if merged:
+        dedup_wrong_db(wrong_db, wrong_path, save=False)
+    return merged
+
+
+@dataclass
+class PendingAdopt:
+    """open_deck_state 推迟的落盘操作：词典真正被采用（adopt_loaded_state）时才执行。"""
+    orphan_paths: Tuple[str, ...] = ()  # 已并入内存的旧错题本，待改名 *.merged
+    fingerprint: Optional[str] = None  # 当场算出的指纹，待写入指纹缓存
+    stream_fingerprint: bool = False   # 流式词典读完后再补算指纹
+    save_wrong: bool = False           # 合并 / 校正过错题本，待保存
+
+
+# adopt_loaded_state（采用已加载的词典），用于把加载时推迟的改名、保存、指纹缓存写入落盘。
+def adopt_loaded_state(state: "State") -> None:
+    """
+    加载本身只读盘（预加载线程里跑、用户可能拒绝、也可能与手动加载并发），
+    确定换成这份 State 后再调用；重复调用无副作用。
+    """
+    todo, state.pending_adopt = state.pending_adopt, None
+    if todo is None:
+        return
+    if todo.save_wrong:
+        save_wrong_book(state)
+    for op in todo.orphan_paths:
+        try:
+            os.replace(op, op + ".merged")
+        except OSError:
+            pass
+    key = (state.deck_path, state.deck_col, state.deck_sep, state.deck_col_b)
+    if todo.fingerprint is not None:
+        remember_fingerprint(*key, state.source_sig, todo.fingerprint)
+    if todo.stream_fingerprint and state.stream is not None:
+        fingerprint_after_stream(state.stream, *key, state.source_sig)
+
+
+# adopt_deck_id（换用新标识），用于词典内容变化后把错题本搬到新指纹名下。
+def adopt_deck_id(state: "State", new_id: str) -> None:
+    if new_id == state.deck_id:
+        return
+    old_path = state.wrong_path
+    new_path = wrong_book_path(new_id)
+    for e in state.wrong_db:
+        e["deck_id"] = new_id
+    if os.path.exists(new_path):  # 改回了以前的内容：那本也并进来
+        state.wrong_db.extend(e for e in load_wrong_db(new_path) if e.get("deck_id") == new_id)
+        dedup_wrong_db(state.wrong_db, new_path)
+    old_id = state.deck_id
+    state.deck_id = new_id
+    state.wrong_path = new_path
+    save_wrong_book(state)
+    if any(ent.get("fp") == old_id for ent in _fp_cache().values()):
+        return  # 还有别的拷贝是旧内容，旧错题本留给它们
+    try:
+        os.remove(old_path)
+    except OSError:
+        pass
+
+
+# item_key（条目内容键），用于给错题记录一个不随行号变化的身份。
+def item_key(a: str, b: str) -> str:
+    import hashlib
+    return hashlib.blake2b(f"{a}\x1f{b}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+# --------------------------- Loaders ---------------------------
+
+# load_deck_from_csv（加载词典从CSV），用于加载词典从CSV。
+def load_deck_from_csv(path: str, start_col_1based: int = 1, sep: Optional[str] = None,
+                       col_b_1based: Optional[int] = None) -> List[Dict[str, str]]:
+    table = get_columnar_table(path, ("csv", sep), lambda: parse_csv_columns(path, sep))
+    return table.pair(*_pair_indices(start_col_1based, col_b_1based))
+
+
+# load_deck_from_xlsx（加载词典从XLSX），用于加载词典从XLSX。
+def load_deck_from_xlsx(path: str, start_col_1based: int = 1,
+                        col_b_1based: Optional[int] = None, sheet: Optional[str] = None) -> List[Dict[str, str]]:
+    table = get_columnar_table(path, ("xlsx", sheet), lambda: parse_xlsx_columns(path, sheet))
+    return table.pair(*_pair_indices(start_col_1based, col_b_1based))
+
+
+# iter_json_array（逐个读取JSON数组元素），用于逐个读取JSON数组元素。
+def iter_json_array(f, read_size: int = 1 << 16):
+    """
+    增量解析顶层 JSON 数组：在滑动缓冲区上用 JSONDecoder.raw_decode 一次解一个元素，
+    峰值内存只和单个元素大小相关，不会先建出整棵对象树。顶层不是数组时不产出任何元素。
+    """
+    import json
+    dec = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def _fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = f.read(read_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def _skip_ws() -> bool:
+        """跳过空白；返回 False 表示已到文件尾。"""
+        nonlocal pos
+        while True:
+            n = len(buf)
+            while pos < n and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < n:
+                return True
+            if not _fill():
+                return False
+
+    if not _skip_ws():
+        return
+    if buf[pos] == "\ufeff":  # BOM
+        pos += 1
+        if not _skip_ws():
+            return
+    if buf[pos] != "[":
+        return
+    pos += 1
+    if not _skip_ws():
+        raise ValueError("JSON 数组未闭合")
+    if buf[pos] == "]":
+        return
+
+    while True:
+        try:
+            obj, end = dec.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if not _fill():
+                raise
             continue
-        deck.append({"A": a, "B": b})
-    return deck
+        # 数字等标量可能恰好在缓冲区末尾被截断（如 12|3），需再读一块确认
+        if end >= len(buf) and not eof:
+            _fill()
+            continue
+        yield obj
+        pos = end
+        if not _skip_ws():
+            raise ValueError("JSON 数组未闭合")
+        c = buf[pos]
+        pos += 1
+        if c == "]":
+            return
+        if c != ",":
+            raise ValueError(f"JSON 数组元素之间缺少逗号（位置附近：{buf[pos - 1:pos + 20]!r}）")
+        if not _skip_ws():
+            raise ValueError("JSON 数组未闭合")
+
+
+# _json_item_to_pair（JSON元素转A-B），用于JSON元素转A-B。
+def _json_item_to_pair(it) -> Tuple[str, str]:
+    if isinstance(it, dict):
+        a = safe_str(it.get("A") or it.get("a") or it.get("front") or it.get("left") or it.get("x"))
+        b = safe_str(it.get("B") or it.get("b") or it.get("back") or it.get("right") or it.get("y"))
+    elif isinstance(it, (list, tuple)) and len(it) >= 2:
+        a = safe_str(it[0])
+        b = safe_str(it[1])
+    else:
+        return "", ""
+    return a, b
 
 
 # load_deck_from_json（加载词典从JSON），用于加载词典从JSON。
 def load_deck_from_json(path: str) -> List[Dict[str, str]]:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    deck: List[Dict[str, str]] = []
+    f, _raw = open_deck_text(path)
+    with f:
+        for it in iter_json_array(f):
+            a, b = _json_item_to_pair(it)
+            if a and b:
+                deck.append({"A": a, "B": b})
+    return deck
 
+
+# iter_jsonl（逐行读取JSON Lines），用于逐行读取JSON Lines。
+def iter_jsonl(f):
+    import json
+    for lineno, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSONL 第 {lineno} 行解析失败：{e}") from e
+
+
+# load_deck_from_jsonl（加载词典从JSONL），用于加载词典从JSONL。
+def load_deck_from_jsonl(path: str) -> List[Dict[str, str]]:
+    """每行一个元素，元素形式与 .json 相同：[A, B] 或 {"A":..., "B":...}。"""
     deck: List[Dict[str, str]] = []
-    if isinstance(data, list):
-        for it in data:
-            if isinstance(it, dict):
-                a = safe_str(it.get("A") or it.get("a") or it.get("front") or it.get("left") or it.get("x"))
-                b = safe_str(it.get("B") or it.get("b") or it.get("back") or it.get("right") or it.get("y"))
-            elif isinstance(it, (list, tuple)) and len(it) >= 2:
-                a = safe_str(it[0])
-                b = safe_str(it[1])
-            else:
-                continue
+    f, _raw = open_deck_text(path)
+    with f:
+        for it in iter_jsonl(f):
+            a, b = _json_item_to_pair(it)
             if a and b:
                 deck.append({"A": a, "B": b})
     return deck
 
 
+# --------------------------- Streaming loader ---------------------------
+# 超大 CSV/TSV：先同步读第一块就返回，其余在后台线程里边读边追加到 state.deck，
+# 各模式按当时已加载的行出题；draw_header 显示加载进度。
+
+STREAM_THRESHOLD_BYTES = 32 * 1024 * 1024
+STREAM_CHUNK_ROWS = 20000
+STREAM_CSV_EXTS = (".csv", ".tsv", ".txt")
+STREAM_EXTS = STREAM_CSV_EXTS + (".json", ".jsonl")
+# 常驻模式（--serve）关掉：fork 只复制调用线程，后台加载线程到了子进程里就停了，词典永远加载不完
+STREAM_LOADS = True
+
+
+# _iter_pairs（逐行产出A-B），用于按格式逐行产出 (A, B)；过滤规则与各 load_deck_from_* 一致。
+def _iter_pairs(f, ext: str, start_col_1based: int, sep: Optional[str], col_b_1based: Optional[int]):
+    if ext in (".json", ".jsonl"):
+        items = iter_json_array(f) if ext == ".json" else iter_jsonl(f)
+        for it in items:
+            a, b = _json_item_to_pair(it)
+            if a and b:
+                yield a, b
+        return
+    import csv
+    idx_a, idx_b = _pair_indices(start_col_1based, col_b_1based)
+    need = max(idx_a, idx_b)
+    pos = f.tell()
+    first = f.readline()
+    f.seek(pos)
+    for row in csv.reader(f, delimiter=choose_delimiter(first, sep)):
+        if len(row) <= need:
+            continue
+        a = safe_str(row[idx_a])
+        b = safe_str(row[idx_b])
+        if a and b:
+            yield a, b
+
+
+# iter_deck_chunks（逐块读取词典），用于逐块读取词典。
+def iter_deck_chunks(path: str, start_col_1based: int = 1, sep: Optional[str] = None,
+                     col_b_1based: Optional[int] = None, chunk_rows: int = STREAM_CHUNK_ROWS):
+    """生成器：逐块产出 (rows, 已读取的源文件字节数)；支持 CSV/TSV/TXT/JSON/JSONL 及其压缩版本。"""
+    ext = split_deck_ext(path)[0]
+    f, raw = open_deck_text(path, newline="" if ext in STREAM_CSV_EXTS else None)
+    with f:
+        chunk: List[Dict[str, str]] = []
+        for a, b in _iter_pairs(f, ext, start_col_1based, sep, col_b_1based):
+            chunk.append({"A": a, "B": b})
+            if len(chunk) >= chunk_rows:
+                yield chunk, raw.tell()
+                chunk = []
+        if chunk:
+            yield chunk, raw.tell()
+
+
+class DeckStream:
+    """后台把剩余块追加进 deck（list.extend 在 GIL 下原子，前台随时读 len(deck) 都安全）。"""
+
+    def __init__(self, deck: List[Dict[str, str]], chunks, total_bytes: int, bytes_read: int = 0):
+        import threading
+        self.deck = deck
+        self.total_bytes = max(1, total_bytes)
+        self.bytes_read = bytes_read
+        self.error: Optional[BaseException] = None
+        self._chunks = chunks
+        self._stop = False
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="deck-stream", daemon=True)
+
+    # start（启动），用于启动。
+    def start(self) -> "DeckStream":
+        self._thread.start()
+        return self
+
+    # _run（运行），用于运行。
+    def _run(self) -> None:
+        try:
+            for chunk, pos in self._chunks:
+                if self._stop:
+                    break
+                self.deck.extend(chunk)
+                self.bytes_read = pos
+            self.bytes_read = self.total_bytes
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    # done（是否完成），用于是否完成。
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    # wait（等待），用于等待。
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    # stop（停止），用于停止。
+    def stop(self) -> None:
+        self._stop = True
+
+    # progress_text（进度文本），用于进度文本。
+    def progress_text(self) -> str:
+        pct = min(100, self.bytes_read * 100 // self.total_bytes)
+        return f"⏳ 已加载 {len(self.deck):,} 行 {pct}%"
+
+
+# _should_stream（是否流式加载），用于判断是否流式加载。
+def _should_stream(path: str) -> bool:
+    if not STREAM_LOADS or split_deck_ext(path)[0] not in STREAM_EXTS:
+        return False
+    try:
+        return os.path.getsize(path) >= STREAM_THRESHOLD_BYTES
+    except OSError:
+        return False
+
+
+# open_deck_stream（打开流式词典），用于打开流式词典：读完第一块即返回。
+def open_deck_stream(path: str, start_col_1based: int = 1, sep: Optional[str] = None,
+                     col_b_1based: Optional[int] = None) -> Tuple[List[Dict[str, str]], Optional["DeckStream"]]:
+    chunks = iter_deck_chunks(path, start_col_1based, sep, col_b_1based)
+    deck = ArenaDeck() if DECK_STORAGE == "arena" else []
+    pos = 0
+    for chunk, pos in chunks:
+        deck.extend(chunk)
+        break
+    else:
+        return deck, None
+    return deck, DeckStream(deck, chunks, os.path.getsize(path), pos).start()
+
+
+# --------------------------- Arena deck ---------------------------
+# --arena：所有单元格按 UTF-8 顺序存进一块连续缓冲区（bytearray 或 mmap），
+# 另用 array 偏移表定位；deck[i] 时才解码，并保留一小块热点行缓存。
+# 每行省掉 dict + 两个 str 对象头，500 万行的词典只需几百 MB。
+
+ARENA_HOT_ROWS = 4096
+
+DECK_STORAGE = "list"  # "list" | "arena"，由 --arena 切换
+
+
+class ArenaDeck:
+    """
+    只读行视图 + 追加写：deck[i] 返回 {"A":..., "B":...}，和普通 list[dict] 用法一致。
+    偏移表 offsets 长度为 2n+1，第 i 行的 A/B 分别是
+    buf[offsets[2i]:offsets[2i+1]] 和 buf[offsets[2i+1]:offsets[2i+2]]。
+    """
+
+    def __init__(self, buf=None, offsets=None, base: int = 0):
+        from array import array
+        self.buf = bytearray() if buf is None else buf
+        self.offsets = array("I", [0]) if offsets is None else offsets
+        self.base = base  # 负载在 buf 中的起点（mmap 的编译文件里跳过文件头和偏移表）
+        self.sources: Optional[List[Tuple[int, str]]] = None  # 多来源词典的出处，见 deck_source_of
+        self._hot: Dict[int, Dict[str, str]] = {}
+
+    # from_rows（从行构建），用于从行构建。
+    @classmethod
+    def from_rows(cls, rows) -> "ArenaDeck":
+        deck = cls()
+        deck.extend(rows)
+        return deck
+
+    def __len__(self) -> int:
+        # 先写缓冲区再追加偏移；写到一半的行不会被计入
+        return (len(self.offsets) - 1) // 2
+
+    def __getitem__(self, i: int) -> Dict[str, str]:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("ArenaDeck index out of range")
+        row = self._hot.get(i)
+        if row is None:
+            if len(self._hot) >= ARENA_HOT_ROWS:
+                self._hot.clear()
+            row = {"A": self.cell(2 * i), "B": self.cell(2 * i + 1)}
+            self._hot[i] = row
+        return row
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # cell（单元格），用于按单元格序号解码（不进热点缓存）。
+    def cell(self, k: int) -> str:
+        off = self.offsets
+        base = self.base
+        return self.buf[base + off[k]:base + off[k + 1]].decode("utf-8")
+
+    # extend（追加），用于追加。
+    def extend(self, rows) -> None:
+        if not isinstance(self.buf, bytearray):
+            raise TypeError("只读（mmap）词典不能追加")
+        buf = self.buf
+        off = self.offsets
+        for it in rows:
+            a = it["A"].encode("utf-8")
+            b = it["B"].encode("utf-8")
+            end = len(buf) + len(a) + len(b)
+            if end > 0xFFFFFFFF and off.typecode == "I":
+                from array import array
+                self.offsets = off = array("Q", off)
+            buf += a
+            buf += b
+            off.append(end - len(b))
+            off.append(end)
+
+    # append（追加一行），用于追加一行。
+    def append(self, row: Dict[str, str]) -> None:
+        self.extend((row,))
+
+    # nbytes（字节数），用于字节数。
+    @property
+    def nbytes(self) -> int:
+        return len(self.buf) + self.offsets.itemsize * len(self.offsets)
+
+
+# load_deck_arena（加载为 arena 词典），用于加载为 arena 词典。
+def load_deck_arena(path: str, start_col_1based: int = 1, sep: Optional[str] = None,
+                    col_b_1based: Optional[int] = None) -> ArenaDeck:
+    """文本格式逐块直接写入 arena，不经过列式缓存（否则每个单元格仍会留一个 str）。"""
+    if os.path.isfile(path) and split_deck_ext(path)[0] in STREAM_EXTS:
+        deck = ArenaDeck()
+        for chunk, _pos in iter_deck_chunks(path, start_col_1based, sep, col_b_1based):
+            deck.extend(chunk)
+        return deck
+    rows = load_deck(path, start_col_1based, sep, col_b_1based)
+    deck = ArenaDeck.from_rows(rows)
+    deck.sources = getattr(rows, "sources", None)
+    return deck
+
+
+# --------------------------- Compiled deck (.gmsdeck) ---------------------------
+# 编译后的词典文件：文件头 | 偏移表 | UTF-8 负载，小端。
+# 通过 mmap 打开：打开耗时与大小无关，deck[i] 是 O(1) 的切片+解码，
+# 同机多个训练进程共享同一份 OS 页缓存。
+#   文件头（48 字节）：magic(8) itemsize(u32) flags(u32) nrows(u64) src_size(u64) src_mtime_ns(u64) 保留(8)
+#   偏移表：(2*nrows+1) 个 itemsize 字节的无符号整数，含义同 ArenaDeck.offsets
+
+GMSDECK_MAGIC = b"GMSDECK1"
+GMSDECK_HEADER = "<8sIIQQQ8x"
+GMSDECK_EXT = ".gmsdeck"
+
+
+# compile_deck（编译词典），用于把词典写成 .gmsdeck 文件（先写临时文件再原子替换）。
+def compile_deck(deck, out_path: str, src_sig: Optional[Tuple[int, int]] = None) -> str:
+    import struct
+    import sys
+    arena = deck if isinstance(deck, ArenaDeck) and isinstance(deck.buf, bytearray) else ArenaDeck.from_rows(deck)
+    offsets = arena.offsets
+    if sys.byteorder != "little":
+        offsets = type(offsets)(offsets.typecode, offsets)
+        offsets.byteswap()
+    src_size, src_mtime = src_sig or (0, 0)
+    header = struct.pack(GMSDECK_HEADER, GMSDECK_MAGIC, offsets.itemsize, 0, len(arena), src_size, src_mtime)
+    tmp = f"{out_path}.tmp{os.getpid()}"
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(tmp, "wb") as f:
+        f.write(header)
+        offsets.tofile(f)
+        f.write(arena.buf)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+# read_compiled_header（读取编译文件头），用于读取编译文件头。
+def read_compiled_header(path: str) -> Optional[Dict[str, int]]:
+    import struct
+    size = struct.calcsize(GMSDECK_HEADER)
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(size)
+    except OSError:
+        return None
+    if len(raw) != size:
+        return None
+    magic, itemsize, flags, nrows, src_size, src_mtime = struct.unpack(GMSDECK_HEADER, raw)
+    if magic != GMSDECK_MAGIC or itemsize not in (4, 8):
+        return None
+    return {"itemsize": itemsize, "flags": flags, "nrows": nrows,
+            "src_size": src_size, "src_mtime_ns": src_mtime, "header_size": size}
+
+
+# open_compiled_deck（打开编译词典），用于 mmap 打开 .gmsdeck。
+def open_compiled_deck(path: str) -> ArenaDeck:
+    import mmap
+    import sys
+    hdr = read_compiled_header(path)
+    if hdr is None:
+        raise RuntimeError(f"不是有效的 {GMSDECK_EXT} 文件：{path}")
+    n_off = 2 * hdr["nrows"] + 1
+    off_start = hdr["header_size"]
+    off_end = off_start + n_off * hdr["itemsize"]
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < off_end:
+            raise RuntimeError(f"{GMSDECK_EXT} 文件不完整：{path}")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    code = "I" if hdr["itemsize"] == 4 else "Q"
+    if sys.byteorder == "little":
+        offsets = memoryview(mm)[off_start:off_end].cast(code)  # 零拷贝
+    else:
+        from array import array
+        offsets = array(code, mm[off_start:off_end])
+        offsets.byteswap()
+    return ArenaDeck(buf=mm, offsets=offsets, base=off_end)
+
+
+# compiled_cache_path（编译缓存路径），用于 --arena 时的自动编译缓存路径。
+def compiled_cache_path(path: str, col: int, sep: Optional[str], col_b: Optional[int]) -> str:
+    import hashlib
+    key = json_dumps_compact([os.path.abspath(path), col, sep, col_b])
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + GMSDECK_EXT
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ".gms_cache", name)
+
+
+# json_dumps_compact（紧凑JSON），用于生成稳定的缓存键。
+def json_dumps_compact(obj) -> str:
+    import json
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+# load_deck_compiled_cached（按编译缓存加载），用于 --arena：缓存有效则直接 mmap，否则编译后再 mmap。
+def load_deck_compiled_cached(path: str, col: int, sep: Optional[str], col_b: Optional[int]) -> ArenaDeck:
+    if not os.path.isfile(path):
+        return load_deck_arena(path, start_col_1based=col, sep=sep, col_b_1based=col_b)  # 多来源不编译缓存
+    cache = compiled_cache_path(path, col, sep, col_b)
+    sig = _file_sig(path)
+    hdr = read_compiled_header(cache)
+    if hdr is not None and sig is not None and (hdr["src_size"], hdr["src_mtime_ns"]) == sig:
+        try:
+            return open_compiled_deck(cache)
+        except Exception:
+            pass
+    deck = load_deck_arena(path, start_col_1based=col, sep=sep, col_b_1based=col_b)
+    try:
+        compile_deck(deck, cache, src_sig=sig)
+        return open_compiled_deck(cache)
+    except OSError:
+        return deck
+
+
+# --------------------------- Multi-source decks ---------------------------
+# 一个“词典路径”可以对应多个来源：
+#   book.xlsx#Sheet1   指定工作表；book.xlsx#*  全部工作表（每表一种语言）
+#   some/dir/          目录下所有支持的词典文件（不递归）
+#   some/dir/*.csv     glob
+# 每个工作表/文件在 ProcessPoolExecutor 的子进程里解析，按来源顺序合并（结果确定），
+# 合并后的词典带 sources = [(起始行, 来源标签)]，用 deck_source_of 查任意一行的出处。
+
+DECK_FILE_EXTS = (".csv", ".tsv", ".txt", ".json", ".jsonl", ".xlsx", ".xlsm", ".gmsdeck")
+
+# 来源总大小低于该值且不含 xlsx 时串行解析：进程池启动和回传序列化比解析本身还贵
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+
+class SourcedDeck(list):
+    """多来源合并的词典（就是 list[dict]），另带按行号区间记录的来源表。"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.sources: List[Tuple[int, str]] = []
+
+
+# deck_source_of（行来源），用于查询第 i 行来自哪个文件/工作表；单文件词典返回 None。
+def deck_source_of(deck, i: int) -> Optional[str]:
+    import bisect
+    sources = getattr(deck, "sources", None)
+    if not sources:
+        return None
+    k = bisect.bisect_right([start for start, _ in sources], i) - 1
+    return sources[k][1] if k >= 0 else None
+
+
+# split_sheet_spec（拆分工作表选择），用于把 book.xlsx#Sheet 拆成 (文件, 表名)。
+def split_sheet_spec(path: str) -> Tuple[str, Optional[str]]:
+    if "#" in path and not os.path.exists(path):
+        base, sheet = path.rsplit("#", 1)
+        if split_deck_ext(base)[0] in (".xlsx", ".xlsm") and sheet:
+            return base, sheet
+    return path, None
+
+
+# _is_deck_file（是否词典文件），用于判断是否词典文件。
+def _is_deck_file(path: str) -> bool:
+    ext, codec = split_deck_ext(path)
+    if codec:
+        return ext in STREAM_EXTS
+    return ext in DECK_FILE_EXTS
+
+
+# expand_deck_sources（展开词典来源），用于展开词典来源。
+def expand_deck_sources(path: str) -> List[Tuple[str, Optional[str]]]:
+    """返回 [(文件, 工作表或 None)]；普通单文件返回 [(path, None)]。"""
+    import glob
+    base, sheet = split_sheet_spec(path)
+    if sheet is not None:
+        if sheet == "*":
+            return [(base, name) for name in xlsx_sheet_names(base)]
+        return [(base, sheet)]
+    if os.path.isdir(path):
+        files = [os.path.join(path, n) for n in os.listdir(path)]
+    elif not os.path.exists(path) and glob.has_magic(path):
+        files = glob.glob(path)
+    else:
+        return [(path, None)]
+    return [(f, None) for f in sorted(files) if os.path.isfile(f) and _is_deck_file(f)]
+
+
+# is_multi_source（是否多来源），用于是否多来源。
+def is_multi_source(path: str) -> bool:
+    return expand_deck_sources(path) != [(path, None)]
+
+
+# deck_source_exists（词典来源是否存在），用于替代 os.path.isfile 判断“词典路径”是否可用。
+def deck_source_exists(path: str) -> bool:
+    if os.path.isfile(path):
+        return True
+    base, sheet = split_sheet_spec(path)
+    if sheet is not None:
+        return os.path.isfile(base)
+    try:
+        return bool(expand_deck_sources(path))
+    except Exception:
+        return False
+
+
+# _source_label（来源标签），用于来源标签。
+def _source_label(file: str, sheet: Optional[str]) -> str:
+    name = os.path.basename(file)
+    return f"{name}#{sheet}" if sheet is not None else name
+
+
+# _load_source_rows（加载单个来源），用于在子进程里解析一个文件/工作表。
+def _load_source_rows(job) -> List[Tuple[str, str]]:
+    """返回 (A, B) 元组列表：元组比 dict 序列化回主进程更省。"""
+    file, sheet, col, sep, col_b = job
+    try:
+        if sheet is not None:
+            deck = load_deck_from_xlsx(file, start_col_1based=col, col_b_1based=col_b, sheet=sheet)
+        else:
+            deck = load_deck(file, start_col_1based=col, sep=sep, col_b_1based=col_b)
+        return [(it["A"], it["B"]) for it in deck]
+    except Exception as e:
+        raise RuntimeError(f"{_source_label(file, sheet)}：{e}") from None
+
+
+# _worth_parallel（是否值得并行），用于是否值得并行。
+def _worth_parallel(sources: List[Tuple[str, Optional[str]]]) -> bool:
+    total = 0
+    for f, sh in sources:
+        if sh is not None or split_deck_ext(f)[0] in (".xlsx", ".xlsm"):
+            return True
+        try:
+            total += os.path.getsize(f)
+        except OSError:
+            pass
+    return total >= PARALLEL_MIN_BYTES
+
+
+# load_deck_multi（加载多来源词典），用于并行加载多来源词典。
+def load_deck_multi(sources: List[Tuple[str, Optional[str]]], start_col_1based: int = 1, sep: Optional[str] = None,
+                    col_b_1based: Optional[int] = None, max_workers: Optional[int] = None) -> SourcedDeck:
+    if not sources:
+        raise RuntimeError("没有找到可读取的词典文件/工作表")
+    jobs = [(f, sh, start_col_1based, sep, col_b_1based) for f, sh in sources]
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    if max_workers is None and workers > 1 and not _worth_parallel(sources):
+        workers = 1
+    if workers <= 1:
+        results = [_load_source_rows(j) for j in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_load_source_rows, jobs))  # map 保持提交顺序
+
+    deck = SourcedDeck()
+    for (f, sh), rows in zip(sources, results):
+        if not rows:
+            continue
+        deck.sources.append((len(deck), _source_label(f, sh)))
+        deck.extend({"A": a, "B": b} for a, b in rows)
+    return deck
+
+
 # load_deck（加载词典），用于加载词典。
-def load_deck(path: str, start_col_1based: int = 1, sep: Optional[str] = None) -> List[Dict[str, str]]:
-    ext = os.path.splitext(path)[1].lower()
+def load_deck(path: str, start_col_1based: int = 1, sep: Optional[str] = None,
+              col_b_1based: Optional[int] = None) -> List[Dict[str, str]]:
+    if not os.path.isfile(path):
+        sources = expand_deck_sources(path)
+        if sources != [(path, None)]:
+            return load_deck_multi(sources, start_col_1based, sep, col_b_1based)
+    ext, codec = split_deck_ext(path)
+    if ext == GMSDECK_EXT and not codec:
+        return open_compiled_deck(path)  # 已是固定的 A/B 列，忽略列号
     if ext in (".csv", ".tsv", ".txt"):
-        return load_deck_from_csv(path, start_col_1based=start_col_1based, sep=sep)
-    if ext in (".xlsx", ".xlsm"):
-        return load_deck_from_xlsx(path, start_col_1based=start_col_1based)
+        return load_deck_from_csv(path, start_col_1based=start_col_1based, sep=sep, col_b_1based=col_b_1based)
+    if ext in (".xlsx", ".xlsm") and not codec:
+        return load_deck_from_xlsx(path, start_col_1based=start_col_1based, col_b_1based=col_b_1based)
     if ext in (".json",):
         return load_deck_from_json(path)
-    raise RuntimeError(f"不支持的文件类型：{ext}")
+    if ext in (".jsonl",):
+        return load_deck_from_jsonl(path)
+    raise RuntimeError(f"不支持的文件类型：{ext}{codec}")
 
 
 # --------------------------- Persistence (wrong book) ---------------------------
 
 # save_wrong_db（保存错题数据库），用于保存错题数据库。
-def save_wrong_db(path: str, db: List[Dict]) -> None:
+@perf_timed("save")
+def save_wrong_db(path: str, db: List[Dict]) -> Optional[int]:
+    """返回写出的字节数；写失败返回 None。"""
+    import json
     try:
         with open(path, "w", encoding="utf-8") as f:
             json.dump(db, f, ensure_ascii=False, indent=2)
+            return f.tell()
     except Exception:
-        pass
+        return None
 
 
 # load_wrong_db（加载错题数据库），用于加载错题数据库。
 def load_wrong_db(path: str) -> List[Dict]:
     if not os.path.exists(path):
         return []
+    import json
     try:
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -476,8 +1785,8 @@ def _norm_user_wrong_for_key(a_field: str, user_wrong: str) -> str:
 
 
 # dedup_wrong_db（去重错题数据库），用于去重错题数据库。
-def dedup_wrong_db(db: List[Dict], path: str) -> List[Dict]:
-    """同 (deck_id, item_index, question_field, answer_field, user_wrong_norm) 合并。"""
+def dedup_wrong_db(db: List[Dict], path: str, save: bool = True) -> List[Dict]:
+    """同 (deck_id, item_index, question_field, answer_field, user_wrong_norm) 合并；save=False 时只改内存。"""
     merged = {}
     for e in db:
         key = (
@@ -498,12 +1807,13 @@ def dedup_wrong_db(db: List[Dict], path: str) -> List[Dict]:
     result = list(merged.values())
     if len(result) != len(db):
         db[:] = result
-        save_wrong_db(path, db)
+        if save:
+            save_wrong_db(path, db)
     return db
 
 
 # weighted_pick_wrong（加权选择错题），用于加权选择错题。
-def weighted_pick_wrong(db: List[Dict], exclude_id: Optional[str] = None) -> Optional[Dict]:
+def weighted_pick_wrong(db: List[Dict], exclude_id: Optional[str] = None, rng=None) -> Optional[Dict]:
     candidates = [e for e in db if e.get("weight", 1) > 0]
     if not candidates:
         return None
@@ -514,7 +1824,7 @@ def weighted_pick_wrong(db: List[Dict], exclude_id: Optional[str] = None) -> Opt
     if exclude_id and len({e.get("id") for e in pool}) > 1:
         pool2 = [e for e in pool if e.get("id") != exclude_id]
         pool = pool2 or pool
-    choice = random.choice(pool)
+    choice = (rng or random).choice(pool)
     choice["last_seen"] = time.time()
     return choice
 
@@ -528,15 +1838,167 @@ class State:
     deck_id: str
     wrong_path: str
     wrong_db: List[Dict]
+    deck_col: int = 1
+    deck_sep: Optional[str] = None
+    deck_col_b: Optional[int] = None
+    stream: Optional["DeckStream"] = None
+    source_sig: object = None          # 加载时词典来源的 (size, mtime)，用于轮询热重载
+    last_poll: float = 0.0
+    reload_note: str = ""
+    conflicts: Optional["ConflictIndex"] = None  # 同题多答索引，加载时建立（流式词典出题时补齐），见 conflict_index
+    confusion: Optional["ConfusionMatrix"] = None  # 错题里“把 X 当成 Y”的计数，见 confusion_matrix
+    similar: Optional[Dict[str, "SimilarityIndex"]] = None  # 答案列的字符 n-gram 索引，见 similarity_index
+    search: Optional["SearchIndex"] = None  # 搜索用倒排索引，见 search_index
+    rng: Optional[random.Random] = None  # 出题用的随机源；None 用模块级 random，回放会话时注入固定种子
+    load_secs: Optional[float] = None    # open_deck_state 加载这份词典的耗时，HUD 显示
+    wrong_bytes: Optional[int] = None    # 错题本文件大小，加载 / save_wrong_book 时更新，HUD 显示
+    pending_adopt: Optional["PendingAdopt"] = None  # 加载时推迟的落盘操作，见 adopt_loaded_state
+
+    # loading（是否仍在后台加载），用于是否仍在后台加载。
+    def loading(self) -> bool:
+        return self.stream is not None and not self.stream.done()
+
+
+# save_wrong_book（保存当前错题本），用于保存 state 的错题本并记下文件大小。
+def save_wrong_book(state: State) -> None:
+    state.wrong_bytes = save_wrong_db(state.wrong_path, state.wrong_db)
+
+
+# state_rng（出题随机源），用于取 state 的随机源：注入了 random.Random 就用它，否则用模块级 random。
+def state_rng(state: State):
+    return state.rng if state.rng is not None else random
+
+
+# --------------------------- Deck cache (LRU) ---------------------------
+
+DECK_CACHE_MAX_ENTRIES = 8
+DECK_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# 每行粗估的对象开销：dict + 两个 str 头 + list 槽位
+_ROW_OVERHEAD_BYTES = 184 + 2 * 49 + 8
+
+
+# _file_sig（文件签名），用于按 (size, mtime) 判断文件是否变化。
+def _file_sig(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+# deck_source_sig（词典来源签名），用于多来源词典：所有来源文件的 (路径, size, mtime)。
+def deck_source_sig(path: str):
+    if os.path.isfile(path):
+        return _file_sig(path)
+    base, sheet = split_sheet_spec(path)
+    if sheet is not None:
+        return _file_sig(base)
+    try:
+        return tuple((f, _file_sig(f)) for f, _ in expand_deck_sources(path))
+    except Exception:
+        return None
+
+
+# approx_state_bytes（估算状态字节数），用于估算状态字节数。
+def approx_state_bytes(state: State) -> int:
+    deck = state.deck
+    if isinstance(deck, ArenaDeck):
+        return deck.nbytes + len(state.wrong_db) * 600
+    chars = 0
+    for it in deck:
+        chars += len(it["A"]) + len(it["B"])
+    # 中文字符在 str 里按 2 字节存，粗估取 2
+    return len(deck) * _ROW_OVERHEAD_BYTES + chars * 2 + len(state.wrong_db) * 600
+
+
+class DeckCache:
+    """
+    最近加载过的 State（词典 + 错题本 + 派生索引）的 LRU。
+    按条目数和估算字节数双重限额；取用时用词典文件和错题本的 (size, mtime) 校验：
+    - 词典文件变了：丢弃，调用方重新解析；
+    - 只有错题本变了（别的进程写过）：只重读错题本。
+    预加载线程（DeckPreloader）和界面线程都会读写，_d / total_bytes 的改动都在 _lock 里做。
+    """
+
+    def __init__(self, max_entries: int = DECK_CACHE_MAX_ENTRIES, max_bytes: int = DECK_CACHE_MAX_BYTES):
+        import threading
+        from collections import OrderedDict
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # key -> [state, deck_sig, wrong_sig, nbytes]
+        self._d: "OrderedDict[tuple, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # get（取），用于取。
+    def get(self, path: str, col: int, sep: str | None, col_b: int | None = None) -> Optional[State]:
+        key = (path, col, sep, col_b)
+        with self._lock:
+            ent = self._d.get(key)
+            if ent is None:
+                return None
+            state, deck_sig, wrong_sig, _ = ent
+            if deck_source_sig(path) != deck_sig:
+                self._drop(key)
+                return None
+            cur_wrong_sig = _file_sig(state.wrong_path)
+            if cur_wrong_sig != wrong_sig:
+                state.wrong_db = load_wrong_db(state.wrong_path)
+                ent[2] = cur_wrong_sig = _file_sig(state.wrong_path)
+            state.wrong_bytes = cur_wrong_sig[0] if cur_wrong_sig else None
+            self._d.move_to_end(key)
+            return state
+
+    # put（放入），用于放入（切走某个词典时也再放一次，刷新错题本签名）。
+    def put(self, state: State) -> None:
+        path = state.deck_path
+        if not deck_source_exists(path) or state.loading():
+            return  # 内置示例等非文件词典、仍在流式加载的词典不缓存
+        key = (path, state.deck_col, state.deck_sep, state.deck_col_b)
+        with self._lock:
+            old = self._d.get(key)
+            known = old is not None and old[0] is state
+        # 估算要逐行扫一遍，放在锁外；同一 State 再放一次沿用上次的估算
+        nbytes = old[3] if known else approx_state_bytes(state)
+        ent = [state, deck_source_sig(path), _file_sig(state.wrong_path), nbytes]
+        with self._lock:
+            self._drop(key)
+            if nbytes > self.max_bytes:
+                return
+            self._d[key] = ent
+            self.total_bytes += nbytes
+            while len(self._d) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._drop(next(iter(self._d)))
+
+    # _drop（移除），用于移除；调用方持有 _lock。
+    def _drop(self, key) -> None:
+        ent = self._d.pop(key, None)
+        if ent is not None:
+            self.total_bytes -= ent[3]
+
+    # clear（清空），用于清空。
+    def clear(self) -> None:
+        with self._lock:
+            self._d.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+
+DECK_CACHE = DeckCache()
 
 
 # add_wrong_entry（添加错题entry），用于添加错题entry。
 def add_wrong_entry(state: State, item_index: int, q_field: str, a_field: str, user_wrong: str, mode: str) -> None:
+    import uuid
     item = state.deck[item_index]
     entry = {
         "id": str(uuid.uuid4()),
         "deck_id": state.deck_id,
         "item_index": item_index,
+        "item_key": item_key(item.get("A", ""), item.get("B", "")),
         "question_field": q_field,
         "question_value": item.get(q_field, ""),
         "answer_field": a_field,
@@ -547,8 +2009,223 @@ def add_wrong_entry(state: State, item_index: int, q_field: str, a_field: str, u
         "last_seen": time.time(),
     }
     state.wrong_db.append(entry)
+    if state.confusion is not None:
+        state.confusion.observe(entry)
     dedup_wrong_db(state.wrong_db, state.wrong_path)
-    save_wrong_db(state.wrong_path, state.wrong_db)
+    save_wrong_book(state)
+
+
+# --------------------------- Incremental reload ---------------------------
+# 源文件被编辑后：按 (size, mtime) 轮询发现变化 → 重新读行 → 按内容与旧行比对，
+# 只对变化区间做插入/更新/删除，并只重映射受影响的错题 item_index。
+# 错题记录带 item_key（A/B 内容哈希），启动时若行号对不上也按内容找回。
+
+RELOAD_POLL_SECONDS = 2.0
+
+
+@dataclass
+class DeckDiff:
+    old_len: int
+    new_len: int
+    prefix: int                          # 头部相同的行数
+    suffix: int                          # 尾部相同的行数
+    moved: Dict[int, Optional[int]]      # 变化区间内：旧下标 → 新下标（None=已删除）
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+    @property
+    def delta(self) -> int:
+        return self.new_len - self.old_len
+
+    # changed（是否有变化），用于是否有变化。
+    def changed(self) -> bool:
+        return self.prefix < max(self.old_len, self.new_len)
+
+    # new_index（新下标），用于把旧下标映射到新下标；None 表示该行已删除。
+    def new_index(self, i: int) -> Optional[int]:
+        if i < self.prefix:
+            return i
+        if i >= self.old_len - self.suffix:
+            return i + self.delta
+        return self.moved.get(i)
+
+    # summary（摘要），用于摘要。
+    def summary(self) -> str:
+        return f"+{self.inserted} ~{self.updated} -{self.deleted}"
+
+
+# diff_deck_rows（比对词典行），用于比对新旧词典行。
+def diff_deck_rows(old, new) -> DeckDiff:
+    """先剥掉相同的头尾，只在中间变化区间里按 (A,B) 精确匹配，再按 A 匹配为“更新”。"""
+    n_old, n_new = len(old), len(new)
+    lim = min(n_old, n_new)
+    p = 0
+    while p < lim and old[p] == new[p]:
+        p += 1
+    q = 0
+    while q < lim - p and old[n_old - 1 - q] == new[n_new - 1 - q]:
+        q += 1
+
+    by_content: Dict[Tuple[str, str], List[int]] = {}
+    for j in range(n_new - q - 1, p - 1, -1):  # 倒序压栈，pop() 取最靠前的
+        it = new[j]
+        by_content.setdefault((it["A"], it["B"]), []).append(j)
+    moved: Dict[int, Optional[int]] = {}
+    unmatched: List[int] = []
+    for i in range(p, n_old - q):
+        it = old[i]
+        lst = by_content.get((it["A"], it["B"]))
+        if lst:
+            moved[i] = lst.pop()
+        else:
+            unmatched.append(i)
+
+    remaining = sorted(j for lst in by_content.values() for j in lst)
+    by_a: Dict[str, List[int]] = {}
+    for j in reversed(remaining):
+        by_a.setdefault(new[j]["A"], []).append(j)
+    updated = deleted = 0
+    for i in unmatched:
+        lst = by_a.get(old[i]["A"])
+        if lst:
+            moved[i] = lst.pop()
+            updated += 1
+        else:
+            moved[i] = None
+            deleted += 1
+    inserted = sum(len(lst) for lst in by_a.values())
+    return DeckDiff(n_old, n_new, p, q, moved, inserted=inserted, updated=updated, deleted=deleted)
+
+
+# _refresh_entry_from_row（按行刷新错题），用于按新行刷新错题的题干/答案/内容键。
+def _refresh_entry_from_row(e: Dict, j: int, row: Dict[str, str]) -> None:
+    e["item_index"] = j
+    e["item_key"] = item_key(row.get("A", ""), row.get("B", ""))
+    qf, af = e.get("question_field"), e.get("answer_field")
+    if qf in row:
+        e["question_value"] = row[qf]
+    if af in row:
+        e["correct_value"] = row[af]
+
+
+# remap_wrong_db（重映射错题本），用于按比对结果重映射错题本；返回是否有改动。
+def remap_wrong_db(wrong_db: List[Dict], diff: DeckDiff, new_deck) -> bool:
+    changed = False
+    keep: List[Dict] = []
+    for e in wrong_db:
+        i = e.get("item_index")
+        if not isinstance(i, int) or i < diff.prefix:
+            keep.append(e)
+            continue
+        j = diff.new_index(i)
+        if j is None:
+            changed = True  # 该行已从词典里删除，错题随之移除
+            continue
+        if j != i or diff.prefix <= i < diff.old_len - diff.suffix:
+            _refresh_entry_from_row(e, j, new_deck[j])
+            changed = True
+        keep.append(e)
+    if changed:
+        wrong_db[:] = keep
+    return changed
+
+
+# resolve_wrong_items（校正错题行号），用于加载时按内容键找回行号对不上的错题；只改内存，返回是否有改动。
+def resolve_wrong_items(state: "State") -> bool:
+    deck = state.deck
+    n = len(deck)
+    bad: List[Dict] = []
+    backfilled = False
+    for e in state.wrong_db:
+        i = e.get("item_index")
+        if not isinstance(i, int):
+            continue
+        key = e.get("item_key")
+        if 0 <= i < n:
+            row = deck[i]
+            k = item_key(row.get("A", ""), row.get("B", ""))
+            if k == key:
+                continue
+            if not key and row.get(e.get("question_field")) == e.get("question_value"):
+                e["item_key"] = k  # 旧格式错题：题干对得上就补上内容键
+                backfilled = True
+                continue
+        bad.append(e)
+    if not bad:
+        return backfilled
+    by_key: Dict[str, int] = {}
+    by_q: Dict[Tuple[str, str], int] = {}
+    for j in range(n):
+        row = deck[j]
+        by_key.setdefault(item_key(row["A"], row["B"]), j)
+        by_q.setdefault(("A", row["A"]), j)
+        by_q.setdefault(("B", row["B"]), j)
+    drop = set()
+    for e in bad:
+        j = by_key.get(e.get("item_key"))
+        if j is None:
+            j = by_q.get((e.get("question_field"), e.get("question_value")))
+        if j is None:
+            drop.add(id(e))
+        else:
+            _refresh_entry_from_row(e, j, deck[j])
+    if drop:
+        state.wrong_db[:] = [e for e in state.wrong_db if id(e) not in drop]
+    dedup_wrong_db(state.wrong_db, state.wrong_path, save=False)
+    return True
+
+
+# reload_deck_incremental（增量重载词典），用于增量重载词典。
+def reload_deck_incremental(state: "State") -> Optional[DeckDiff]:
+    sig = deck_source_sig(state.deck_path)
+    new_rows = load_deck(state.deck_path, start_col_1based=state.deck_col, sep=state.deck_sep,
+                         col_b_1based=state.deck_col_b)
+    old = state.deck
+    diff = diff_deck_rows(old, new_rows)
+    state.source_sig = sig
+    if not diff.changed():
+        return diff
+    state.conflicts = None  # 行内容变了，冲突索引、相似度索引、搜索索引重建
+    state.similar = None
+    state.search = None
+    if type(old) is list:
+        old[diff.prefix:diff.old_len - diff.suffix] = new_rows[diff.prefix:diff.new_len - diff.suffix]
+    elif isinstance(old, ArenaDeck):
+        arena = ArenaDeck.from_rows(new_rows)
+        arena.sources = getattr(new_rows, "sources", None)
+        state.deck = arena
+    else:
+        state.deck = new_rows  # SourcedDeck：来源区间整体替换
+    if remap_wrong_db(state.wrong_db, diff, state.deck):
+        dedup_wrong_db(state.wrong_db, state.wrong_path)
+        save_wrong_book(state)
+    if sig is not None:
+        fp = deck_fingerprint(state.deck)
+        remember_fingerprint(state.deck_path, state.deck_col, state.deck_sep, state.deck_col_b, sig, fp)
+        adopt_deck_id(state, fp)
+    DECK_CACHE.put(state)
+    return diff
+
+
+# poll_deck_reload（轮询热重载），用于轮询热重载；有变化时返回比对结果。
+def poll_deck_reload(state: "State", now: Optional[float] = None) -> Optional[DeckDiff]:
+    if state.source_sig is None or state.loading():
+        return None
+    now = time.time() if now is None else now
+    if now - state.last_poll < RELOAD_POLL_SECONDS:
+        return None
+    state.last_poll = now
+    if deck_source_sig(state.deck_path) == state.source_sig:
+        return None
+    try:
+        diff = reload_deck_incremental(state)
+    except Exception as e:
+        state.reload_note = f"⚠ 重载失败：{e}"
+        return None
+    if diff is not None and diff.changed():
+        state.reload_note = f"🔄 词典已更新：{diff.summary()}"
+    return diff
 
 
 # --------------------------- UI helpers ---------------------------
@@ -560,9 +2237,18 @@ def center_text(stdscr, y, text, attr=0):
     x = max(0, (w - display_width(tx)) // 2)
     safe_addstr(stdscr, y, x, tx, attr)
 
+_ACTIVE_STATE: Optional[State] = None
+
+
+# set_active_state（设置当前状态），用于让 draw_header 等无 state 参数的绘制函数拿到当前词典。
+def set_active_state(state: Optional[State]) -> None:
+    global _ACTIVE_STATE
+    _ACTIVE_STATE = state
+
+
 # draw_header（绘制标题），用于绘制标题。
 def draw_header(stdscr, title: str):
-    stdscr.clear()
+    stdscr.erase()
     h, w = stdscr.getmaxyx()
     border = "─" * (w - 2 if w >= 2 else 0)
     if w >= 2:
@@ -573,6 +2259,27 @@ def draw_header(stdscr, title: str):
         safe_addstr(stdscr, 1, 0, "│")
         safe_addstr(stdscr, 1, w - 1, "│")
         safe_addstr(stdscr, 2, 0, "└" + border + "┘")
+    st = _ACTIVE_STATE
+    if st is not None and st.stream is not None and w >= 4:
+        if st.stream.error is not None:
+            status = f"⚠ 加载中断：已加载 {len(st.deck):,} 行"
+        elif not st.stream.done():
+            status = st.stream.progress_text()
+        else:
+            status = ""
+        if status:
+            safe_addstr(stdscr, 1, max(1, w - 2 - display_width(status)), status)
+
+
+# draw_perf_hud（画性能状态行），用于在标题框第二行左侧画 HUD（给右侧的加载进度留位置）。
+def draw_perf_hud(stdscr) -> None:
+    h, w = stdscr.getmaxyx()
+    st = _ACTIVE_STATE
+    room = w - 4
+    if st is not None and st.stream is not None and not st.stream.done():
+        room -= display_width(st.stream.progress_text()) + 2
+    if h >= 3 and room > 8:
+        safe_addstr(stdscr, 1, 2, pad_to_width(perf_hud_text(st), room))
 
 
 # wait_key（等待键），用于等待键。
@@ -580,7 +2287,7 @@ def wait_key(stdscr, prompt="任意键继续，X返回菜单"):
     h, w = stdscr.getmaxyx()
     safe_addstr(stdscr, h - 2, 2, " " * max(0, w - 4))
     safe_addstr(stdscr, h - 2, 2, prompt[: max(0, w - 4)])
-    stdscr.refresh()
+    present(stdscr)
     while True:
         ch = stdscr.getch()
         if ch in (ord("x"), ord("X")):
@@ -594,21 +2301,535 @@ def input_line(stdscr, prompt: str) -> str:
     y = min(4, h - 4)
     safe_addstr(stdscr, y, 2, " " * max(0, w - 4))
     safe_addstr(stdscr, y, 2, prompt[: max(0, w - 4)])
-    stdscr.refresh()
-    curses.echo()
+    present(stdscr)
+    curses_call("echo")
     try:
         s = stdscr.getstr(y + 1, 2, 400).decode("utf-8", errors="ignore")
     finally:
-        curses.noecho()
+        curses_call("noecho")
     return s.strip()
 
 
-# paginate_lines（分页行列表），用于分页行列表。
-def paginate_lines(stdscr, lines: List[str], start_y=4):
+# pad_to_width（补齐到宽度），用于按显示宽度截断并补空格，排表格列用。
+def pad_to_width(s: str, width: int) -> str:
+    t = truncate_to_width(s, width)
+    return t + " " * max(0, width - display_width(t))
+
+
+# paginate_lines（分页行列表），用于折行后从第 scroll 行起画满可用高度。
+def paginate_lines(stdscr, lines: List[str], start_y=4, scroll: int = 0) -> Tuple[int, int]:
+    """返回 (折行后的总行数, 可见行数)；还有没显示完的内容时在右下角画 ▼。"""
     h, w = stdscr.getmaxyx()
     max_lines = max(0, h - start_y - 3)
-    for i, line in enumerate(lines[:max_lines]):
-        safe_addstr(stdscr, start_y + i, 2, line[: max(0, w - 4)])
+    wrapped = wrap_lines(lines, max(1, w - 4))
+    for i, line in enumerate(wrapped[scroll:scroll + max_lines]):
+        safe_addstr(stdscr, start_y + i, 2, line)
+    if max_lines and len(wrapped) - scroll > max_lines:
+        safe_addstr(stdscr, start_y + max_lines - 1, max(0, w - 3), "▼")
+    if scroll > 0 and max_lines:
+        safe_addstr(stdscr, start_y, max(0, w - 3), "▲")
+    return len(wrapped), max_lines
+
+
+# handle_resize（处理终端尺寸变化），用于 KEY_RESIZE：更新尺寸并清掉旧宽度的折行缓存。
+def handle_resize(stdscr) -> None:
+    try:
+        curses.update_lines_cols()
+    except (AttributeError, curses.error):
+        pass
+    wrap_text.cache_clear()
+
+
+# view_lines（可滚动查看），用于显示可能超过一屏的内容（答案揭晓等），返回用户按下的键。
+def view_lines(stdscr, title: str, lines: List[str], start_y: int = 4, prompt: str = "任意键继续，X返回菜单") -> int:
+    """↑/↓/PgUp/PgDn 只在内容超出一屏时用于滚动；折行结果有缓存，滚动不会重新排版。"""
+    scroll = 0
+    while True:
+        draw_header(stdscr, title)
+        h, w = stdscr.getmaxyx()
+        total, rows = paginate_lines(stdscr, lines, start_y, scroll)
+        overflow = total > rows
+        safe_addstr(stdscr, h - 2, 2, prompt + ("  （↑/↓ 翻动）" if overflow else ""))
+        present(stdscr)
+        ch = stdscr.getch()
+        if ch == curses.KEY_RESIZE:
+            handle_resize(stdscr)
+            continue
+        if overflow and ch in (curses.KEY_UP, curses.KEY_DOWN, curses.KEY_PPAGE, curses.KEY_NPAGE):
+            step = {curses.KEY_UP: -1, curses.KEY_DOWN: 1, curses.KEY_PPAGE: -rows, curses.KEY_NPAGE: rows}[ch]
+            scroll = max(0, min(total - rows, scroll + step))
+            continue
+        return ch
+
+
+# --------------------------- Conflict index ---------------------------
+# 同一个 A 对应多个 B（或反过来）时，另一行的 B 对这道题同样是“对的”：
+# 索引按规范化后的 A、B 分组，加载词典时（open_deck_state）建立；流式加载中的词典、热重载后的词典在出题时按新增行补齐/重建。
+# 索引按规范化后的 A、B 分组，首次出题时建立；流式加载中的词典按新增行增量补齐。
+
+
+# conflict_key（冲突分组键），用于冲突分组键（与 norm_text 等价，ASCII 走快路径）。
+def conflict_key(s: str) -> str:
+    if s.isascii():
+        return s.strip().casefold()
+    return norm_text(s)
+
+
+class ConflictIndex:
+    """groups[字段][规范化值] → 行号（只有一行时存 int，省掉百万个单元素 list）。"""
+
+    def __init__(self):
+        self.groups: Dict[str, Dict[str, object]] = {"A": {}, "B": {}}
+        self.size = 0
+
+    # sync（同步），用于把词典新增的行补进索引。
+    def sync(self, deck) -> "ConflictIndex":
+        n = len(deck)
+        ga, gb = self.groups["A"], self.groups["B"]
+        for i in range(self.size, n):
+            row = deck[i]
+            for g, v in ((ga, row["A"]), (gb, row["B"])):
+                k = conflict_key(v)
+                cur = g.get(k)
+                if cur is None:
+                    g[k] = i
+                elif isinstance(cur, list):
+                    cur.append(i)
+                else:
+                    g[k] = [cur, i]
+        self.size = n
+        return self
+
+    # rows（同组行），用于取与 value 规范化后相同的所有行。
+    def rows(self, field: str, value: str) -> List[int]:
+        cur = self.groups[field].get(conflict_key(value))
+        if cur is None:
+            return []
+        return cur if isinstance(cur, list) else [cur]
+
+    # answers（全部可接受答案），用于取题干 q_val 在 a_field 上的全部答案（保序去重，含同义项拆分）。
+    def answers(self, deck, q_field: str, q_val: str, a_field: str) -> List[str]:
+        out: List[str] = []
+        seen = set()
+        for j in self.rows(q_field, q_val):
+            for v in split_alternatives(deck[j][a_field]):
+                k = conflict_key(v)
+                if k not in seen:
+                    seen.add(k)
+                    out.append(v)
+        return out
+
+    # valid_keys（可接受答案键集合），用于判断某个值对该题是否也算对（整格和拆开的同义项都算）。
+    def valid_keys(self, deck, q_field: str, q_val: str, a_field: str) -> set:
+        keys = {conflict_key(v) for v in self.answers(deck, q_field, q_val, a_field)}
+        keys.update(conflict_key(deck[j][a_field]) for j in self.rows(q_field, q_val))
+        return keys
+
+    # conflict_groups（冲突分组），用于列出 field 相同但另一列不同的分组。
+    def conflict_groups(self, deck, field: str) -> List[List[int]]:
+        other = "B" if field == "A" else "A"
+        out = []
+        for cur in self.groups[field].values():
+            if isinstance(cur, list) and len({conflict_key(deck[j][other]) for j in cur}) > 1:
+                out.append(cur)
+        return out
+
+
+# conflict_index（冲突索引），用于取（必要时建立/补齐）当前词典的冲突索引。
+def conflict_index(state: "State") -> ConflictIndex:
+    if state.conflicts is None:
+        state.conflicts = ConflictIndex()
+    if state.conflicts.size != len(state.deck):
+        state.conflicts.sync(state.deck)
+    return state.conflicts
+
+
+# conflict_report（冲突报告），用于生成同题多答的报告行。
+def conflict_report(state: "State", limit: Optional[int] = None) -> List[str]:
+    deck = state.deck
+    idx = conflict_index(state)
+    lines: List[str] = []
+    for field in FIELDS:
+        other = "B" if field == "A" else "A"
+        groups = idx.conflict_groups(deck, field)
+        lines.append(f"同一 {FIELD_NAMES[field]} 对应多个 {FIELD_NAMES[other]}：{len(groups)} 组")
+        for rows in groups[:limit]:
+            vals = " / ".join(dict.fromkeys(deck[j][other] for j in rows))
+            lines.append(f"  {deck[rows[0]][field]} → {vals}  （第 {', '.join(str(j + 1) for j in rows)} 行）")
+        if limit is not None and len(groups) > limit:
+            lines.append(f"  …… 另有 {len(groups) - limit} 组")
+    return lines
+
+
+# --------------------------- Distractors ---------------------------
+# “近似错误”干扰项的两个来源：
+# 1) 混淆矩阵：错题本里记录过的 (正确答案, 用户答成了什么)，启动时从 wrong_db 汇总一次，
+#    之后每条新错题增量计入；双向记录——把 X 当成 Y，Y 的题也拿 X 做干扰项。
+# 2) 相似度索引：答案列的字符 n-gram 倒排表（ASCII 用三元组，CJK 等用二元组）。
+#    查询时每个 n-gram 只看倒排表里随机一小段，按命中次数取最像的几行，百万行词典也是亚毫秒。
+#    高频 n-gram 的倒排表封顶（等于停用词），大词典在后台线程建索引，建好前退回随机干扰项。
+
+NEAR_MISS_PER_MCQ = 2      # 每道选择题最多几个近似干扰项，其余仍随机，避免题目过于单一
+SIM_MAX_POSTING = 4096     # 单个 n-gram 倒排表封顶
+SIM_PROBE = 32             # 查询时每个 n-gram 探查的倒排表条数
+SIM_SYNC_ROWS = 20000      # 不超过该行数时当场建索引，否则后台建
+
+
+class ConfusionMatrix:
+    """稀疏混淆矩阵：(答案字段, 规范化正确值) → {规范化错答: [原文, 次数]}。"""
+
+    def __init__(self):
+        self.cells: Dict[Tuple[str, str], Dict[str, List]] = {}
+
+    # from_wrong_db（从错题本汇总），用于从错题本汇总。
+    @classmethod
+    def from_wrong_db(cls, db: List[Dict]) -> "ConfusionMatrix":
+        m = cls()
+        for e in db:
+            m.observe(e)
+        return m
+
+    # _bump（计数加一），用于计数加一。
+    def _bump(self, a_field: str, correct: str, wrong: str) -> None:
+        row = self.cells.setdefault((a_field, conflict_key(correct)), {})
+        cell = row.get(conflict_key(wrong))
+        if cell is None:
+            row[conflict_key(wrong)] = [wrong, 1]
+        else:
+            cell[1] += 1
+
+    # observe（记录一条错题），用于记录一条错题（判断题的 q/e 不是答案值，跳过）。
+    def observe(self, e: Dict) -> None:
+        wrong = safe_str(e.get("user_wrong"))
+        correct = safe_str(e.get("correct_value"))
+        a_field = e.get("answer_field", "")
+        if not wrong or not correct or wrong.lower() in ("q", "e"):
+            return
+        if conflict_key(wrong) == conflict_key(correct):
+            return
+        self._bump(a_field, correct, wrong)
+        self._bump(a_field, wrong, correct)
+
+    # confusers（易混值），用于按混淆次数从高到低取易混值。
+    def confusers(self, a_field: str, correct: str) -> List[str]:
+        row = self.cells.get((a_field, conflict_key(correct)))
+        if not row:
+            return []
+        return [v for v, _ in sorted(row.values(), key=lambda c: -c[1])]
+
+
+# confusion_matrix（混淆矩阵），用于取（必要时汇总）当前错题本的混淆矩阵。
+def confusion_matrix(state: "State") -> ConfusionMatrix:
+    if state.confusion is None:
+        state.confusion = ConfusionMatrix.from_wrong_db(state.wrong_db)
+    return state.confusion
+
+
+# char_ngrams（字符 n-gram），用于取规范化值的字符 n-gram。
+def char_ngrams(key: str) -> List[str]:
+    if key.isascii():
+        padded = f" {key} "
+        n = 3
+    else:
+        padded = key
+        n = 2
+    if len(padded) <= n:
+        return [padded] if padded.strip() else []
+    # 保序去重：用 set 的话顺序随字符串哈希种子变，同一随机种子出的干扰项也会不同
+    return list(dict.fromkeys(padded[i:i + n] for i in range(len(padded) - n + 1)))
+
+
+class SimilarityIndex:
+    """某一列的 n-gram → 行号倒排表（array('I')）。"""
+
+    def __init__(self, field: str):
+        self.field = field
+        self.postings: Dict[str, object] = {}
+        self.ready = False
+
+    # build（建索引），用于建索引。
+    def build(self, deck) -> None:
+        from array import array
+        post = self.postings
+        f = self.field
+        try:
+            for i in range(len(deck)):
+                for g in char_ngrams(conflict_key(deck[i][f])):
+                    p = post.get(g)
+                    if p is None:
+                        post[g] = array("I", (i,))
+                    elif len(p) < SIM_MAX_POSTING:
+                        p.append(i)
+        except (IndexError, KeyError):
+            return  # 建索引途中词典被重载，这份索引作废
+        self.ready = True
+
+    # similar_rows（相似行），用于取与 value 共享 n-gram 最多的若干行。
+    def similar_rows(self, value: str, k: int, exclude_idx: int = -1, rng=random) -> List[int]:
+        hits: Dict[int, int] = {}
+        for g in char_ngrams(conflict_key(value)):
+            p = self.postings.get(g)
+            if p is None:
+                continue
+            start = rng.randrange(len(p) - SIM_PROBE + 1) if len(p) > SIM_PROBE else 0
+            for j in p[start:start + SIM_PROBE]:
+                hits[j] = hits.get(j, 0) + 1
+        hits.pop(exclude_idx, None)
+        if not hits:
+            return []
+        # 命中次数相同的随机排，避免每次都是同一个
+        return sorted(hits, key=lambda j: (-hits[j], rng.random()))[:k]
+
+
+# similarity_index（相似度索引），用于取 field 列已建好的相似度索引；没建好返回 None。
+def similarity_index(state: "State", field: str) -> Optional[SimilarityIndex]:
+    if state.similar is None:
+        state.similar = {}
+    idx = state.similar.get(field)
+    if idx is None:
+        if state.loading() or not state.deck:
+            return None
+        idx = state.similar[field] = SimilarityIndex(field)
+        if len(state.deck) <= SIM_SYNC_ROWS:
+            idx.build(state.deck)
+        else:
+            import threading
+            threading.Thread(target=idx.build, args=(state.deck,), name="sim-index", daemon=True).start()
+    return idx if idx.ready else None
+
+
+# near_miss_values（近似干扰项），用于先按混淆矩阵、再按 n-gram 相似度取至多 want 个干扰项。
+def near_miss_values(state: "State", item_idx: int, a_field: str, correct: str, want: int, accept) -> List[str]:
+    out: List[str] = []
+    if want <= 0:
+        return out
+    known = conflict_index(state).groups[a_field]
+    for v in confusion_matrix(state).confusers(a_field, correct):
+        # 填空题里手打的错答可能只是拼写错误，只有词典里真有的值才拿来当选项
+        if conflict_key(v) in known and v not in out and accept(v):
+            out.append(v)
+            if len(out) >= want:
+                return out
+    idx = similarity_index(state, a_field)
+    if idx is not None:
+        for j in idx.similar_rows(correct, 4 * want, exclude_idx=item_idx, rng=state_rng(state)):
+            v = state.deck[j][a_field]
+            if v not in out and accept(v):
+                out.append(v)
+                if len(out) >= want:
+                    break
+    return out
+
+
+# --------------------------- Search index ---------------------------
+# A、B 两列（规范化后）的倒排索引：ASCII 用三元组，非 ASCII（CJK 等）用单字。
+# 索引整体摊平成 gram 表 + 偏移表 + 一条 array('I') 行号（每个 gram 的行号递增），
+# 按词典版本（内容指纹）存到 .gms_cache/<指纹>.gmsidx，下次 mmap 打开，不必重建。
+# 查询：取最短的倒排表逐个候选，在其余倒排表里二分确认，再做子串校验，凑够上限就停。
+# 查询里没有可用 gram（如 1~2 个英文字母）时退回线性扫描，有时间上限。
+
+SEARCH_INDEX_MAGIC = b"GMSIDX01"
+SEARCH_INDEX_HEADER = "<8sQQQ"       # magic, nrows, ngrams, gram 表字节数
+SEARCH_MAX_RESULTS = 500
+SEARCH_SCAN_BUDGET = 0.008           # 线性扫描的时间上限（秒），保证每次按键刷新在 10ms 内
+SEARCH_SYNC_ROWS = 20000             # 不超过该行数时当场建索引，否则后台建
+
+
+# search_grams（搜索 gram），用于取规范化文本的三元组 + 非 ASCII 单字。
+def search_grams(key: str) -> set:
+    out = {ch for ch in key if not ch.isascii() and not ch.isspace()}
+    for i in range(len(key) - 2):
+        t = key[i:i + 3]
+        if t.isascii():
+            out.add(t)
+    return out
+
+
+class SearchIndex:
+    """gram → postings[offsets[k]:offsets[k+1]]（行号递增）；postings 可以是 array 或 mmap 上的 memoryview。"""
+
+    def __init__(self, nrows: int = 0, table: Optional[Dict[str, int]] = None, offsets=None, postings=None):
+        self.nrows = nrows
+        self.table = table or {}
+        self.offsets = offsets
+        self.postings = postings
+        self.ready = postings is not None
+        self.progress = 0
+
+    # build（建索引），用于建索引。
+    def build(self, deck) -> "SearchIndex":
+        from array import array
+        lists: Dict[str, List[int]] = {}
+        n = len(deck)
+        try:
+            for i in range(n):
+                row = deck[i]
+                for g in search_grams(conflict_key(row["A"])) | search_grams(conflict_key(row["B"])):
+                    lst = lists.get(g)
+                    if lst is None:
+                        lists[g] = [i]
+                    else:
+                        lst.append(i)
+                if not i & 0xFFFF:
+                    self.progress = i * 100 // n
+        except (IndexError, KeyError):
+            return self  # 建索引途中词典被重载，这份索引作废
+        grams = sorted(lists)
+        offsets = array("Q", [0])
+        postings = array("I")
+        for g in grams:
+            postings.extend(lists[g])
+            offsets.append(len(postings))
+        self.table = {g: k for k, g in enumerate(grams)}
+        self.nrows, self.offsets, self.postings = n, offsets, postings
+        self.ready = True
+        return self
+
+    # posting（倒排表），用于取某个 gram 的行号序列（切片视图）。
+    def posting(self, g: str):
+        k = self.table.get(g)
+        if k is None:
+            return None
+        return self.postings[self.offsets[k]:self.offsets[k + 1]]
+
+    # save（保存），用于写到磁盘缓存。
+    def save(self, path: str) -> None:
+        import struct
+        grams = "\0".join(sorted(self.table, key=self.table.get)).encode("utf-8")
+        pad = -len(grams) % 8
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(struct.pack(SEARCH_INDEX_HEADER, SEARCH_INDEX_MAGIC, self.nrows, len(self.table), len(grams)))
+            f.write(grams + b"\0" * pad)
+            self.offsets.tofile(f)
+            self.postings.tofile(f)
+        os.replace(tmp, path)
+
+    # load（读取），用于 mmap 打开磁盘缓存；格式不对返回 None。
+    @classmethod
+    def load(cls, path: str) -> Optional["SearchIndex"]:
+        import mmap
+        import struct
+        import sys
+        if sys.byteorder != "little":
+            return None  # 缓存按本机小端写出，其他平台直接重建
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        hsize = struct.calcsize(SEARCH_INDEX_HEADER)
+        if len(mm) < hsize:
+            return None
+        magic, nrows, ngrams, glen = struct.unpack_from(SEARCH_INDEX_HEADER, mm, 0)
+        if magic != SEARCH_INDEX_MAGIC:
+            return None
+        off_start = hsize + glen + (-glen % 8)
+        off_end = off_start + 8 * (ngrams + 1)
+        if len(mm) < off_end:
+            return None
+        grams = mm[hsize:hsize + glen].decode("utf-8").split("\0") if ngrams else []
+        offsets = memoryview(mm)[off_start:off_end].cast("Q")
+        postings = memoryview(mm)[off_end:].cast("I")
+        if len(postings) != offsets[-1]:
+            return None
+        return cls(nrows, {g: k for k, g in enumerate(grams)}, offsets, postings)
+
+
+# search_index_path（搜索索引缓存路径），用于按词典版本得到缓存路径；词典没有内容指纹时返回 None。
+def search_index_path(state: "State") -> Optional[str]:
+    if cached_fingerprint(state.deck_path, state.deck_col, state.deck_sep, state.deck_col_b,
+                          state.source_sig) != state.deck_id:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ".gms_cache", f"{state.deck_id}.gmsidx")
+
+
+# search_index（搜索索引），用于取（必要时从磁盘读取或建立）当前词典的搜索索引。
+def search_index(state: "State") -> Optional[SearchIndex]:
+    """没建好时返回 None（调用方退回线性扫描）；大词典在后台线程建，建好后写磁盘缓存。"""
+    idx = state.search
+    if idx is None:
+        if state.loading() or not state.deck:
+            return None
+        path = search_index_path(state)
+        if path is not None:
+            idx = SearchIndex.load(path)
+            if idx is not None and idx.nrows != len(state.deck):
+                idx = None
+        if idx is None:
+            idx = SearchIndex()
+
+            def work(deck=state.deck, idx=idx):
+                idx.build(deck)
+                if idx.ready and path is not None:
+                    try:
+                        idx.save(path)
+                    except OSError:
+                        pass
+
+            if len(state.deck) <= SEARCH_SYNC_ROWS:
+                work()
+            else:
+                import threading
+                threading.Thread(target=work, name="search-index", daemon=True).start()
+        state.search = idx
+    return idx if idx.ready else None
+
+
+# _row_matches（行是否匹配），用于子串校验。
+def _row_matches(row: Dict[str, str], q: str) -> bool:
+    return q in conflict_key(row["A"]) or q in conflict_key(row["B"])
+
+
+# search_deck（搜索词典），用于按子串搜索 A/B；返回 (行号列表, 是否完整)。
+def search_deck(state: "State", query: str, prev: Optional[Tuple[str, List[int], bool]] = None,
+                limit: int = SEARCH_MAX_RESULTS) -> Tuple[List[int], bool]:
+    """
+    prev=(上次查询, 上次结果, 是否完整)：新查询包含上次查询且上次结果完整时，直接在上次结果里过滤。
+    “不完整”表示命中数到了 limit 或线性扫描超时。
+    """
+    import bisect
+    q = conflict_key(query)
+    deck = state.deck
+    if not q:
+        return [], True
+    if prev is not None and prev[2] and prev[0] and prev[0] in q:
+        return [i for i in prev[1] if _row_matches(deck[i], q)], True
+
+    idx = search_index(state)
+    grams = search_grams(q)
+    out: List[int] = []
+    if idx is None or not grams:
+        deadline = time.perf_counter() + SEARCH_SCAN_BUDGET
+        for i in range(len(deck)):
+            if _row_matches(deck[i], q):
+                out.append(i)
+                if len(out) >= limit:
+                    return out, False
+            if not i & 0x3FF and time.perf_counter() > deadline:
+                return out, False
+        return out, True
+
+    lists = []
+    for g in grams:
+        p = idx.posting(g)
+        if p is None:
+            return [], True  # 有一个 gram 从没出现过，肯定没有结果
+        lists.append(p)
+    lists.sort(key=len)
+    first, rest = lists[0], lists[1:]
+    for i in first:
+        for p in rest:
+            k = bisect.bisect_left(p, i)
+            if k == len(p) or p[k] != i:
+                break
+        else:
+            if _row_matches(deck[i], q):
+                out.append(i)
+                if len(out) >= limit:
+                    return out, False
+    return out, True
 
 
 # --------------------------- Question Builders ---------------------------
@@ -617,33 +2838,75 @@ FIELDS = ["A", "B"]
 FIELD_NAMES = {"A": "A", "B": "B"}
 
 
+# 词典行数达到该值时，干扰项改为随机抽样（每题 O(1) 行），否则保留全量洗牌
+SAMPLE_MIN_DECK = 256
+
+
+# _sample_other_values（随机抽取其他行的值），用于在大词典上抽取干扰项。
+def _sample_other_values(deck, a_field: str, exclude_idx: int, want: int, accept, max_tries: int = 64,
+                         rng=random) -> List[str]:
+    """随机抽行，返回至多 want 个满足 accept 且互不相同的值；抽不够由调用方兜底。"""
+    out: List[str] = []
+    n = len(deck)
+    for _ in range(max_tries):
+        if len(out) >= want:
+            break
+        j = rng.randrange(n)
+        if j == exclude_idx:
+            continue
+        v = deck[j][a_field]
+        if v not in out and accept(v):
+            out.append(v)
+    return out
+
+
+# mcq_options（选择题选项），用于给定题目凑齐选项：先放 seeds 和近似干扰项，再随机补齐。
+def mcq_options(state: State, item_idx: int, q_field: str, q_val: str, a_field: str, correct: str,
+                seeds: Tuple[str, ...] = ()) -> List[str]:
+    """返回未打乱的选项列表，correct 在第一位。"""
+    # 同一题干的其他答案也是对的，不能当干扰项
+    rng = state_rng(state)
+    valid = conflict_index(state).valid_keys(state.deck, q_field, q_val, a_field)
+    valid.add(conflict_key(correct))
+
+    def accept(v: str) -> bool:
+        return v not in options and conflict_key(v) not in valid
+
+    options = [correct]
+    for v in seeds:
+        if len(options) < 4 and accept(v):
+            options.append(v)
+    options += near_miss_values(state, item_idx, a_field, correct, min(NEAR_MISS_PER_MCQ, 4 - len(options)), accept)
+    if len(options) < 4 and len(state.deck) >= SAMPLE_MIN_DECK:
+        # 大词典随机抽几行即可，不再对全体下标洗牌（mmap/arena 词典只会解码抽中的行）
+        options += _sample_other_values(state.deck, a_field, item_idx, 4 - len(options), accept, rng=rng)
+    if len(options) < 4:
+        # 小词典，或抽样凑不够：全量洗牌补齐；可用的值不足时选项就少于 4 个
+        indices = list(range(len(state.deck)))
+        indices.remove(item_idx)
+        rng.shuffle(indices)
+        for j in indices:
+            val = state.deck[j][a_field]
+            if accept(val):
+                options.append(val)
+            if len(options) == 4:
+                break
+    return options
+
+
 # build_mcq（构建选择题），用于构建选择题。
+@perf_timed("build")
 def build_mcq(state: State) -> Tuple[str, List[str], int, Dict]:
-    item_idx = random.randrange(len(state.deck))
-    q_field = random.choice(FIELDS)
+    rng = state_rng(state)
+    item_idx = rng.randrange(len(state.deck))
+    q_field = rng.choice(FIELDS)
     a_field = "B" if q_field == "A" else "A"
     item = state.deck[item_idx]
     q_val = item[q_field]
     correct = item[a_field]
 
-    indices = list(range(len(state.deck)))
-    indices.remove(item_idx)
-    random.shuffle(indices)
-
-    options = [correct]
-    for j in indices:
-        val = state.deck[j][a_field]
-        if val not in options:
-            options.append(val)
-        if len(options) == 4:
-            break
-    # 兜底：样本太小时凑够 4 个
-    while len(options) < min(4, len(state.deck)):
-        val = state.deck[random.randrange(len(state.deck))][a_field]
-        if val not in options:
-            options.append(val)
-
-    random.shuffle(options)
+    options = mcq_options(state, item_idx, q_field, q_val, a_field, correct)
+    rng.shuffle(options)
     correct_idx = options.index(correct)
 
     question = f"题干（{FIELD_NAMES[q_field]}）：{q_val}\n请选择对应的 {FIELD_NAMES[a_field]}："
@@ -652,34 +2915,51 @@ def build_mcq(state: State) -> Tuple[str, List[str], int, Dict]:
 
 
 # build_fillin（构建填空题），用于构建填空题。
+@perf_timed("build")
 def build_fillin(state: State) -> Tuple[str, Dict, List[str]]:
-    item_idx = random.randrange(len(state.deck))
+    item_idx = state_rng(state).randrange(len(state.deck))
     q_field = "B"
     a_field = "A"
     item = state.deck[item_idx]
     q_val = item[q_field]
     prompt = f"题干（{FIELD_NAMES[q_field]}）：{q_val}\n请输入对应的 {FIELD_NAMES[a_field]}："
     meta = {"item_index": item_idx, "q_field": q_field, "a_field": a_field}
-    correct_values = split_alternatives(item[a_field])
+    # 多行共用同一个题干时，它们的答案都算对
+    correct_values = conflict_index(state).answers(state.deck, q_field, q_val, a_field) or split_alternatives(item[a_field])
     return prompt, meta, correct_values
 
 
 # build_tf_new（构建判断题新），用于构建判断题新。
+@perf_timed("build")
 def build_tf_new(state: State) -> Tuple[str, bool, Dict]:
-    item_idx = random.randrange(len(state.deck))
-    q_field = random.choice(FIELDS)
+    rng = state_rng(state)
+    item_idx = rng.randrange(len(state.deck))
+    q_field = rng.choice(FIELDS)
     a_field = "B" if q_field == "A" else "A"
     item = state.deck[item_idx]
     q_val = item[q_field]
     correct_val = item[a_field]
 
-    is_true = random.choice([True, False])
+    is_true = rng.choice([True, False])
     if is_true:
         shown_val = correct_val
     else:
-        pool = [state.deck[i][a_field] for i in range(len(state.deck)) if i != item_idx]
-        pool = [v for v in pool if norm_text(v) != norm_text(correct_val)]
-        shown_val = random.choice(pool) if pool else correct_val
+        # 排除同一题干的全部答案，否则“错误”断言可能其实是对的
+        valid = conflict_index(state).valid_keys(state.deck, q_field, q_val, a_field)
+        valid.add(conflict_key(correct_val))
+        picked = []
+        if len(state.deck) >= SAMPLE_MIN_DECK:
+            picked = _sample_other_values(state.deck, a_field, item_idx, 1, lambda v: conflict_key(v) not in valid,
+                                          rng=rng)
+        if picked:
+            shown_val = picked[0]
+        else:
+            pool = [state.deck[i][a_field] for i in range(len(state.deck)) if i != item_idx]
+            pool = [v for v in pool if conflict_key(v) not in valid]
+            if pool:
+                shown_val = rng.choice(pool)
+            else:
+                shown_val, is_true = correct_val, True
 
     statement = (
         f"题干（{FIELD_NAMES[q_field]}）：{q_val}\n"
@@ -693,10 +2973,10 @@ def build_tf_new(state: State) -> Tuple[str, bool, Dict]:
 # --------------------------- Modes ---------------------------
 
 # mode_flashcards（模式记忆卡），用于模式记忆卡。
-def mode_flashcards(stdscr, state: State):
+def mode_flashcards(stdscr, state: State, start_index: int = 0):
     title = "记忆卡：A/D 或 ←/→ 切换；Q 切换随机/顺序；x返回"
     order = list(range(len(state.deck)))
-    idx = 0
+    idx = start_index if 0 <= start_index < len(order) else 0
     random_mode = False
     while True:
         draw_header(stdscr, title + (" [随机]" if random_mode else " [顺序]"))
@@ -706,8 +2986,11 @@ def mode_flashcards(stdscr, state: State):
             f"{FIELD_NAMES['A']}: {item['A']}",
             f"{FIELD_NAMES['B']}: {item['B']}",
         ]
+        src = deck_source_of(state.deck, order[idx])
+        if src:
+            content.append(f"来源: {src}")
         paginate_lines(stdscr, content)
-        stdscr.refresh()
+        present(stdscr)
         ch = stdscr.getch()
         if ch in (ord("x"), ord("X")):
             return
@@ -719,31 +3002,269 @@ def mode_flashcards(stdscr, state: State):
             random_mode = not random_mode
             order = list(range(len(state.deck)))
             if random_mode:
-                random.shuffle(order)
+                state_rng(state).shuffle(order)
             idx = 0
 
 
+# --------------------------- List view ---------------------------
+# 表格浏览只画可见的那一屏：词典视图不复制行号列表，排序时只把错题本里出现过的行
+# （最多几千个）按预先算好的键排在前面，其余行用 RowOrder 按原顺序“虚拟”接在后面。
+
+BROWSE_SORTS = {
+    "deck": [("顺序", None), ("错题权重↓", "weight"), ("最近出错↓", "last_seen")],
+    "wrong": [("权重↓", "weight"), ("最近出错↓", "last_seen"), ("词典顺序", "item_index")],
+}
+
+
+class RowOrder:
+    """长度为 n 的排列：前面是 head（已排序的一小撮行号），后面是其余行号按升序。"""
+
+    def __init__(self, n: int, head: Optional[List[int]] = None):
+        self.n = n
+        self.head = head or []
+        self._excl = sorted(self.head)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, pos: int) -> int:
+        import bisect
+        k = len(self.head)
+        if pos < k:
+            return self.head[pos]
+        p = pos - k  # 求第 p 个不在 head 里的行号 x：x - (head 中 ≤x 的个数) == p
+        excl = self._excl
+        lo, hi = p, p + len(excl)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mid - bisect.bisect_right(excl, mid) < p:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+# wrong_sort_keys（错题排序键），用于预先算好每个词典行的错题权重和 / 最近出错时间。
+def wrong_sort_keys(wrong_db: List[Dict]) -> Dict[str, Dict[int, float]]:
+    weight: Dict[int, float] = {}
+    last: Dict[int, float] = {}
+    for e in wrong_db:
+        i = e.get("item_index")
+        if not isinstance(i, int):
+            continue
+        weight[i] = weight.get(i, 0) + e.get("weight", 1)
+        last[i] = max(last.get(i, 0.0), e.get("last_seen", 0.0))
+    return {"weight": weight, "last_seen": last}
+
+
+# browse_order（浏览顺序），用于按排序方式得到视图里的行顺序。
+def browse_order(state: State, source: str, sort_key: Optional[str], keys: Dict[str, Dict[int, float]]):
+    if source == "deck":
+        if sort_key is None:
+            return RowOrder(len(state.deck))
+        k = keys[sort_key]
+        head = sorted((i for i in k if 0 <= i < len(state.deck)), key=lambda i: (-k[i], i))
+        return RowOrder(len(state.deck), head)
+    db = state.wrong_db
+    if sort_key == "item_index":
+        return sorted(range(len(db)), key=lambda j: (db[j].get("item_index", 0), -db[j].get("weight", 1)))
+    vals = [e.get(sort_key, 0) or 0 for e in db]
+    return sorted(range(len(db)), key=vals.__getitem__, reverse=True)
+
+
+# _fmt_ts（格式化时间戳），用于格式化时间戳。
+def _fmt_ts(ts: float) -> str:
+    return time.strftime("%m-%d %H:%M", time.localtime(ts)) if ts else "-"
+
+
+# browse_row_text（浏览行文本），用于生成表格里的一行。
+def browse_row_text(state: State, source: str, i: int, keys: Dict[str, Dict[int, float]], w: int) -> str:
+    if source == "deck":
+        item = state.deck[i]
+        wt = keys["weight"].get(i)
+        col = max(8, (w - 20) // 2)
+        tail = f"  ⚖{wt:g}" if wt else ""
+        return f"{i + 1:>8}  {pad_to_width(item['A'], col)} {pad_to_width(item['B'], col)}{tail}"
+    e = state.wrong_db[i]
+    col = max(8, (w - 46) // 3)
+    return (f"{e.get('item_index', 0) + 1:>8}  ⚖{e.get('weight', 1):<3} {_fmt_ts(e.get('last_seen', 0.0))}  "
+            f"{pad_to_width(safe_str(e.get('question_value')), col)} "
+            f"{pad_to_width(safe_str(e.get('correct_value')), col)} "
+            f"✗{pad_to_width(safe_str(e.get('user_wrong')), col)} {e.get('mode', '')}")
+
+
+# mode_browse（模式列表浏览），用于表格浏览词典 / 错题本。
+def mode_browse(stdscr, state: State):
+    title = "列表：↑/↓ PgUp/PgDn Home/End；G 跳转；O 排序；Tab 词典/错题本；回车看记忆卡；x返回"
+    source = "deck"
+    sort_i = 0
+    keys = wrong_sort_keys(state.wrong_db)
+    order = browse_order(state, source, None, keys)
+    sel = top = 0
+    while True:
+        draw_header(stdscr, title)
+        h, w = stdscr.getmaxyx()
+        rows = max(1, h - 7)
+        n = len(order)
+        sel = max(0, min(sel, n - 1))
+        if sel < top:
+            top = sel
+        elif sel >= top + rows:
+            top = sel - rows + 1
+        sort_name = BROWSE_SORTS[source][sort_i][0]
+        name = "词典" if source == "deck" else "错题本"
+        safe_addstr(stdscr, 4, 2, f"[{name}]  共 {n:,} 行  排序：{sort_name}  第 {sel + 1 if n else 0:,} 行")
+        for r in range(min(rows, n - top)):
+            pos = top + r
+            text = browse_row_text(state, source, order[pos], keys, w - 6)
+            attr = curses.A_REVERSE if pos == sel else 0
+            safe_addstr(stdscr, 6 + r, 2, text, attr)
+        present(stdscr)
+
+        ch = stdscr.getch()
+        if ch in (ord("x"), ord("X"), 27):
+            return
+        elif ch in (curses.KEY_UP, ord("w"), ord("W")):
+            sel -= 1
+        elif ch in (curses.KEY_DOWN, ord("s"), ord("S")):
+            sel += 1
+        elif ch == curses.KEY_PPAGE:
+            sel -= rows
+            top = max(0, top - rows)
+        elif ch == curses.KEY_NPAGE:
+            sel += rows
+            top = min(max(0, n - rows), top + rows)
+        elif ch == curses.KEY_HOME:
+            sel = 0
+        elif ch == curses.KEY_END:
+            sel = n - 1
+        elif ch in (ord("g"), ord("G")):
+            s_num = input_line(stdscr, f"跳到第几行（1-{n}）：")
+            if s_num.isdigit():
+                sel = int(s_num) - 1
+                top = max(0, sel - rows // 2)
+        elif ch in (ord("o"), ord("O")):
+            sort_i = (sort_i + 1) % len(BROWSE_SORTS[source])
+            order = browse_order(state, source, BROWSE_SORTS[source][sort_i][1], keys)
+            sel = top = 0
+        elif ch == 9:  # Tab
+            source = "wrong" if source == "deck" else "deck"
+            sort_i = 0
+            keys = wrong_sort_keys(state.wrong_db)
+            order = browse_order(state, source, BROWSE_SORTS[source][sort_i][1], keys)
+            sel = top = 0
+        elif ch in (10, 13, curses.KEY_ENTER) and n:
+            i = order[sel] if source == "deck" else state.wrong_db[order[sel]].get("item_index", 0)
+            if 0 <= i < len(state.deck):
+                mode_flashcards(stdscr, state, start_index=i)
+
+
+# mode_search（模式搜索），用于边输入边过滤 A/B，回车跳到记忆卡。
+def mode_search(stdscr, state: State):
+    title = "搜索：输入即过滤 A/B；↑/↓ 选择，回车打开记忆卡；Esc 返回"
+    query = ""
+    results: List[int] = []
+    complete = True
+    prev: Optional[Tuple[str, List[int], bool]] = None
+    sel = top = 0
+    elapsed_ms = 0.0
+    dirty = False
+    search_index(state)  # 进入即开始读缓存/建索引，边打字边建
+    curses_call("curs_set", 1)
+    try:
+        while True:
+            if dirty:
+                t0 = time.perf_counter()
+                results, complete = search_deck(state, query, prev)
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                prev = (conflict_key(query), results, complete)
+                sel = top = 0
+                dirty = False
+
+            draw_header(stdscr, title)
+            h, w = stdscr.getmaxyx()
+            rows = max(1, h - 8)
+            if sel < top:
+                top = sel
+            elif sel >= top + rows:
+                top = sel - rows + 1
+            if state.search is not None and not state.search.ready:
+                status = f"⏳ 索引建立中 {state.search.progress}%（暂用逐行扫描）"
+            else:
+                status = ""
+            if query:
+                more = "+" if not complete else ""
+                status = f"{len(results)}{more} 条匹配（{elapsed_ms:.1f} ms）  " + status
+            safe_addstr(stdscr, 5, 2, status)
+            for r, i in enumerate(results[top:top + rows]):
+                item = state.deck[i]
+                prefix = "➤ " if top + r == sel else "  "
+                safe_addstr(stdscr, 7 + r, 2, f"{prefix}{i + 1}. {item['A']}  —  {item['B']}")
+            safe_addstr(stdscr, 4, 2, f"搜索：{query}")
+            try:
+                stdscr.move(4, min(w - 2, 2 + display_width(f"搜索：{query}")))
+            except curses.error:
+                pass
+            present(stdscr)
+
+            try:
+                ch = stdscr.get_wch()
+            except curses.error:
+                continue
+            if ch in ("\x1b",):
+                return
+            if ch in ("\n", "\r", curses.KEY_ENTER):
+                if results:
+                    mode_flashcards(stdscr, state, start_index=results[sel])
+                continue
+            if ch in ("\x7f", "\b", curses.KEY_BACKSPACE):
+                if query:
+                    query = query[:-1]
+                    prev = None  # 删字后结果只会变多，不能在旧结果里过滤
+                    dirty = True
+            elif ch == curses.KEY_UP:
+                sel = max(0, sel - 1)
+            elif ch == curses.KEY_DOWN:
+                sel = min(max(0, len(results) - 1), sel + 1)
+            elif ch == curses.KEY_PPAGE:
+                sel = max(0, sel - rows)
+            elif ch == curses.KEY_NPAGE:
+                sel = min(max(0, len(results) - 1), sel + rows)
+            elif isinstance(ch, str) and ch.isprintable():
+                query += ch
+                dirty = True
+    finally:
+        curses_call("curs_set", 0)
+
+
+# draw_option（画选项），用于画一行选择题选项。
+def draw_option(stdscr, y: int, i: int, opt: str, sel: int) -> None:
+    prefix = "➤ " if i == sel else "  "
+    safe_addstr(stdscr, y, 4, f"{prefix}{i+1}. {opt}")
+
+
 # mode_mcq（模式选择题），用于模式选择题。
 def mode_mcq(stdscr, state: State):
     title = "选择题：1-4 或 ↑/↓/W/S 选择，回车提交；x返回"
     if len(state.deck) < 2:
         draw_header(stdscr, "选择题")
         center_text(stdscr, 6, "词典条目太少（至少需要 2 条）。")
-        stdscr.refresh()
+        present(stdscr)
         wait_key(stdscr)
         return
 
     while True:
         question, options, correct_idx, meta = build_mcq(state)
         sel = 0
+        draw_header(stdscr, title)
+        q_lines, q_rows = paginate_lines(stdscr, question.split("\n"), start_y=4)
+        opt_y = 4 + min(q_lines, q_rows) + 1
+        for i in range(len(options)):
+            draw_option(stdscr, opt_y + i, i, options[i], sel)
         while True:
-            draw_header(stdscr, title)
-            paginate_lines(stdscr, question.split("\n"), start_y=4)
-            for i, opt in enumerate(options):
-                prefix = "➤ " if i == sel else "  "
-                safe_addstr(stdscr, 7 + i, 4, f"{prefix}{i+1}. {opt}")
-            stdscr.refresh()
+            present(stdscr)
             ch = stdscr.getch()
+            prev_sel = sel
             if ch in (ord("x"), ord("X")):
                 return
             elif ch in (ord("1"), ord("2"), ord("3"), ord("4")):
@@ -757,6 +3278,9 @@ def mode_mcq(stdscr, state: State):
             elif ch in (10, 13):
                 user_idx = sel
                 break
+            # 光标移动只重写新旧两行
+            draw_option(stdscr, opt_y + prev_sel, prev_sel, options[prev_sel], sel)
+            draw_option(stdscr, opt_y + sel, sel, options[sel], sel)
 
         if user_idx == correct_idx:
             draw_header(stdscr, title)
@@ -764,7 +3288,7 @@ def mode_mcq(stdscr, state: State):
             for i, opt in enumerate(options):
                 prefix = "➤ " if i == user_idx else "  "
                 suffix = " ✅" if i == user_idx else ""
-                safe_addstr(stdscr, 7 + i, 4, f"{prefix}{i+1}. {opt}{suffix}")
+                safe_addstr(stdscr, opt_y + i, 4, f"{prefix}{i+1}. {opt}{suffix}")
         else:
             draw_header(stdscr, "结果")
             center_text(stdscr, 6, f"❌ 错误。正确答案：{options[correct_idx]}")
@@ -776,7 +3300,7 @@ def mode_mcq(stdscr, state: State):
                 user_wrong=options[user_idx] if user_idx < len(options) else "",
                 mode="mcq",
             )
-        stdscr.refresh()
+        present(stdscr)
         if wait_key(stdscr) == "esc":
             return
 
@@ -788,30 +3312,30 @@ def mode_fillin(stdscr, state: State):
         prompt, meta, correct_values = build_fillin(state)
 
         draw_header(stdscr, title)
-        lines = prompt.split("\n")
         start_y = 4
         h, w = stdscr.getmaxyx()
+        lines = wrap_lines(prompt.split("\n"), max(1, w - 4))
         max_lines = max(0, h - start_y - 5)
         for i, line in enumerate(lines[:max_lines]):
-            safe_addstr(stdscr, start_y + i, 2, line[: max(0, w - 4)])
+            safe_addstr(stdscr, start_y + i, 2, line)
 
         input_y = start_y + min(len(lines), max_lines) + 1
         if input_y >= h - 2:
             input_y = h - 3
         safe_addstr(stdscr, input_y, 2, "你的输入：")
-        stdscr.refresh()
+        present(stdscr)
 
-        curses.echo()
+        curses_call("echo")
         try:
             s = stdscr.getstr(input_y + 1, 2, 400).decode("utf-8", errors="ignore")
         finally:
-            curses.noecho()
+            curses_call("noecho")
 
         user = safe_str(s)
         if not user:
             draw_header(stdscr, "结果")
             center_text(stdscr, 6, "❗ 不能为空。")
-            stdscr.refresh()
+            present(stdscr)
             if wait_key(stdscr) == "esc":
                 return
             continue
@@ -827,17 +3351,14 @@ def mode_fillin(stdscr, state: State):
                 return norm_text(user) == norm_text(ans)
 
         ok = any(_match_one(ans) for ans in correct_values)
+        q_text = state.deck[meta["item_index"]][meta["q_field"]]
+        a_text = " / ".join(correct_values)
 
+        # 长句答案折行显示，超出一屏可滚动
         if ok:
-            draw_header(stdscr, title)
-            paginate_lines(stdscr, prompt.split("\n"), start_y=4)
-            safe_addstr(stdscr, 10, 4, f"你的输入：{user} ✅")
-            safe_addstr(stdscr, 11, 4, f"标准答案：{a_text}")
+            reveal = prompt.split("\n") + ["", f"你的输入：{user} ✅", f"标准答案：{a_text}"]
+            key = view_lines(stdscr, title, reveal)
         else:
-            draw_header(stdscr, "结果")
-            safe_addstr(stdscr, 6, 4, f"题目：{q_text}")
-            safe_addstr(stdscr, 7, 4, f"正确答案：{a_text}")
-            center_text(stdscr, 9, "❌ 错误")
             add_wrong_entry(
                 state,
                 item_index=meta["item_index"],
@@ -846,8 +3367,9 @@ def mode_fillin(stdscr, state: State):
                 user_wrong=user,
                 mode="fill",
             )
-        stdscr.refresh()
-        if wait_key(stdscr) == "esc":
+            reveal = ["❌ 错误", "", f"题目：{q_text}", f"你的输入：{user}", f"正确答案：{a_text}"]
+            key = view_lines(stdscr, "结果", reveal)
+        if key in (ord("x"), ord("X")):
             return
 
 
@@ -857,7 +3379,7 @@ def mode_tf_new(stdscr, state: State):
     if len(state.deck) < 2:
         draw_header(stdscr, "判断题")
         center_text(stdscr, 6, "词典条目太少（至少需要 2 条）。")
-        stdscr.refresh()
+        present(stdscr)
         wait_key(stdscr)
         return
 
@@ -865,7 +3387,7 @@ def mode_tf_new(stdscr, state: State):
         statement, is_true, meta = build_tf_new(state)
         draw_header(stdscr, title)
         paginate_lines(stdscr, statement.split("\n"), start_y=4)
-        stdscr.refresh()
+        present(stdscr)
 
         while True:
             ch = stdscr.getch()
@@ -875,8 +3397,8 @@ def mode_tf_new(stdscr, state: State):
                 user_true = ch in (ord("q"), ord("Q"))
                 if user_true == is_true:
                     draw_header(stdscr, title)
-                    paginate_lines(stdscr, statement.split("\n"), start_y=4)
-                    safe_addstr(stdscr, 8, 4, f"你的判断：{'Q' if user_true else 'E'} ✅")
+                    n_lines, n_rows = paginate_lines(stdscr, statement.split("\n"), start_y=4)
+                    safe_addstr(stdscr, 4 + min(n_lines, n_rows) + 1, 4, f"你的判断：{'Q' if user_true else 'E'} ✅")
                 else:
                     draw_header(stdscr, "结果")
                     center_text(stdscr, 6, "❌ 判断错误")
@@ -889,7 +3411,7 @@ def mode_tf_new(stdscr, state: State):
                         user_wrong="q" if user_true else "e",
                         mode="tf-new",
                     )
-                stdscr.refresh()
+                present(stdscr)
                 if wait_key(stdscr) == "esc":
                     return
                 break
@@ -900,7 +3422,7 @@ def mode_tf_from_wrongbook(stdscr, state: State):
     if not any(e.get("weight", 1) > 0 for e in state.wrong_db):
         draw_header(stdscr, "错题本模式")
         center_text(stdscr, 6, "📭 错题本为空或无权重题，无法开始。")
-        stdscr.refresh()
+        present(stdscr)
         wait_key(stdscr)
         return
 
@@ -910,25 +3432,28 @@ def mode_tf_from_wrongbook(stdscr, state: State):
     def _maybe_delete_if_zero(entry):
         if entry.get("weight", 1) == 0:
             center_text(stdscr, 10, "按 P 删除该错题（权重=0），任意键跳过保留")
-            stdscr.refresh()
+            present(stdscr)
             ch2 = stdscr.getch()
             if ch2 in (ord("p"), ord("P")):
                 state.wrong_db[:] = [e for e in state.wrong_db if e.get("id") != entry.get("id")]
-                save_wrong_db(state.wrong_path, state.wrong_db)
+                save_wrong_book(state)
                 center_text(stdscr, 12, "🗑️ 已删除。")
-                stdscr.refresh()
+                present(stdscr)
                 wait_key(stdscr)
 
     def ask_tf(entry):
         """判断题（保留你原来的逻辑，基本不动）"""
-        use_correct = random.choice([True, False])
+        use_correct = state_rng(state).choice([True, False])
         a_field = entry["answer_field"]
+        valid = conflict_index(state).valid_keys(state.deck, entry["question_field"], entry["question_value"], a_field)
+        valid.add(conflict_key(entry["correct_value"]))
 
         if not use_correct:
             cand = safe_str(entry.get("user_wrong", ""))
             if cand.lower() in ("q", "e") or not cand:
                 pool = [state.deck[i][a_field] for i in range(len(state.deck)) if i != entry["item_index"]]
-                cand = random.choice(pool) if pool else ""
+                pool = [v for v in pool if conflict_key(v) not in valid]
+                cand = state_rng(state).choice(pool) if pool else ""
             shown_val = cand
         else:
             shown_val = entry["correct_value"]
@@ -936,37 +3461,37 @@ def mode_tf_from_wrongbook(stdscr, state: State):
         statement = f"题干（{FIELD_NAMES[entry['question_field']]}）：{entry['question_value']}"
         assertion = f"断言：{FIELD_NAMES[a_field]} = {shown_val}"
         draw_header(stdscr, title)
-        safe_addstr(stdscr, 4, 2, statement)
-        safe_addstr(stdscr, 5, 2, assertion)
-        safe_addstr(stdscr, 7, 2, "请判断：Q=正确  E=错误 （x返回）")
-        stdscr.refresh()
+        n_lines, n_rows = paginate_lines(stdscr, [statement, assertion], start_y=4)
+        safe_addstr(stdscr, 4 + min(n_lines, n_rows) + 1, 2, "请判断：Q=正确  E=错误 （x返回）")
+        present(stdscr)
 
         while True:
             ch = stdscr.getch()
             if ch in (ord("x"), ord("X")):
                 return "exit"
+            if ch == curses.KEY_RESIZE:
+                handle_resize(stdscr)
+                draw_header(stdscr, title)
+                n_lines, n_rows = paginate_lines(stdscr, [statement, assertion], start_y=4)
+                safe_addstr(stdscr, 4 + min(n_lines, n_rows) + 1, 2, "请判断：Q=正确  E=错误 （x返回）")
+                present(stdscr)
+                continue
             if ch in (ord("q"), ord("Q"), ord("e"), ord("E")):
                 user_true = ch in (ord("q"), ord("Q"))
-                real_true = norm_text(shown_val) == norm_text(entry["correct_value"])
+                real_true = conflict_key(shown_val) in valid
+                # 揭晓答案：长句折行显示，超出一屏可滚动
                 if user_true == real_true:
-                    draw_header(stdscr, title)
-                    safe_addstr(stdscr, 4, 2, statement)
-                    safe_addstr(stdscr, 5, 2, assertion)
-                    safe_addstr(stdscr, 7, 2, f"你的判断：{'Q' if user_true else 'E'} ✅  权重 -1")
                     entry["weight"] = max(0, entry.get("weight", 1) - 1)
-                    save_wrong_db(state.wrong_path, state.wrong_db)
+                    save_wrong_book(state)
+                    reveal = [statement, assertion, "", f"你的判断：{'Q' if user_true else 'E'} ✅  权重 -1"]
                     if entry["weight"] == 0:
-                        safe_addstr(stdscr, 9, 2, "按 P 删除该错题（权重=0），任意键跳过保留")
-                        stdscr.refresh()
-                        ch2 = stdscr.getch()
-                        if ch2 in (ord("p"), ord("P")):
-                            state.wrong_db[:] = [e for e in state.wrong_db if e.get("id") != entry.get("id")]
-                            save_wrong_db(state.wrong_path, state.wrong_db)
-                            safe_addstr(stdscr, 10, 2, "🗑️ 已删除。")
+                        reveal += ["", "按 P 删除该错题（权重=0），任意键跳过保留"]
+                    key = view_lines(stdscr, title, reveal)
+                    if entry["weight"] == 0 and key in (ord("p"), ord("P")):
+                        state.wrong_db[:] = [e for e in state.wrong_db if e.get("id") != entry.get("id")]
+                        save_wrong_book(state)
+                        key = view_lines(stdscr, title, reveal + ["🗑️ 已删除。"])
                 else:
-                    draw_header(stdscr, "结果")
-                    center_text(stdscr, 6, "❌ 判断错误。权重 +2")
-                    safe_addstr(stdscr, 8, 4, f"正确应为：{FIELD_NAMES[a_field]} = {entry['correct_value']}")
                     entry["weight"] = entry.get("weight", 1) + 2
 
                     # 仍然记录为错题本判断（保持你原来逻辑）
@@ -978,10 +3503,12 @@ def mode_tf_from_wrongbook(stdscr, state: State):
                         user_wrong="q" if user_true else "e",
                         mode="tf-wb",
                     )
-                    save_wrong_db(state.wrong_path, state.wrong_db)
+                    save_wrong_book(state)
+                    reveal = ["❌ 判断错误。权重 +2", "", statement,
+                              f"正确应为：{FIELD_NAMES[a_field]} = {entry['correct_value']}"]
+                    key = view_lines(stdscr, "结果", reveal)
 
-                stdscr.refresh()
-                if wait_key(stdscr) == "esc":
+                if key in (ord("x"), ord("X")):
                     return "exit"
                 return "done"
 
@@ -991,18 +3518,19 @@ def mode_tf_from_wrongbook(stdscr, state: State):
         a_field = entry["answer_field"]
         qv = entry["question_value"]
         correct = entry["correct_value"]
-        correct_values = split_alternatives(correct)
+        correct_values = (conflict_index(state).answers(state.deck, q_field, qv, a_field)
+                          or split_alternatives(correct))
 
         draw_header(stdscr, title)
         safe_addstr(stdscr, 4, 2, f"题干（{FIELD_NAMES[q_field]}）：{qv}")
         safe_addstr(stdscr, 6, 2, f"请输入对应的 {FIELD_NAMES[a_field]}（x返回）：")
-        stdscr.refresh()
+        present(stdscr)
 
-        curses.echo()
+        curses_call("echo")
         try:
             s = stdscr.getstr(7, 2, 400).decode("utf-8", errors="ignore")
         finally:
-            curses.noecho()
+            curses_call("noecho")
 
         user = safe_str(s)
         if norm_text(user) in ("x",):
@@ -1020,7 +3548,7 @@ def mode_tf_from_wrongbook(stdscr, state: State):
         if ok:
             center_text(stdscr, 9, "✅ 正确！权重 -1")
             entry["weight"] = max(0, entry.get("weight", 1) - 1)
-            save_wrong_db(state.wrong_path, state.wrong_db)
+            save_wrong_book(state)
             _maybe_delete_if_zero(entry)
         else:
             center_text(stdscr, 9, "❌ 错误。权重 +2")
@@ -1033,9 +3561,9 @@ def mode_tf_from_wrongbook(stdscr, state: State):
                 user_wrong=user,
                 mode="fill",
             )
-            save_wrong_db(state.wrong_path, state.wrong_db)
+            save_wrong_book(state)
 
-        stdscr.refresh()
+        present(stdscr)
         if wait_key(stdscr) == "esc":
             return "exit"
         return "done"
@@ -1047,54 +3575,130 @@ def mode_tf_from_wrongbook(stdscr, state: State):
         qv = entry["question_value"]
         correct = entry["correct_value"]
 
+        # 上次选错的那个值优先留作干扰项，其余走混淆矩阵 / 相似度
+        options = mcq_options(state, entry["item_index"], q_field, qv, a_field, correct,
+                              seeds=(safe_str(entry.get("user_wrong", "")),))
+        state_rng(state).shuffle(options)
+        correct_idx = options.index(correct)
+
+        sel = 0
+        draw_header(stdscr, title)
+        safe_addstr(stdscr, 4, 2, f"题干（{FIELD_NAMES[q_field]}）：{qv}")
+        safe_addstr(stdscr, 5, 2, f"请选择对应的 {FIELD_NAMES[a_field]}（1-4 / ↑↓ + 回车，x返回）：")
+        for i in range(len(options)):
+            draw_option(stdscr, 7 + i, i, options[i], sel)
+        while True:
+            present(stdscr)
+            ch = stdscr.getch()
+            prev_sel = sel
+            if ch in (ord("x"), ord("X")):
+                return "exit"
+            elif ord("1") <= ch < ord("1") + len(options):
+                user_idx = ch - ord("1")
+                break
+            elif ch in (curses.KEY_UP, ord("w"), ord("W")):
+                sel = (sel - 1) % len(options)
+            elif ch in (curses.KEY_DOWN, ord("s"), ord("S")):
+                sel = (sel + 1) % len(options)
+            elif ch in (10, 13):
+                user_idx = sel
+                break
+            draw_option(stdscr, 7 + prev_sel, prev_sel, options[prev_sel], sel)
+            draw_option(stdscr, 7 + sel, sel, options[sel], sel)
+
+        if user_idx == correct_idx:
+            draw_header(stdscr, title)
+            safe_addstr(stdscr, 4, 2, f"题干（{FIELD_NAMES[q_field]}）：{qv}")
+            safe_addstr(stdscr, 6, 4, f"{user_idx+1}. {options[user_idx]} ✅  权重 -1")
+            entry["weight"] = max(0, entry.get("weight", 1) - 1)
+            save_wrong_book(state)
+            _maybe_delete_if_zero(entry)
+        else:
+            draw_header(stdscr, "结果")
+            center_text(stdscr, 6, f"❌ 错误。正确答案：{correct}  权重 +2")
+            entry["weight"] = entry.get("weight", 1) + 2
+            add_wrong_entry(
+                state,
+                item_index=entry["item_index"],
+                q_field=q_field,
+                a_field=a_field,
+                user_wrong=options[user_idx],
+                mode="mcq",
+            )
+            save_wrong_book(state)
+
+        present(stdscr)
+        if wait_key(stdscr) == "esc":
+            return "exit"
+        return "done"
+
+    stale = 0
+    while True:
+        entry = weighted_pick_wrong(state.wrong_db, exclude_id=last_id, rng=state.rng)
+        if entry is None or stale > len(state.wrong_db):
+            draw_header(stdscr, "错题本模式")
+            center_text(stdscr, 6, "📭 错题本为空或无权重题。")
+            present(stdscr)
+            wait_key(stdscr)
+            return
+        last_id = entry.get("id")
+        if not 0 <= entry.get("item_index", -1) < len(state.deck):
+            stale += 1  # 行号失效的错题（词典被外部改过）跳过
+            continue
+        stale = 0
+        mode = entry.get("mode", "")
+        if mode == "mcq" and len(state.deck) >= 2:
+            result = ask_mcq(entry)
+        elif mode == "fill":
+            result = ask_fill(entry)
+        else:
+            result = ask_tf(entry)
+        if result == "exit":
+            return
+
 # mode_load_deck（模式加载词典），用于模式加载词典。
 def mode_load_deck(stdscr, state: State) -> Optional[State]:
     draw_header(stdscr, "加载新词典（x取消）")
-    path = input_line(stdscr, "输入文件路径（.xlsx/.csv/.json）：")
+    path = input_line(stdscr, "输入路径（文件 / 目录 / glob；book.xlsx#表名 或 #* 全部工作表）：")
     if not path:
         return None
     if path.lower() in ("x", "exit", "quit"):
         return None
     path = normalize_deck_path(path)
 
-    col_s = input_line(stdscr, "起始列号（1=第1列，第2列自动作B；默认1）：") or "1"
+    col_s = input_line(stdscr, "起始列号（1=第1列，第2列自动作B；3,5=第3列作A第5列作B；默认1）：") or "1"
     sep = None
     sep_s = input_line(stdscr, "CSV分隔符（留空自动猜；\\t 表示Tab）：")
     if sep_s:
         sep = "\t" if sep_s.strip() == "\\t" else sep_s.strip()
 
-    try:
-        col = int(col_s.strip())
-    except Exception:
-        col = 1
+    col, col_b = parse_col_spec(col_s)
 
+    # 切走前把当前词典放回 LRU（刷新错题本签名），来回切换时不再读盘
+    DECK_CACHE.put(state)
     try:
-        new_deck = load_deck(path, start_col_1based=col, sep=sep)
+        new_state = open_deck_state(path, col, sep, col_b)
     except Exception as e:
         draw_header(stdscr, "加载失败")
         paginate_lines(stdscr, [f"错误：{e}", "", "检查路径/文件格式/列号。"])
-        stdscr.refresh()
+        present(stdscr)
         wait_key(stdscr)
         return None
 
-    if len(new_deck) < 1:
+    if len(new_state.deck) < 1:
         draw_header(stdscr, "加载失败")
         center_text(stdscr, 6, "文件里没读到任何有效 A-B 行（要求两列都非空）。")
-        stdscr.refresh()
+        present(stdscr)
         wait_key(stdscr)
         return None
 
-    new_id = deck_id_from_path(path)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    wrong_path = os.path.join(script_dir, f"wrong_book_{new_id}.json")
-    wrong_db = load_wrong_db(wrong_path)
-
     draw_header(stdscr, "加载成功")
-    paginate_lines(stdscr, [f"路径：{path}", f"条目数：{len(new_deck)}", f"错题本：{os.path.basename(wrong_path)}"])
-    stdscr.refresh()
+    paginate_lines(stdscr, [f"路径：{path}", f"条目数：{len(new_state.deck)}", f"错题本：{os.path.basename(new_state.wrong_path)}"])
+    present(stdscr)
     wait_key(stdscr)
-    set_last_deck_info(path, col, sep)
-    return State(deck=new_deck, deck_path=path, deck_id=new_id, wrong_path=wrong_path, wrong_db=wrong_db)
+    adopt_loaded_state(new_state)
+    set_last_deck_info(path, col, sep, col_b)
+    return new_state
 
 
 # mode_info（模式信息），用于模式信息。
@@ -1106,21 +3710,105 @@ def mode_info(stdscr, state: State):
         f"错题本文件：{state.wrong_path}",
         f"当前错题（权重>0）：{len([e for e in state.wrong_db if e.get('weight', 1) > 0])}",
         "",
+        *conflict_report(state, limit=3),
+        "",
         "提示：",
         "- 选择题/判断题要求至少 2 条数据。",
         "- 填空题支持同义项：在 B（或 A）单元格里用 | 分隔，例如：bonjour|salut",
+        "- 同一个 A 出现在多行时，这些行的 B 都算对（完整列表：--conflicts）。",
     ]
     paginate_lines(stdscr, lines, start_y=4)
-    stdscr.refresh()
+    present(stdscr)
     wait_key(stdscr)
 
 
+# --------------------------- Profiling ---------------------------
+# --profile：加载和菜单进入的每个模式各用一个 cProfile 累计（同一模式多次进入合并），
+# 同时开 tracemalloc 记每个模式的内存峰值和最后一次进入期间内存增长最多的代码行。
+# 退出时在错题本旁边写出每个模式的 .pstats 和一份文字报告，用户报“慢”时拿来离线分析。
+
+PROFILE_TOP_N = 25
+
+
+class SessionProfiler:
+    """按模式分桶的 cProfile + tracemalloc。"""
+
+    def __init__(self, top_n: int = PROFILE_TOP_N):
+        import tracemalloc
+        self.top_n = top_n
+        self.modes: Dict[str, Dict[str, object]] = {}
+        self.started = time.time()
+        tracemalloc.start()
+
+    # run（计量运行），用于在 name 模式的 profile 里运行 fn。
+    def run(self, name: str, fn, *args):
+        import cProfile
+        import tracemalloc
+        m = self.modes.get(name)
+        if m is None:
+            m = self.modes[name] = {"profile": cProfile.Profile(), "calls": 0, "wall": 0.0, "peak": 0, "growth": []}
+        before = tracemalloc.take_snapshot()
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        m["profile"].enable()
+        try:
+            return fn(*args)
+        finally:
+            m["profile"].disable()
+            m["wall"] += time.perf_counter() - t0
+            m["calls"] += 1
+            m["peak"] = max(m["peak"], tracemalloc.get_traced_memory()[1] - base)
+            after = tracemalloc.take_snapshot()
+            m["growth"] = after.compare_to(before, "lineno")[: self.top_n]
+
+    # write（写出报告），用于在 out_dir 写出每个模式的 .pstats 和文字报告，返回报告路径。
+    def write(self, out_dir: str, state: Optional[State]) -> str:
+        import io
+        import pstats
+        import tracemalloc
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        deck_id = state.deck_id if state is not None else "none"
+        prefix = os.path.join(out_dir, f"profile_{deck_id}_{stamp}")
+        out = io.StringIO()
+        out.write(f"# dict_trainer_mac 性能剖析  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started))}\n")
+        if state is not None:
+            out.write(f"词典：{state.deck_path}（{len(state.deck)} 条）  错题本：{state.wrong_path}（{len(state.wrong_db)} 条）\n")
+        out.write(f"进程内存峰值（tracemalloc）：{tracemalloc.get_traced_memory()[1] / 1048576:.1f} MiB\n\n")
+        out.write(f"{'模式':<10}{'进入':>6}{'耗时s':>10}{'峰值MiB':>10}\n")
+        for name, m in self.modes.items():
+            out.write(f"{name:<12}{m['calls']:>6}{m['wall']:>10.2f}{m['peak'] / 1048576:>10.2f}\n")
+        for name, m in self.modes.items():
+            m["profile"].dump_stats(f"{prefix}_{name}.pstats")
+            out.write(f"\n== {name} ==  进入 {m['calls']} 次  耗时 {m['wall']:.2f}s  内存峰值 {m['peak'] / 1048576:.2f} MiB\n")
+            out.write(f"-- 热点（按自身耗时前 {self.top_n}） --\n")
+            pstats.Stats(m["profile"], stream=out).sort_stats("tottime").print_stats(self.top_n)
+            out.write("-- 最后一次进入期间内存增长最多的位置 --\n")
+            for st in m["growth"]:
+                out.write(f"  {st.size_diff / 1024:>10.1f} KiB  {st.count_diff:>+8} 块  {st.traceback}\n")
+        with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        return f"{prefix}.txt"
+
+
+_PROFILER: Optional[SessionProfiler] = None
+
+
+# profiled（按模式剖析），用于开了 --profile 时在该模式的 profile 里运行 fn，否则直接运行。
+def profiled(name: str, fn, *args):
+    if _PROFILER is None:
+        return fn(*args)
+    return _PROFILER.run(name, fn, *args)
+
+
 # --------------------------- Menu ---------------------------
 
 MENU_ITEMS = [
     ("加载词典", "load"),
     ("当前词典信息", "info"),
     ("记忆卡", "flash"),
+    ("搜索", "search"),
+    ("列表浏览（词典 / 错题本）", "browse"),
     ("选择题", "mcq"),
     ("填空题", "fill"),
     ("判断题", "tf_new"),
@@ -1172,26 +3860,64 @@ def menu_handle_key(key: int, sel: int, items):
 
     return None, sel
 
+# draw_menu_item（画菜单项），用于画一行菜单项。
+def draw_menu_item(stdscr, i: int, sel: int) -> None:
+    marker = "➤" if i == sel else " "
+    # 数字键只能直达前 10 项（0 表示第 10 项）；之后的项不标号（留同宽空白对齐），免得以为按得到
+    num = f"{i+1}. " if i < 10 else " " * len(f"{i+1}. ")
+    safe_addstr(stdscr, 4 + i, 4, f"{marker} {num}{MENU_ITEMS[i][0]}")
+
+
 # menu（菜单），用于菜单。
 def menu(stdscr, initial_state: State):
-    curses.curs_set(0)
+    global PERF_HUD
+    curses_call("curs_set", 0)
     state = initial_state
     sel = 0
+    set_active_state(state)
     if not ensure_deck_ready(stdscr, state):
         return
+    full = True
     while True:
-        draw_header(stdscr, "词典记忆助手  ⛽  ↑/↓ 或 W/S 移动，Enter 选择，数字直达，ESC 退出")
-        for i, (name, _) in enumerate(MENU_ITEMS):
-            marker = "➤" if i == sel else " "
-            safe_addstr(stdscr, 4 + i, 4, f"{marker} {i+1}. {name}")
-        safe_addstr(stdscr, 16, 4, f"条目：{len(state.deck)}    错题（权重>0）：{len([e for e in state.wrong_db if e.get('weight',1)>0])}")
-        stdscr.refresh()
-
-        key = stdscr.getch()
+        set_active_state(state)
+        # 后台还在加载时定时刷新，让进度走起来；否则按 RELOAD_POLL_SECONDS 轮询源文件
+        if state.loading():
+            stdscr.timeout(500)
+        elif state.source_sig is not None:
+            stdscr.timeout(int(RELOAD_POLL_SECONDS * 1000))
+        else:
+            stdscr.timeout(-1)
+        if full:
+            draw_header(stdscr, "词典记忆助手  ⛽  ↑/↓ 或 W/S 移动，Enter 选择，数字直达，ESC 退出")
+            for i in range(len(MENU_ITEMS)):
+                draw_menu_item(stdscr, i, sel)
+            safe_addstr(stdscr, 16, 4, f"条目：{len(state.deck)}    错题（权重>0）：{len([e for e in state.wrong_db if e.get('weight',1)>0])}")
+            if state.reload_note:
+                safe_addstr(stdscr, 17, 4, state.reload_note)
+        present(stdscr)
+        full = True
+
+        while True:
+            key = stdscr.getch()
+            if key != -1 or state.loading():
+                break
+            # 超时：只有源文件确实变了才重画
+            diff = poll_deck_reload(state)
+            if diff is not None and diff.changed():
+                break
+        stdscr.timeout(-1)
+        if key in (ord("h"), ord("H")):
+            PERF_HUD = not PERF_HUD
+            continue
+        prev_sel = sel
         action, sel = menu_handle_key(key, sel, MENU_ITEMS)
 
-        # 只移动光标、不触发任何动作
+        # 只移动光标、不触发任何动作：只重写新旧两行
         if action is None:
+            if key != -1:
+                draw_menu_item(stdscr, prev_sel, sel)
+                draw_menu_item(stdscr, sel, sel)
+                full = False
             continue
 
         # 只有明确的 action 才会走到这里
@@ -1199,94 +3925,317 @@ def menu(stdscr, initial_state: State):
             break
 
         elif action == "load":
-            new_state = mode_load_deck(stdscr, state)
-            if new_state is not None:
+            new_state = profiled("load", mode_load_deck, stdscr, state)
+            if new_state is not None and new_state is not state:
+                new_state.rng = state.rng  # 换词典不换随机源，回放会话才可复现
+                _stop_state_stream(state)  # 旧词典还在流式加载的话别再读了（它也进不了 LRU）
                 state = new_state
 
         elif action == "info":
-            mode_info(stdscr, state)
+            profiled("info", mode_info, stdscr, state)
 
         elif action == "flash":
-            mode_flashcards(stdscr, state)
+            profiled("flash", mode_flashcards, stdscr, state)
+
+        elif action == "search":
+            profiled("search", mode_search, stdscr, state)
+
+        elif action == "browse":
+            profiled("browse", mode_browse, stdscr, state)
 
         elif action == "mcq":
-            mode_mcq(stdscr, state)
+            profiled("mcq", mode_mcq, stdscr, state)
 
         elif action == "fill":
-            mode_fillin(stdscr, state)
+            profiled("fill", mode_fillin, stdscr, state)
 
         elif action == "tf_new":
-            mode_tf_new(stdscr, state)
+            profiled("tf_new", mode_tf_new, stdscr, state)
 
         elif action == "tfwb":
-            mode_tf_from_wrongbook(stdscr, state)
+            profiled("tfwb", mode_tf_from_wrongbook, stdscr, state)
 
         elif action == "dedup":
             before = len(state.wrong_db)
-            state.wrong_db = dedup_wrong_db(state.wrong_db, state.wrong_path)
+            state.wrong_db = profiled("dedup", dedup_wrong_db, state.wrong_db, state.wrong_path)
+            wrong_sig = _file_sig(state.wrong_path)  # 有重复时 dedup_wrong_db 已重写文件
+            state.wrong_bytes = wrong_sig[0] if wrong_sig else None
             after = len(state.wrong_db)
             draw_header(stdscr, "去重完成")
             center_text(stdscr, 6, f"🧹 去重成功：{before} → {after}")
-            stdscr.refresh()
+            present(stdscr)
             wait_key(stdscr)
 
         elif action == "clear":
             state.wrong_db.clear()
-            save_wrong_db(state.wrong_path, state.wrong_db)
+            state.confusion = None
+            save_wrong_book(state)
             draw_header(stdscr, "清空完成")
             center_text(stdscr, 6, "🗑️ 已清空错题本")
-            stdscr.refresh()
+            present(stdscr)
             wait_key(stdscr)
 
         else:
             # 防御：遇到未知 action 不至于乱跑
             draw_header(stdscr, "未知操作")
             center_text(stdscr, 6, f"Unknown action: {action}")
-            stdscr.refresh()
+            present(stdscr)
             wait_key(stdscr)
 
 
+# --------------------------- Warm server ---------------------------
+# 常驻进程：预先 import + 加载上次词典与错题本；run.py --warm 通过 Unix socket
+# 把当前终端的 fd 交给它，由 fork 出的子进程直接在该 TTY 上跑 curses 会话。
+
+# warm_socket_path（常驻socket路径），用于常驻socket路径。
+def warm_socket_path() -> str:
+    # 注意：run.py 里有同样的路径规则，修改时两边保持一致
+    base = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(base, f"gms-warm-{os.getuid()}.sock")
+
+
+class WarmDeck:
+    """常驻进程持有的“上次词典”状态；每次会话前按 prefs 与文件 mtime 校验。"""
+
+    def __init__(self, args):
+        self.args = args
+        self.state: Optional[State] = None
+        self.key = None
+
+    # _current_key（当前键），用于判断是否需要重新加载。
+    def _current_key(self):
+        path, col, sep, col_b = get_last_deck_info()
+        if not path:
+            return None
+
+        sig = deck_source_sig(path)
+        deck_id = cached_fingerprint(path, col, sep, col_b, sig) or deck_id_from_path(path)
+        return path, col, sep, col_b, sig, _file_sig(wrong_book_path(deck_id))
+
+    # refresh（刷新），用于刷新。
+    def refresh(self) -> State:
+        key = self._current_key()
+        if self.state is not None and key == self.key:
+            return self.state
+        state = None
+        if key is not None:
+            path, col, sep, col_b = key[:4]
+            state = load_deck_into_state(self.state, path, col, sep, col_b)
+            if state is not None:
+                adopt_loaded_state(state)
+        if state is None:
+            state = build_initial_state(self.args)
+        if state.stream is not None:
+            state.stream.wait()  # 防御：fork 前必须加载完（正常情况下常驻模式不走流式加载）
+        self.state = state
+        self.key = key
+        return state
+
+
+# _run_warm_session（运行常驻会话），用于在 fork 出的子进程里接管客户端终端。
+def _run_warm_session(conn, fds: List[int], req: dict, state: State) -> int:
+    import signal
+    for target, fd in zip((0, 1, 2), fds):
+        os.dup2(fd, target)
+    for fd in fds:
+        if fd > 2:
+            os.close(fd)
+    for k, v in (req.get("env") or {}).items():
+        os.environ[k] = v
+    os.environ.pop("LINES", None)
+    os.environ.pop("COLUMNS", None)
+    if req.get("cwd"):
+        try:
+            os.chdir(req["cwd"])
+        except OSError:
+            pass
+    _init_locale()
+    # 终端是客户端会话的控制终端（不能再给别的会话），Ctrl-C / Ctrl-Z / 窗口大小变化都由 run.py 转发过来。
+    # 自成进程组：父进程（常驻服务）在同一会话的另一组里，这个组就不是孤儿组，SIGTSTP 才能真的停住。
+    # SIGINT / SIGTSTP 恢复默认处理，ncurses 初始化时换上它自己的（C 层处理，阻塞在 getch 里也立即生效）：
+    # Ctrl-C 先恢复终端再退出，Ctrl-Z 先退出 curses 再挂起、恢复后整屏重画
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTSTP, signal.SIG_DFL)
+    code = 0
+    try:
+        conn.sendall(f"pid {os.getpid()}\n".encode("ascii"))  # 客户端据此转发信号
+        curses.wrapper(lambda stdscr: menu(stdscr, state))
+    except Exception:
+        # curses.wrapper 已恢复终端：堆栈打到客户端终端（stderr 已 dup2）；终端不可写时记到 socket 旁
+        import sys
+        import traceback
+        code = 1
+        try:
+            traceback.print_exc()
+            sys.stderr.flush()
+        except OSError:
+            try:
+                with open(warm_socket_path() + ".log", "a", encoding="utf-8") as f:
+                    f.write(time.strftime("%Y-%m-%d %H:%M:%S ") + traceback.format_exc())
+            except OSError:
+                pass
+    try:
+        conn.sendall(str(code).encode("ascii"))
+        conn.close()
+    except OSError:
+        pass
+    return code
+
+
+# serve_warm（常驻服务），用于常驻服务。
+def serve_warm(args) -> int:
+    import json
+    import signal
+    import socket
+
+    path = warm_socket_path()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # socket 文件一创建就只有本人可连：先 bind 再 chmod 之间有窗口，别的用户可趁机连上拿到会话
+    old_umask = os.umask(0o177)
+    try:
+        srv.bind(path)
+    finally:
+        os.umask(old_umask)
+    srv.listen(8)
+    # 子进程自动回收，避免僵尸
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    # 会话在 fork 出的子进程里跑，词典必须在 fork 前同步加载完
+    global STREAM_LOADS
+    STREAM_LOADS = False
+    warm = WarmDeck(args)
+    warm.refresh()
+    try:
+        while True:
+            conn, _ = srv.accept()
+            try:
+                msg, fds, _flags, _addr = socket.recv_fds(conn, 65536, 3)
+                req = json.loads(msg.decode("utf-8") or "{}")
+            except Exception:
+                conn.close()
+                continue
+            if req.get("cmd") == "stop":
+                for fd in fds:
+                    os.close(fd)
+                conn.close()
+                break
+            if len(fds) != 3:
+                for fd in fds:
+                    os.close(fd)
+                conn.close()
+                continue
+            state = warm.refresh()
+            pid = os.fork()
+            if pid == 0:
+                srv.close()
+                os._exit(_run_warm_session(conn, fds, req, state))
+            for fd in fds:
+                os.close(fd)
+            conn.close()
+    finally:
+        srv.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return 0
+
+
 # build_initial_state（构建initial状态），用于构建initial状态。
 def build_initial_state(args) -> State:
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
     if args.path:
         deck_path = normalize_deck_path(args.path)
-        deck = load_deck(deck_path, start_col_1based=args.col, sep=args.sep)
-        set_last_deck_info(deck_path, args.col, args.sep)
-    else:
-        # 默认词典：脚本目录下 dict.csv 或 dict.xlsx（如果存在）
-        candidate = None
-        for name in ("dict.xlsx", "dict.xlsm", "dict.csv", "dict.tsv", "dict.json"):
-            p = os.path.join(script_dir, name)
-            if os.path.exists(p):
-                candidate = p
-                break
-        if candidate is None:
-            # 最小内置词典，避免空跑
-            deck_path = "<内置示例>"
-            deck = [{"A": "bonjour", "B": "你好"}, {"A": "merci", "B": "谢谢"}]
-        else:
-            deck_path = candidate
-            deck = load_deck(deck_path, start_col_1based=args.col, sep=args.sep)
-
-    did = deck_id_from_path(deck_path) if args.path or deck_path != "<内置示例>" else "builtin"
+        state = open_deck_state(deck_path, args.col, args.sep, args.col_b)
+        adopt_loaded_state(state)
+        set_last_deck_info(deck_path, args.col, args.sep, args.col_b)
+        return state
+
+    # 默认词典：脚本目录下 dict.csv 或 dict.xlsx（如果存在）
+    for name in ("dict.xlsx", "dict.xlsm", "dict.csv", "dict.tsv", "dict.json"):
+        p = os.path.join(script_dir, name)
+        if os.path.exists(p):
+            state = open_deck_state(p, args.col, args.sep, args.col_b)
+            adopt_loaded_state(state)
+            return state
+
+    # 最小内置词典，避免空跑
+    deck_path = "<内置示例>"
+    deck = [{"A": "bonjour", "B": "你好"}, {"A": "merci", "B": "谢谢"}]
+    did = "builtin"
     wrong_path = os.path.join(script_dir, f"wrong_book_{did}.json")
     wrong_db = load_wrong_db(wrong_path)
-    return State(deck=deck, deck_path=deck_path, deck_id=did, wrong_path=wrong_path, wrong_db=wrong_db)
+    wrong_sig = _file_sig(wrong_path)
+    return State(deck=deck, deck_path=deck_path, deck_id=did, wrong_path=wrong_path, wrong_db=wrong_db,
+                 deck_col=args.col, deck_sep=args.sep, deck_col_b=args.col_b,
+                 wrong_bytes=wrong_sig[0] if wrong_sig else None)
 
 
 # main（主入口），用于主入口。
 def main():
+    import argparse
     parser = argparse.ArgumentParser(add_help=True)
-    parser.add_argument("path", nargs="?", default=None, help="词典文件路径（.xlsx/.csv/.json）")
+    parser.add_argument("path", nargs="?", default=None,
+                        help="词典路径（.xlsx/.csv/.json/.jsonl，可 .gz/.bz2/.xz 压缩；也可以是目录或 glob）")
     parser.add_argument("--col", type=int, default=1, help="起始列号（1-based），B为下一列")
+    parser.add_argument("--sheet", type=str, default=None, help="xlsx 工作表名；* 表示全部工作表（并行解析后合并）")
+    parser.add_argument("--col-b", type=int, default=None, help="B 列号（1-based）；默认为 --col 的下一列")
     parser.add_argument("--sep", type=str, default=None, help="CSV分隔符，默认自动猜；Tab 用 --sep $'\\t'")
+    parser.add_argument("--arena", action="store_true", help="词典存为连续 UTF-8 缓冲区（超大词典省内存）")
+    parser.add_argument("--compile", metavar="OUT", default=None, help=f"把词典编译成 {GMSDECK_EXT}（mmap 随机访问格式）后退出")
+    parser.add_argument("--serve", action="store_true", help="常驻模式：预加载上次词典，供 run.py --warm 连接")
+    parser.add_argument("--conflicts", action="store_true", help="打印同题多答（同一 A 多个 B / 同一 B 多个 A）报告后退出")
+    parser.add_argument("--profile", action="store_true",
+                        help="按模式记录 cProfile + tracemalloc，退出时在错题本旁写出 .pstats 和报告")
+    parser.add_argument("--profile-top", type=int, default=PROFILE_TOP_N, help="报告里每个模式列出的热点条数")
+    parser.add_argument("--hud", action="store_true",
+                        help="在标题栏显示性能状态（加载 / 内存 / 出题 / 保存耗时、错题本大小）；菜单里按 H 切换")
     args = parser.parse_args()
+    if args.sheet and args.path:
+        args.path = f"{args.path}#{args.sheet}"
+
+    global DECK_STORAGE, PERF_HUD
+    PERF_HUD = args.hud
+    if args.arena:
+        DECK_STORAGE = "arena"
+    if args.serve:
+        raise SystemExit(serve_warm(args))
+    if args.compile:
+        if not args.path:
+            parser.error("--compile 需要指定词典文件路径")
+        src = normalize_deck_path(args.path)
+        deck = load_deck_arena(src, start_col_1based=args.col, sep=args.sep, col_b_1based=args.col_b)
+        out = compile_deck(deck, normalize_deck_path(args.compile), src_sig=_file_sig(src))
+        print(f"已编译 {len(deck)} 条 → {out}")
+        return
+    if args.conflicts:
+        if not args.path:
+            parser.error("--conflicts 需要指定词典文件路径")
+        src = normalize_deck_path(args.path)
+        deck = load_deck(src, start_col_1based=args.col, sep=args.sep, col_b_1based=args.col_b)
+        report = State(deck=deck, deck_path=src, deck_id="", wrong_path="", wrong_db=[])
+        print("\n".join(conflict_report(report)))
+        return
 
-    state = build_initial_state(args)
+    global _PROFILER
+    if args.profile:
+        _PROFILER = SessionProfiler(args.profile_top)
+    state = profiled("load", build_initial_state, args)
+    start_last_deck_preload(state)
     _init_locale()
-    curses.wrapper(lambda stdscr: menu(stdscr, state))
+    try:
+        curses.wrapper(lambda stdscr: menu(stdscr, state))
+    finally:
+        if _PROFILER is not None:
+            final = _ACTIVE_STATE or state
+            report = _PROFILER.write(os.path.dirname(os.path.abspath(final.wrong_path)), final)
+            print(f"性能剖析报告：{report}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,479 @@
+# 性能基准（dict_trainer_mac）
+# -*- coding: utf-8 -*-
+"""dict_trainer_mac 的性能基准
+
+子命令：
+  startup   用 `python -X importtime` 测冷启动导入耗时，并做预算断言
+  render    在伪终端里跑界面，统计每次按键终端实际收到的字节数
+  bench     生成合成词典（多种内容 × 行数 × 格式），测加载和出题/判分/错题本各函数，输出 JSON
+
+用法示例：
+  python dtm_bench.py startup
+  python dtm_bench.py startup --budget-ms 80 --runs 7
+  python dtm_bench.py render --scenario mcq
+  python dtm_bench.py bench --sizes 1k,100k --out bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TARGET_MODULE = "dict_trainer_mac"
+
+# 只在特定格式/模式才需要的模块：冷启动时不应被导入
+LAZY_MODULES = ("csv", "json", "difflib", "hashlib", "uuid", "unicodedata", "argparse")
+
+
+# --------------------------- startup ---------------------------
+
+# parse_importtime（解析导入耗时），用于解析 -X importtime 的 stderr。
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """返回 {模块名: (self_us, cumulative_us)}；同名模块保留第一次出现。"""
+    out: Dict[str, Tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cum_us = int(parts[1].strip())
+        except ValueError:
+            continue  # 表头
+        name = parts[2].strip()
+        out.setdefault(name, (self_us, cum_us))
+    return out
+
+
+# measure_startup（测量冷启动），用于测量冷启动。
+def measure_startup(runs: int = 5) -> Tuple[List[int], Dict[str, Tuple[int, int]]]:
+    """每次新开解释器导入目标模块；返回各次目标模块累计耗时（微秒）和最后一次的明细。"""
+    totals: List[int] = []
+    detail: Dict[str, Tuple[int, int]] = {}
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {TARGET_MODULE}"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "导入失败")
+        detail = parse_importtime(proc.stderr)
+        if TARGET_MODULE not in detail:
+            raise RuntimeError(f"importtime 输出中没有 {TARGET_MODULE}")
+        totals.append(detail[TARGET_MODULE][1])
+    return totals, detail
+
+
+# cmd_startup（startup 子命令），用于冷启动预算断言。
+def cmd_startup(args) -> int:
+    totals, detail = measure_startup(args.runs)
+    best_ms = min(totals) / 1000.0
+    print(f"{TARGET_MODULE} 导入耗时：best={best_ms:.1f}ms  runs={[round(t / 1000.0, 1) for t in totals]}")
+
+    top = sorted(detail.items(), key=lambda kv: kv[1][0], reverse=True)[: args.top]
+    for name, (self_us, cum_us) in top:
+        print(f"  {self_us / 1000.0:7.2f}ms self  {cum_us / 1000.0:7.2f}ms cum  {name}")
+
+    failed = False
+    eager = [m for m in LAZY_MODULES if m in detail]
+    if eager:
+        print(f"❌ 这些模块应按需导入，但在启动时被导入：{', '.join(eager)}")
+        failed = True
+    if best_ms > args.budget_ms:
+        print(f"❌ 超出启动预算：{best_ms:.1f}ms > {args.budget_ms:.1f}ms")
+        failed = True
+    if not failed:
+        print(f"✅ 启动预算内（{args.budget_ms:.1f}ms）")
+    return 1 if failed else 0
+
+
+# --------------------------- render ---------------------------
+
+# 场景：(进入场景的前缀按键（不计入）, 逐个计量的按键)
+RENDER_SCENARIOS = {
+    "menu": ("", "sssssswwwwww"),
+    "mcq": ("6\r", "sswwsw"),
+}
+
+
+# _render_deck_rows（渲染测试词典），用于生成渲染测试用的小词典（拉丁 + 中文）。
+def _render_deck_rows(n: int = 50) -> List[Tuple[str, str]]:
+    return [(f"word{i:03d} example", f"示例词条{i:03d}（长一点的中文释义）") for i in range(n)]
+
+
+# _read_until_quiet（读到安静为止），用于读取伪终端输出，直到 settle 秒内没有新数据。
+def _read_until_quiet(fd: int, settle: float, limit: float = 5.0) -> int:
+    import select
+    total = 0
+    end = time.time() + limit
+    while time.time() < end:
+        r, _, _ = select.select([fd], [], [], settle)
+        if not r:
+            break
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            break
+        if not data:
+            break
+        total += len(data)
+    return total
+
+
+# measure_render（测量渲染字节），用于在伪终端里跑一个场景。
+def measure_render(scenario: str, rows: int = 24, cols: int = 80, settle: float = 0.2) -> Dict[str, object]:
+    """返回 {"initial": 首屏字节, "per_key": [每次按键的字节]}。"""
+    import pty
+    import shutil
+    import signal
+    import tempfile
+    prefix, keys = RENDER_SCENARIOS[scenario]
+    # 在临时目录里跑一份拷贝：偏好设置、错题本都写在脚本目录，不污染真实数据
+    tmp = tempfile.mkdtemp(prefix="dtm-render-")
+    try:
+        script = os.path.join(tmp, f"{TARGET_MODULE}.py")
+        shutil.copy(os.path.join(HERE, f"{TARGET_MODULE}.py"), script)
+        deck = os.path.join(tmp, "deck.csv")
+        with open(deck, "w", encoding="utf-8") as f:
+            f.writelines(f"{a},{b}\n" for a, b in _render_deck_rows())
+        pid, fd = pty.fork()
+        if pid == 0:
+            os.environ.update({"TERM": "xterm-256color", "LINES": str(rows), "COLUMNS": str(cols)})
+            os.execv(sys.executable, [sys.executable, script, deck])
+        try:
+            initial = _read_until_quiet(fd, settle)
+            for ch in prefix:
+                os.write(fd, ch.encode("utf-8"))
+                _read_until_quiet(fd, settle)
+            per_key = []
+            for ch in keys:
+                os.write(fd, ch.encode("utf-8"))
+                per_key.append(_read_until_quiet(fd, settle))
+        finally:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+            os.close(fd)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"initial": initial, "per_key": per_key}
+
+
+# cmd_render（render 子命令），用于打印每次按键的终端字节数。
+def cmd_render(args) -> int:
+    import json
+    names = list(RENDER_SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {name: measure_render(name, rows=args.rows, cols=args.cols) for name in names}
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    for name, r in results.items():
+        per_key = r["per_key"] or [0]
+        print(f"{name}: 首屏 {r['initial']} B；每次按键 平均 {sum(per_key) / len(per_key):.0f} B  "
+              f"最大 {max(per_key)} B  明细 {per_key}")
+    return 0
+
+
+# --------------------------- bench ---------------------------
+# 合成词典按 (内容, 行数, 种子) 确定生成，同一参数每次生成的文件逐字节相同；
+# 结果 JSON 的每一项都带稳定的 id（内容/行数/格式 或 内容/行数/函数），不同提交之间可以直接对比。
+
+BENCH_KINDS = ("latin", "cjk", "mixed", "sentence", "alternatives")
+BENCH_FORMATS = ("csv", "tsv", "xlsx", "json")
+BENCH_SIZES = "1k,100k,1M"
+
+_SYLLABLES = ("ba", "ce", "di", "fo", "gu", "ka", "le", "mi", "no", "pu",
+              "ra", "se", "ti", "vo", "xu", "ya", "ze", "an", "er", "on")
+_HAN = "学习记忆词典题目答案错误正确选择判断填空练习时间方法语言文字声音意思天地人心手口日月山水火木"
+_KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねの"
+
+
+# _parse_size（解析行数），用于把 1k / 100k / 1M 这样的写法转成整数。
+def _parse_size(text: str) -> int:
+    t = text.strip().lower()
+    mult = {"k": 1000, "m": 1000000}.get(t[-1:], 1)
+    return int(float(t[:-1] if mult > 1 else t) * mult)
+
+
+# gen_deck_rows（生成合成词典），用于按内容类型生成确定的 (A, B) 行。
+def gen_deck_rows(kind: str, n: int, seed: int = 0) -> List[Tuple[str, str]]:
+    import random
+    rng = random.Random(f"{kind}:{n}:{seed}")
+    choice, randint = rng.choice, rng.randint
+
+    def word() -> str:
+        return "".join(choice(_SYLLABLES) for _ in range(randint(2, 5)))
+
+    def han(lo: int, hi: int) -> str:
+        return "".join(choice(_HAN) for _ in range(randint(lo, hi)))
+
+    rows: List[Tuple[str, str]] = []
+    for _ in range(n):
+        if kind == "latin":
+            a, b = word(), word()
+        elif kind == "cjk":
+            a, b = han(2, 4), han(3, 6) + choice(_KANA)
+        elif kind == "mixed":
+            a, b = word(), han(2, 6) if randint(0, 3) else f"{han(2, 4)}（{word()}）"
+        elif kind == "sentence":
+            a = " ".join(word() for _ in range(randint(8, 16))).capitalize() + "."
+            b = han(12, 30) + "。"
+        elif kind == "alternatives":
+            a, b = word(), " | ".join(word() for _ in range(randint(2, 4)))
+        else:
+            raise RuntimeError(f"未知的词典内容类型：{kind}")
+        rows.append((a, b))
+    return rows
+
+
+# write_deck（写出词典文件），用于把行写成 csv / tsv / xlsx / json。
+def write_deck(rows: List[Tuple[str, str]], path: str, fmt: str) -> None:
+    if fmt in ("csv", "tsv"):
+        import csv
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f, delimiter="," if fmt == "csv" else "\t").writerows(rows)
+    elif fmt == "json":
+        import json
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([{"A": a, "B": b} for a, b in rows], f, ensure_ascii=False)
+    elif fmt == "xlsx":
+        import openpyxl
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for r in rows:
+            ws.append(r)
+        wb.save(path)
+    else:
+        raise RuntimeError(f"未知的词典格式：{fmt}")
+
+
+# _op_stats（单次耗时统计），用于把一组纳秒耗时汇总成首次 / 平均 / 分位数。
+def _op_stats(ns: List[int]) -> Dict[str, float]:
+    warm = sorted(ns[1:]) or list(ns)
+    return {
+        "n": len(ns),
+        "cold_ms": round(ns[0] / 1e6, 3),
+        "mean_us": round(sum(warm) / len(warm) / 1e3, 2),
+        "p50_us": round(warm[len(warm) // 2] / 1e3, 2),
+        "p95_us": round(warm[min(len(warm) - 1, int(len(warm) * 0.95))] / 1e3, 2),
+    }
+
+
+# _time_calls（计时调用），用于逐次计时调用 fn(i)。
+def _time_calls(fn, n: int) -> List[int]:
+    clock = time.perf_counter_ns
+    out = []
+    for i in range(n):
+        t0 = clock()
+        fn(i)
+        out.append(clock() - t0)
+    return out
+
+
+# _typo（制造拼写错误），用于把答案改一个字符，模拟填空题里的手误。
+def _typo(s: str, i: int) -> str:
+    if len(s) < 2 or i % 2 == 0:
+        return s
+    k = i % len(s)
+    return s[:k] + ("x" if s[k] != "x" else "y") + s[k + 1:]
+
+
+# bench_load（测加载），用于测某个词典文件的 load_deck 耗时（每次先清空列式缓存）。
+def bench_load(dtm, path: str, repeat: int) -> Dict[str, object]:
+    times = []
+    rows = 0
+    for _ in range(max(1, repeat)):
+        dtm._COLUMNAR_CACHE.clear()
+        t0 = time.perf_counter()
+        rows = len(dtm.load_deck(path))
+        times.append((time.perf_counter() - t0) * 1000)
+    return {"rows": rows, "bytes": os.path.getsize(path), "best_ms": round(min(times), 2),
+            "runs_ms": [round(t, 2) for t in times]}
+
+
+# bench_ops（测出题 / 判分 / 错题本函数），用于在一份内存词典上测各个热点函数。
+def bench_ops(dtm, deck: List[Dict[str, str]], workdir: str, n: int, wrong_n: int, seed: int) -> Dict[str, Dict]:
+    import random
+    wrong_path = os.path.join(workdir, "wrong_book_bench.json")
+    if os.path.exists(wrong_path):
+        os.remove(wrong_path)
+    state = dtm.State(deck=deck, deck_path="<bench>", deck_id="bench", wrong_path=wrong_path, wrong_db=[],
+                      rng=random.Random(seed))
+    out: Dict[str, Dict] = {}
+
+    # 索引单独计时，出题函数的首次调用就不再混进建索引的时间
+    t0 = time.perf_counter_ns()
+    dtm.conflict_index(state)
+    out["conflict_index"] = _op_stats([time.perf_counter_ns() - t0])
+    t0 = time.perf_counter_ns()
+    state.similar = {}
+    for field in ("A", "B"):
+        idx = dtm.SimilarityIndex(field)
+        idx.build(deck)
+        state.similar[field] = idx
+    out["similarity_index"] = _op_stats([time.perf_counter_ns() - t0])
+
+    out["build_mcq"] = _op_stats(_time_calls(lambda i: dtm.build_mcq(state), n))
+    out["build_tf_new"] = _op_stats(_time_calls(lambda i: dtm.build_tf_new(state), n))
+    out["build_fillin"] = _op_stats(_time_calls(lambda i: dtm.build_fillin(state), n))
+
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(n):
+        row = deck[rng.randrange(len(deck))]
+        pairs.append((_typo(row["A"], i), row["A"]))
+    out["is_correct_fuzzy"] = _op_stats(_time_calls(lambda i: dtm.is_correct_fuzzy(*pairs[i]), n))
+
+    picks = [rng.randrange(len(deck)) for _ in range(wrong_n)]
+    out["add_wrong_entry"] = _op_stats(_time_calls(
+        lambda i: dtm.add_wrong_entry(state, picks[i], "A", "B", f"wrong{i % 7}", "mcq"), wrong_n))
+    out["add_wrong_entry"]["wrong_book"] = len(state.wrong_db)
+    out["weighted_pick_wrong"] = _op_stats(_time_calls(
+        lambda i: dtm.weighted_pick_wrong(state.wrong_db, rng=state.rng), n))
+
+    # 去重：同一批错题复制三份（相当于合并了三次旧错题本），每次在新副本上跑
+    dup = [dict(e) for e in state.wrong_db] * 3
+    out["dedup_wrong_db"] = _op_stats(_time_calls(lambda i: dtm.dedup_wrong_db(list(dup), wrong_path), 6))
+    out["dedup_wrong_db"]["entries"] = len(dup)
+    return out
+
+
+# _git_rev（当前提交），用于在结果里记下被测代码的提交号。
+def _git_rev() -> str:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", f"{TARGET_MODULE}.py"], cwd=HERE,
+                               capture_output=True, text=True).stdout.strip()
+        return proc.stdout.strip() + ("-dirty" if dirty else "")
+    except OSError:
+        return ""
+
+
+# cmd_bench（bench 子命令），用于跑合成词典基准并输出 JSON。
+def cmd_bench(args) -> int:
+    import json
+    import platform
+    import shutil
+    import tempfile
+    sys.path.insert(0, HERE)
+    import dict_trainer_mac as dtm
+
+    kinds = [k for k in args.kinds.split(",") if k]
+    formats = [f for f in args.formats.split(",") if f]
+    sizes = [_parse_size(s) for s in args.sizes.split(",") if s]
+    for k in kinds:
+        if k not in BENCH_KINDS:
+            raise SystemExit(f"未知的词典内容类型：{k}（可选 {', '.join(BENCH_KINDS)}）")
+    for f in formats:
+        if f not in BENCH_FORMATS:
+            raise SystemExit(f"未知的词典格式：{f}（可选 {', '.join(BENCH_FORMATS)}）")
+
+    deck_dir = args.deck_dir or tempfile.mkdtemp(prefix="dtm-bench-")
+    os.makedirs(deck_dir, exist_ok=True)
+    result: Dict[str, object] = {
+        "meta": {"rev": _git_rev(), "python": platform.python_version(), "platform": platform.platform(),
+                 "seed": args.seed, "ops_n": args.ops_n, "wrong_n": args.wrong_n,
+                 "kinds": kinds, "sizes": sizes, "formats": formats,
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "load": {},
+        "ops": {},
+    }
+    try:
+        for kind in kinds:
+            for n in sizes:
+                rows = gen_deck_rows(kind, n, args.seed)
+                deck = None
+                for fmt in formats:
+                    case = f"{kind}/{n}/{fmt}"
+                    if fmt == "xlsx" and n > args.xlsx_max_rows:
+                        result["load"][case] = {"skipped": f"超过 --xlsx-max-rows {args.xlsx_max_rows}"}
+                        continue
+                    path = os.path.join(deck_dir, f"{kind}-{n}-{args.seed}.{fmt}")
+                    try:
+                        if not os.path.exists(path):
+                            write_deck(rows, path, fmt)
+                    except ImportError as e:
+                        result["load"][case] = {"skipped": f"缺少依赖：{e.name}"}
+                        continue
+                    r = bench_load(dtm, path, args.repeat if n <= 100000 else 1)
+                    result["load"][case] = r
+                    if not args.json:
+                        print(f"load  {case:<28} {r['best_ms']:>10.1f}ms  {r['rows']} 行  {r['bytes']} B", flush=True)
+                    if deck is None and fmt in ("csv", "tsv", "json"):
+                        deck = dtm.load_deck(path)
+                if deck is None:
+                    deck = [{"A": a, "B": b} for a, b in rows]
+                del rows
+                ops = bench_ops(dtm, deck, deck_dir, args.ops_n, args.wrong_n, args.seed)
+                for op, st in ops.items():
+                    result["ops"][f"{kind}/{n}/{op}"] = st
+                    if not args.json:
+                        print(f"op    {kind + '/' + str(n) + '/' + op:<40} cold {st['cold_ms']:>9.2f}ms  "
+                              f"mean {st['mean_us']:>9.1f}us  p95 {st['p95_us']:>9.1f}us", flush=True)
+                del deck
+                dtm._COLUMNAR_CACHE.clear()
+    finally:
+        if not args.deck_dir:
+            shutil.rmtree(deck_dir, ignore_errors=True)
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    if args.json:
+        print(text)
+    return 0
+
+
+# --------------------------- main ---------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(add_help=True)
+    sub = parser.add_subparsers(dest="cmd")
+
+    p = sub.add_parser("startup", help="冷启动导入耗时（-X importtime）+ 预算断言")
+    p.add_argument("--runs", type=int, default=5, help="重复次数，取最好成绩")
+    p.add_argument("--budget-ms", type=float, default=60.0, help="导入预算（毫秒），超出则退出码为 1")
+    p.add_argument("--top", type=int, default=10, help="打印 self 耗时最高的前 N 个模块")
+    p.set_defaults(func=cmd_startup)
+
+    p = sub.add_parser("render", help="伪终端里统计每次按键终端收到的字节数")
+    p.add_argument("--scenario", choices=list(RENDER_SCENARIOS) + ["all"], default="all")
+    p.add_argument("--rows", type=int, default=24)
+    p.add_argument("--cols", type=int, default=80)
+    p.add_argument("--json", action="store_true", help="输出 JSON")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("bench", help="合成词典基准：加载 + 出题 / 判分 / 错题本函数，输出 JSON")
+    p.add_argument("--kinds", default=",".join(BENCH_KINDS), help="词典内容，逗号分隔")
+    p.add_argument("--sizes", default=BENCH_SIZES, help="行数，逗号分隔，支持 k / M 后缀")
+    p.add_argument("--formats", default=",".join(BENCH_FORMATS), help="文件格式，逗号分隔")
+    p.add_argument("--xlsx-max-rows", type=int, default=100000, help="xlsx 只测不超过该行数的词典（openpyxl 很慢）")
+    p.add_argument("--repeat", type=int, default=3, help="不超过 10 万行的词典加载重复次数，取最好成绩")
+    p.add_argument("--ops-n", type=int, default=2000, help="出题 / 判分 / 抽错题各调用次数")
+    p.add_argument("--wrong-n", type=int, default=300, help="add_wrong_entry 调用次数（每次都整本保存）")
+    p.add_argument("--seed", type=int, default=0, help="词典生成和出题的随机种子")
+    p.add_argument("--deck-dir", default=None, help="合成词典存放目录（保留并复用）；默认临时目录，跑完删除")
+    p.add_argument("--out", default=None, help="把 JSON 结果写到文件")
+    p.add_argument("--json", action="store_true", help="JSON 打到标准输出（不打进度）")
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args()
+    if not getattr(args, "func", None):
+        args = parser.parse_args(["startup"])
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,244 @@
+# 无终端内存屏幕（dict_trainer_mac）
+# -*- coding: utf-8 -*-
+"""dict_trainer_mac 的无终端（headless）后端
+
+FakeScreen 实现了 dict_trainer_mac 用到的那部分 stdscr 接口，
+按脚本喂按键、在内存里画字符、每次 noutrefresh/refresh 记一帧，
+不需要 TTY 就能在进程内跑完整的 menu() 循环，用于测试和端到端延迟基准。
+
+按键脚本：
+  - 单个字符，或多字符字符串（逐字展开）："6\\r" 表示按 6 再回车
+  - int：curses 键码，如 curses.KEY_DOWN
+  - None：模拟一次 timeout（getch 返回 -1）
+脚本用完时抛 ScriptExhausted，run_menu 会接住并返回。
+
+用法示例：
+  python dtm_headless.py                 # 用内置小词典跑一段脚本，打印最后一帧
+  python dtm_headless.py deck.csv --keys "6\\r1x"
+"""
+
+from __future__ import annotations
+
+import curses
+import os
+import re
+import time
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Tuple, Union
+
+import dict_trainer_mac as dtm
+
+Key = Union[str, int, None]
+
+
+class ScriptExhausted(Exception):
+    """按键脚本已经用完。"""
+
+
+# expand_keys（展开按键脚本），用于把多字符字符串展开成逐个按键。
+def expand_keys(keys: Iterable[Key]) -> List[Key]:
+    out: List[Key] = []
+    for k in keys:
+        if isinstance(k, str) and len(k) != 1:
+            out.extend(k)
+        else:
+            out.append(k)
+    return out
+
+
+class FakeScreen:
+    """内存里的 stdscr：宽字符占两格（第二格为空串），越界写入抛 curses.error，与真实 curses 一致。"""
+
+    headless = True
+
+    def __init__(self, keys: Iterable[Key] = (), size: Tuple[int, int] = (24, 80),
+                 record: bool = True, max_frames: Optional[int] = None):
+        self.h, self.w = size
+        self.cells = [[" "] * self.w for _ in range(self.h)]
+        self.keys: Deque[Key] = deque(expand_keys(keys))
+        self._pending: Deque[int] = deque()  # getch 逐字节返回非 ASCII 字符
+        self.record = record
+        self.frames: Deque[Tuple[str, ...]] = deque(maxlen=max_frames)
+        self.frame_times: List[float] = []
+        self.key_times: List[float] = []
+        self.chars_written = 0
+        self.cursor = (0, 0)
+        self.delay = -1
+
+    # feed（追加按键），用于追加按键。
+    def feed(self, *keys: Key) -> None:
+        self.keys.extend(expand_keys(keys))
+
+    # ---- 画 ----
+
+    def getmaxyx(self) -> Tuple[int, int]:
+        return self.h, self.w
+
+    def addstr(self, y: int, x: int, s: str, attr: int = 0) -> None:
+        if not (0 <= y < self.h and 0 <= x < self.w):
+            raise curses.error("addstr() returned ERR")
+        row = self.cells[y]
+        for ch in s:
+            cw = dtm.char_width(ch) or 1
+            if x + cw > self.w:
+                raise curses.error("addstr() returned ERR")
+            row[x] = ch
+            if cw == 2:
+                row[x + 1] = ""
+            x += cw
+            self.chars_written += 1
+        self.cursor = (y, min(x, self.w - 1))
+
+    def erase(self) -> None:
+        for row in self.cells:
+            row[:] = [" "] * self.w
+
+    clear = erase
+
+    def move(self, y: int, x: int) -> None:
+        if not (0 <= y < self.h and 0 <= x < self.w):
+            raise curses.error("wmove() returned ERR")
+        self.cursor = (y, x)
+
+    def noutrefresh(self) -> None:
+        self.frame_times.append(time.perf_counter())
+        if self.record:
+            self.frames.append(self.text())
+
+    refresh = noutrefresh
+
+    def keypad(self, flag: bool) -> None:
+        pass
+
+    def nodelay(self, flag: bool) -> None:
+        self.delay = 0 if flag else -1
+
+    def timeout(self, delay: int) -> None:
+        self.delay = delay
+
+    # ---- 读 ----
+
+    def _next_key(self) -> Key:
+        if not self.keys:
+            raise ScriptExhausted()
+        self.key_times.append(time.perf_counter())
+        return self.keys.popleft()
+
+    def getch(self) -> int:
+        if self._pending:
+            return self._pending.popleft()
+        k = self._next_key()
+        if k is None:
+            return -1
+        if isinstance(k, int):
+            return k
+        data = k.encode("utf-8")
+        self._pending.extend(data[1:])
+        return data[0]
+
+    def get_wch(self) -> Union[str, int]:
+        k = self._next_key()
+        if k is None:
+            raise curses.error("no input")
+        if isinstance(k, int) and k < 256:
+            return chr(k)
+        return k
+
+    def getstr(self, y: int, x: int, n: int = 1023) -> bytes:
+        """读到回车为止（回车本身不返回），按 n 截断，行为同 curses 的 getstr。"""
+        buf: List[str] = []
+        while True:
+            k = self._next_key()
+            if k in ("\n", "\r", 10, 13, curses.KEY_ENTER):
+                break
+            if k in ("\x7f", "\b", curses.KEY_BACKSPACE):
+                if buf:
+                    buf.pop()
+            elif isinstance(k, str):
+                buf.append(k)
+        s = "".join(buf)[:n]
+        try:
+            self.addstr(y, x, s)
+        except curses.error:
+            pass
+        return s.encode("utf-8")
+
+    # ---- 结果 ----
+
+    # text（当前画面文本），用于取当前画面（每行去掉行尾空格）。
+    def text(self) -> Tuple[str, ...]:
+        return tuple("".join(row).rstrip() for row in self.cells)
+
+    # find（查找文本），用于判断当前画面里是否出现某段文本。
+    def find(self, needle: str) -> bool:
+        return any(needle in line for line in self.text())
+
+    # latencies（按键延迟），用于算每次读键到下一帧提交的时间（秒）。
+    def latencies(self) -> List[float]:
+        import bisect
+        out = []
+        for t in self.key_times:
+            k = bisect.bisect_left(self.frame_times, t)
+            if k < len(self.frame_times):
+                out.append(self.frame_times[k] - t)
+        return out
+
+
+_ESCAPES = {"r": "\r", "n": "\n", "t": "\t", "e": "\x1b", "\\": "\\"}
+_ESCAPE_RE = re.compile(r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|[rnte\\])")
+
+
+# unescape_keys（解析按键转义），用于只把 \r \n \t \e \\ \xNN \uNNNN 换成对应字符，其余文字（含中文）原样保留。
+def unescape_keys(text: str) -> str:
+    def sub(m: "re.Match") -> str:
+        t = m.group(1)
+        return chr(int(t[1:], 16)) if t[0] in "xu" else _ESCAPES[t]
+    return _ESCAPE_RE.sub(sub, text)
+
+
+# run_menu（进程内跑菜单），用于用 FakeScreen 跑 menu() 直到按键脚本用完或用户退出。
+def run_menu(state: "dtm.State", keys: Iterable[Key], size: Tuple[int, int] = (24, 80),
+             record: bool = True, max_frames: Optional[int] = None) -> FakeScreen:
+    screen = FakeScreen(keys, size=size, record=record, max_frames=max_frames)
+    try:
+        dtm.menu(screen, state)
+    except ScriptExhausted:
+        pass
+    return screen
+
+
+# temp_state（临时状态），用于在临时目录里建一个 State（错题本不落到脚本目录）。
+def temp_state(deck: List[dict], workdir: str, deck_id: str = "headless") -> "dtm.State":
+    wrong_path = os.path.join(workdir, f"wrong_book_{deck_id}.json")
+    return dtm.State(deck=deck, deck_path=os.path.join(workdir, "<headless>"), deck_id=deck_id,
+                     wrong_path=wrong_path, wrong_db=dtm.load_wrong_db(wrong_path))
+
+
+def main() -> int:
+    import argparse
+    import tempfile
+    parser = argparse.ArgumentParser(add_help=True)
+    parser.add_argument("path", nargs="?", default=None, help="词典路径；不给则用内置小词典")
+    parser.add_argument("--keys", default="6\r1x7\rhello\rx", help="按键脚本（支持 \\r \\n \\t \\e \\xNN 转义，如 '6\\r1x'）")
+    parser.add_argument("--size", default="24x80", help="屏幕大小 行x列")
+    args = parser.parse_args()
+
+    rows, cols = (int(v) for v in args.size.lower().split("x"))
+    keys = unescape_keys(args.keys)
+    with tempfile.TemporaryDirectory(prefix="dtm-headless-") as tmp:
+        if args.path:
+            deck = dtm.load_deck(dtm.normalize_deck_path(args.path))
+        else:
+            deck = [{"A": "bonjour", "B": "你好"}, {"A": "merci", "B": "谢谢"},
+                    {"A": "au revoir", "B": "再见"}, {"A": "s'il vous plaît", "B": "请"}]
+        screen = run_menu(temp_state(deck, tmp), keys, size=(rows, cols))
+    print("\n".join(screen.frames[-1] if screen.frames else screen.text()))
+    lat = screen.latencies()
+    if lat:
+        print(f"\n帧数 {len(screen.frame_times)}  按键 {len(screen.key_times)}  "
+              f"按键→下一帧 平均 {sum(lat) / len(lat) * 1000:.2f}ms  最大 {max(lat) * 1000:.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,423 @@
+# 会话录制与回放（dict_trainer_mac）
+# -*- coding: utf-8 -*-
+"""dict_trainer_mac 的会话录制 / 回放
+
+会话 = 按键流 + 随机种子。回放时用 dtm_headless 的内存屏幕在进程内跑 menu()，
+出题随机源固定为 random.Random(seed)（State.rng），同一份会话每次出的题、选项顺序都一样，
+可以在不同分支的 dict_trainer_mac.py 上跑完全相同的工作量，对比各阶段的：
+  - 墙钟时间
+  - 内存分配（tracemalloc：阶段内峰值、阶段结束时净增）
+  - 文件写入（以写方式打开的次数和写出的字节数）
+
+录制和回放都在临时目录里的脚本拷贝上进行（偏好设置、错题本、.gms_cache 都写在脚本目录），
+从空错题本开始，不碰真实数据；因此录下的会话回放时起点一致。
+
+子命令：
+  record OUT [词典]        在真实终端里录一段会话，退出后写出 OUT（JSON）
+  standard OUT            写出标准会话：合成词典 → 加载 → 500 道选择题 → 错题本练习 → 去重
+  replay [会话]            回放会话（不给则用标准会话），打印各阶段报告
+
+用法示例：
+  python dtm_replay.py replay
+  python dtm_replay.py replay --json > main.json
+  python dtm_replay.py replay --script ../other-branch/dict_trainer_mac.py --json > branch.json
+  python dtm_replay.py record my_session.json deck.csv --seed 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TARGET_MODULE = "dict_trainer_mac"
+SESSION_VERSION = 1
+
+# 阶段 = 菜单进入的模式（按函数名计）；不在任何模式里的时间记为 menu
+PHASES = {
+    "mode_load_deck": "load",
+    "mode_info": "info",
+    "mode_flashcards": "flash",
+    "mode_search": "search",
+    "mode_browse": "browse",
+    "mode_mcq": "mcq",
+    "mode_fillin": "fill",
+    "mode_tf_new": "tf",
+    "mode_tf_from_wrongbook": "drill",
+    "dedup_wrong_db": "dedup",
+}
+
+# 启动时的占位词典（3 行，不会触发“是否应用上次词典”的提示）
+PLACEHOLDER_DECK = [{"A": "bonjour", "B": "你好"}, {"A": "merci", "B": "谢谢"}, {"A": "au revoir", "B": "再见"}]
+
+
+# --------------------------- Sessions ---------------------------
+
+# compact_keys（压缩按键列表），用于把相邻的单字符按键合并成字符串，会话文件更短。
+def compact_keys(keys) -> list:
+    out: list = []
+    for k in keys:
+        if isinstance(k, str) and out and isinstance(out[-1], str):
+            out[-1] += k
+        else:
+            out.append(k)
+    return out
+
+
+# synthetic_rows（合成词典行），用于生成标准会话用的词典（拉丁拼写 + 中文释义，有一批拼写相近的词）。
+def synthetic_rows(n: int, seed: int = 0) -> List[tuple]:
+    rng = random.Random(seed)
+    syll = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ru", "sa", "te", "vi", "zo"]
+    han = "学习记忆词典题目答案错误正确选择判断填空练习时间方法语言文字声音意思"
+    rows = []
+    for i in range(n):
+        a = "".join(rng.choice(syll) for _ in range(rng.randint(2, 4))) + f"{i % 7 or ''}"
+        b = "".join(rng.choice(han) for _ in range(rng.randint(2, 5))) + f"{i}"
+        rows.append((a, b))
+    return rows
+
+
+# standard_session（标准会话），用于生成覆盖加载、选择题、错题本练习和去重的固定会话。
+def standard_session(rows: int = 2000, mcq: int = 500, drills: int = 200, seed: int = 1) -> Dict[str, object]:
+    """每题按 1 作答、任意键下一题：约 3/4 答错，错题本自然攒起来，练习阶段再按 1 作答。"""
+    keys = ["1\r", "deck.csv\r", "\r", "\r", " "]  # 加载词典：路径，列号和分隔符用默认，任意键返回
+    keys += ["6\r", "1" * (2 * mcq), "x"]  # 选择题
+    keys += ["9\r", "1" * (2 * drills), "xx"]  # 错题本模式（题型跟随错题：全是选择题）
+    keys += ["0\r", " "]  # 去重错题本
+    keys += ["q"]
+    return {"version": SESSION_VERSION, "seed": seed, "size": [24, 80], "deck": None,
+            "synthetic_rows": rows, "cwd": None, "keys": compact_keys(keys)}
+
+
+# load_session（读取会话），用于读取会话文件。
+def load_session(path: str) -> Dict[str, object]:
+    import json
+    with open(path, "r", encoding="utf-8") as f:
+        session = json.load(f)
+    if session.get("version") != SESSION_VERSION:
+        raise RuntimeError(f"不支持的会话版本：{session.get('version')}")
+    return session
+
+
+# save_session（保存会话），用于保存会话文件。
+def save_session(path: str, session: Dict[str, object]) -> None:
+    import json
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(session, f, ensure_ascii=False)
+
+
+# --------------------------- Sandbox ---------------------------
+
+# prepare_workdir（准备临时目录），用于把目标脚本拷进临时目录并从那里导入。
+def prepare_workdir(script: str):
+    """返回 (临时目录, 目标模块)；之后导入的 dtm_headless 也绑定到这份拷贝。"""
+    tmp = tempfile.mkdtemp(prefix="dtm-replay-")
+    shutil.copy(script, os.path.join(tmp, f"{TARGET_MODULE}.py"))
+    sys.path.insert(0, tmp)
+    import importlib
+    dtm = importlib.import_module(TARGET_MODULE)
+    if os.path.dirname(os.path.abspath(dtm.__file__)) != tmp:
+        raise RuntimeError(f"{TARGET_MODULE} 已从别处导入：{dtm.__file__}")
+    # 相似度索引一律当场建好：后台建索引时干扰项取决于线程进度，回放就不可复现了
+    dtm.SIM_SYNC_ROWS = sys.maxsize
+    return tmp, dtm
+
+
+# initial_state（初始状态），用于按会话建立起始 State 并注入固定种子的随机源。
+def initial_state(dtm, session: Dict[str, object], workdir: str):
+    import dtm_headless
+    deck = session.get("deck")
+    if deck:
+        state = dtm.open_deck_state(dtm.normalize_deck_path(deck), 1, None)
+        if hasattr(dtm, "adopt_loaded_state"):  # 旧版本加载时就落盘，没有这一步
+            dtm.adopt_loaded_state(state)
+    else:
+        state = dtm_headless.temp_state([dict(r) for r in PLACEHOLDER_DECK], workdir, deck_id="replay")
+    state.rng = random.Random(session["seed"])
+    # 旧版本的出题函数直接用模块级 random：一并播种，跨分支对比时同样可复现
+    random.seed(session["seed"])
+    return state
+
+
+# --------------------------- Meter ---------------------------
+
+class PhaseMeter:
+    """按阶段累计墙钟时间、tracemalloc 峰值/净增、以写方式打开文件的次数和字节数。"""
+
+    def __init__(self, alloc: bool = True):
+        self.alloc = alloc
+        self.phase = "menu"
+        self.depth = 0
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._pending: List[str] = []  # 以写方式打开、还没统计大小的文件
+        self.active = False
+
+    def _bucket(self, name: str) -> Dict[str, float]:
+        return self.stats.setdefault(name, {"calls": 0, "wall_ms": 0.0, "alloc_peak_kib": 0.0,
+                                            "alloc_net_kib": 0.0, "writes": 0, "write_bytes": 0})
+
+    # _flush（统计待定写入），用于给已写完的文件记字节数（文件此时已关闭，或即将被改名）。
+    def _flush(self) -> None:
+        for p in self._pending:
+            try:
+                self._bucket(self.phase)["write_bytes"] += os.path.getsize(p)
+            except OSError:
+                pass
+        self._pending.clear()
+
+    # audit（审计钩子），用于捕获 open / 改名事件；钩子装上就卸不掉，靠 active 开关。
+    def audit(self, event: str, args) -> None:
+        if not self.active:
+            return
+        if event == "open":
+            path, mode, flags = args
+            if mode is None:
+                writing = bool(flags & (os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT))
+            else:
+                writing = any(c in mode for c in "wax+")
+            if writing and isinstance(path, (str, bytes)):
+                self._flush()
+                self._bucket(self.phase)["writes"] += 1
+                self._pending.append(os.fsdecode(path))
+        elif event == "os.rename":
+            self._flush()  # 先写临时文件再改名：改名前统计
+
+    # wrap（包一层计量），用于把模块函数包成按阶段计量的版本。
+    def wrap(self, fn, name: str):
+        import functools
+        import tracemalloc
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            if self.depth:
+                return fn(*args, **kwargs)
+            self._flush()
+            outer, self.phase, self.depth = self.phase, name, 1
+            b = self._bucket(name)
+            b["calls"] += 1
+            if self.alloc:
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                b["wall_ms"] += (time.perf_counter() - t0) * 1000
+                if self.alloc:
+                    cur, peak = tracemalloc.get_traced_memory()
+                    b["alloc_peak_kib"] = max(b["alloc_peak_kib"], (peak - base) / 1024)
+                    b["alloc_net_kib"] += (cur - base) / 1024
+                self._flush()
+                self.phase, self.depth = outer, 0
+
+        return timed
+
+
+# _percentile（百分位），用于取有序列表的百分位值。
+def _percentile(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+# outcome_digest（结果摘要），用于对最终错题本做摘要：同一会话在两个分支上摘要相同，说明工作量一致。
+def outcome_digest(wrong_db: List[Dict]) -> str:
+    import hashlib
+    h = hashlib.blake2b(digest_size=8)
+    for e in wrong_db:
+        h.update(f"{e.get('item_index')}\t{e.get('mode')}\t{e.get('weight')}\t{e.get('user_wrong')}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+# replay（回放会话），用于在临时目录里回放一份会话并返回报告。
+def replay(session: Dict[str, object], script: str, alloc: bool = True) -> Dict[str, object]:
+    import tracemalloc
+    workdir, dtm = prepare_workdir(script)
+    import dtm_headless
+    cwd = os.getcwd()
+    try:
+        if session.get("synthetic_rows"):
+            with open(os.path.join(workdir, "deck.csv"), "w", encoding="utf-8") as f:
+                f.writelines(f"{a},{b}\n" for a, b in synthetic_rows(int(session["synthetic_rows"])))
+        run_dir = session.get("cwd") if session.get("cwd") and os.path.isdir(session["cwd"]) else workdir
+        os.chdir(run_dir)
+        state = initial_state(dtm, session, workdir)
+
+        meter = PhaseMeter(alloc=alloc)
+        for fn_name, phase in PHASES.items():
+            if hasattr(dtm, fn_name):
+                setattr(dtm, fn_name, meter.wrap(getattr(dtm, fn_name), phase))
+        sys.addaudithook(meter.audit)
+
+        if alloc:
+            tracemalloc.start()
+        meter.active = True
+        t0 = time.perf_counter()
+        try:
+            screen = dtm_headless.run_menu(state, session["keys"], size=tuple(session.get("size", (24, 80))),
+                                           record=False)
+        finally:
+            total_ms = (time.perf_counter() - t0) * 1000
+            meter._flush()
+            meter.active = False
+            if alloc:
+                tracemalloc.stop()
+
+        final = getattr(dtm, "_ACTIVE_STATE", None) or state
+        inside = sum(b["wall_ms"] for b in meter.stats.values())
+        meter._bucket("menu")["wall_ms"] += total_ms - inside
+        lat = [x * 1000 for x in screen.latencies()]
+        return {
+            "script": os.path.abspath(script),
+            "seed": session["seed"],
+            "keys": len(screen.key_times),
+            "keys_unused": len(screen.keys),
+            "frames": len(screen.frame_times),
+            "total_ms": round(total_ms, 2),
+            "phases": {k: {kk: round(vv, 2) for kk, vv in v.items()} for k, v in meter.stats.items()},
+            "latency_ms": {"p50": round(_percentile(lat, 0.5), 3), "p95": round(_percentile(lat, 0.95), 3),
+                           "max": round(max(lat, default=0.0), 3)},
+            "deck_rows": len(final.deck),
+            "wrong_entries": len(final.wrong_db),
+            "outcome": outcome_digest(final.wrong_db),
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# --------------------------- Recording ---------------------------
+
+class KeyRecorder:
+    """包在真实 stdscr 外面：读键类调用照常转发，同时把读到的键按 FakeScreen 的脚本格式记下来。"""
+
+    def __init__(self, stdscr):
+        self._scr = stdscr
+        self.keys: list = []
+
+    def __getattr__(self, name):
+        return getattr(self._scr, name)
+
+    def getch(self) -> int:
+        ch = self._scr.getch()
+        if ch == -1:
+            self.keys.append(None)
+        elif 0 <= ch < 128:
+            self.keys.append(chr(ch))
+        else:
+            self.keys.append(ch)  # 功能键，或多字节 UTF-8 的单个字节
+        return ch
+
+    def get_wch(self):
+        import curses
+        try:
+            k = self._scr.get_wch()
+        except curses.error:
+            self.keys.append(None)
+            raise
+        self.keys.append(k)
+        return k
+
+    def getstr(self, *args) -> bytes:
+        s = self._scr.getstr(*args)
+        self.keys.extend(s.decode("utf-8", errors="ignore"))
+        self.keys.append("\n")
+        return s
+
+
+# record（录制会话），用于在真实终端里录制一段会话。
+def record(deck: Optional[str], seed: Optional[int], script: str) -> Dict[str, object]:
+    import curses
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    session: Dict[str, object] = {"version": SESSION_VERSION, "seed": seed, "size": [24, 80],
+                                  "deck": os.path.abspath(deck) if deck else None,
+                                  "synthetic_rows": None, "cwd": os.getcwd(), "keys": []}
+    workdir, dtm = prepare_workdir(script)
+    try:
+        state = initial_state(dtm, session, workdir)
+        dtm._init_locale()
+        recorder_box: List[KeyRecorder] = []
+
+        def run(stdscr):
+            session["size"] = list(stdscr.getmaxyx())
+            rec = KeyRecorder(stdscr)
+            recorder_box.append(rec)
+            dtm.menu(rec, state)
+
+        try:
+            curses.wrapper(run)
+        except KeyboardInterrupt:
+            pass
+        session["keys"] = compact_keys(recorder_box[0].keys) if recorder_box else []
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return session
+
+
+# --------------------------- main ---------------------------
+
+# print_report（打印报告），用于按阶段打印回放报告。
+def print_report(r: Dict[str, object]) -> None:
+    print(f"脚本：{r['script']}  种子 {r['seed']}  按键 {r['keys']}（未用完 {r['keys_unused']}）  帧 {r['frames']}")
+    print(f"{'阶段':<8}{'次数':>6}{'耗时ms':>12}{'峰值KiB':>12}{'净增KiB':>12}{'写入':>8}{'写出字节':>12}")
+    for name, b in sorted(r["phases"].items(), key=lambda kv: -kv[1]["wall_ms"]):
+        print(f"{name:<10}{b['calls']:>6.0f}{b['wall_ms']:>12.1f}{b['alloc_peak_kib']:>12.1f}"
+              f"{b['alloc_net_kib']:>12.1f}{b['writes']:>8.0f}{b['write_bytes']:>14.0f}")
+    lat = r["latency_ms"]
+    print(f"合计 {r['total_ms']:.1f}ms；按键→下一帧 p50 {lat['p50']:.2f}ms  p95 {lat['p95']:.2f}ms  max {lat['max']:.2f}ms")
+    print(f"结束时：词典 {r['deck_rows']} 条，错题 {r['wrong_entries']} 条，结果摘要 {r['outcome']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(add_help=True)
+    sub = parser.add_subparsers(dest="cmd")
+
+    p = sub.add_parser("replay", help="回放会话并按阶段报告耗时 / 分配 / 写入")
+    p.add_argument("session", nargs="?", default=None, help="会话文件；不给则用标准会话")
+    p.add_argument("--script", default=os.path.join(HERE, f"{TARGET_MODULE}.py"), help="要测的 dict_trainer_mac.py")
+    p.add_argument("--no-alloc", action="store_true", help="不开 tracemalloc（耗时更接近真实）")
+    p.add_argument("--json", action="store_true", help="输出 JSON")
+
+    p = sub.add_parser("standard", help="写出标准会话文件")
+    p.add_argument("out")
+    p.add_argument("--rows", type=int, default=2000, help="合成词典行数")
+    p.add_argument("--mcq", type=int, default=500, help="选择题题数")
+    p.add_argument("--drills", type=int, default=200, help="错题本练习题数")
+    p.add_argument("--seed", type=int, default=1)
+
+    p = sub.add_parser("record", help="在真实终端里录制会话")
+    p.add_argument("out")
+    p.add_argument("deck", nargs="?", default=None, help="起始词典；不给则从占位词典开始（可在菜单里加载）")
+    p.add_argument("--seed", type=int, default=None, help="随机种子；默认随机生成并写入会话")
+    p.add_argument("--script", default=os.path.join(HERE, f"{TARGET_MODULE}.py"))
+
+    args = parser.parse_args()
+    if args.cmd == "standard":
+        save_session(args.out, standard_session(args.rows, args.mcq, args.drills, args.seed))
+        return 0
+    if args.cmd == "record":
+        session = record(args.deck, args.seed, args.script)
+        save_session(args.out, session)
+        print(f"已录制 {sum(len(k) if isinstance(k, str) else 1 for k in session['keys'])} 个按键 → {args.out}")
+        return 0
+    if args.cmd != "replay":
+        args = parser.parse_args(["replay"])
+    session = load_session(args.session) if args.session else standard_session()
+    report = replay(session, args.script, alloc=not args.no_alloc)
+    if args.json:
+        import json
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
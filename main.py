@@ -4,10 +4,13 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 # Optional dependency: pandas for reading xlsx/csv/tsv robustly
-try:
-    import pandas as pd
-except Exception as e:
-    pd = None
+# Imported on first load (it costs far more than the GUI itself at start-up).
+def _try_import_pandas():
+    try:
+        import pandas as pd
+        return pd
+    except Exception:
+        return None
 
 
 def normalize_text(s: str) -> str:
@@ -28,6 +31,7 @@ class ABDeck:
         self.columns = []
 
     def load_table(self, filepath: str) -> None:
+        pd = _try_import_pandas()
         if pd is None:
             raise RuntimeError("缺少依赖 pandas。请先 pip install pandas openpyxl")
 
@@ -60,6 +64,7 @@ class ABDeck:
         if col_a not in df.columns or col_b not in df.columns:
             return 0
 
+        pd = _try_import_pandas()
         pairs = []
         for _, row in df[[col_a, col_b]].iterrows():
             a = row[col_a]
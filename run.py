@@ -104,6 +104,107 @@ def shutil_which(exe: str) -> str | None:
             return cand
     return None
 
+# -------------------- warm mode --------------------
+# run.py --warm：对支持常驻模式的脚本，不再开新终端冷启动，
+# 而是连到常驻进程（dict_trainer_mac.py --serve），把当前终端交给它。
+
+WARM_SCRIPTS = {"dict_trainer_mac.py"}
+
+def warm_socket_path() -> str:
+    # 需与 dict_trainer_mac.warm_socket_path 保持一致
+    base = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(base, f"gms-warm-{os.getuid()}.sock")
+
+def _connect_warm():
+    import socket
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(warm_socket_path())
+    except OSError:
+        s.close()
+        return None
+    return s
+
+def start_warm_server(script: str, timeout: float = 10.0):
+    """后台拉起常驻进程，等 socket 可连接后返回连接。"""
+    import time
+    subprocess.Popen(
+        [sys.executable, script, "--serve"],
+        cwd=os.path.dirname(script),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        s = _connect_warm()
+        if s is not None:
+            return s
+        time.sleep(0.05)
+    return None
+
+def warm_attach(script: str) -> bool:
+    """
+    把当前 TTY（fd 0/1/2）交给常驻进程，阻塞到会话结束。
+    返回 False 表示常驻模式不可用（调用方回退到冷启动）。
+    """
+    if sys.platform.startswith("win") or not is_real_terminal():
+        return False
+    import json
+    import signal
+    import socket
+
+    s = _connect_warm() or start_warm_server(script)
+    if s is None:
+        return False
+    req = {
+        "cmd": "attach",
+        "cwd": os.getcwd(),
+        "env": {k: os.environ[k] for k in ("TERM", "LANG", "LC_ALL", "LC_CTYPE") if k in os.environ},
+    }
+    # 会话进程不在终端的前台进程组里：Ctrl-C、Ctrl-Z、窗口大小变化都只发到这里，逐个转发过去。
+    # 会话进程开始时先发一行 "pid N"，结束时发退出码。
+    session_pid: list[int] = []
+
+    def forward(signum, frame=None):
+        if session_pid:
+            try:
+                os.kill(session_pid[0], signum)
+            except OSError:
+                pass
+
+    def suspend(signum, frame):
+        forward(signal.SIGTSTP)  # 会话进程里 ncurses 先退出 curses 再停住
+        signal.signal(signal.SIGTSTP, signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGTSTP)
+        # fg 回来后从这里继续
+        signal.signal(signal.SIGTSTP, suspend)
+        forward(signal.SIGCONT)
+        forward(signal.SIGWINCH)  # 停住期间窗口可能变过大小
+
+    handlers = {signal.SIGINT: forward, signal.SIGWINCH: forward, signal.SIGTSTP: suspend}
+    old = {sig: signal.signal(sig, h) for sig, h in handlers.items()}
+    try:
+        socket.send_fds(s, [json.dumps(req).encode("utf-8")], [0, 1, 2])
+        data = b""
+        while True:
+            chunk = s.recv(64)
+            if not chunk:
+                break
+            data += chunk
+            if not session_pid and b"\n" in data:
+                line, _, data = data.partition(b"\n")
+                if line.startswith(b"pid "):
+                    session_pid.append(int(line[4:]))
+    except OSError:
+        return False
+    finally:
+        for sig, h in old.items():
+            signal.signal(sig, h)
+        s.close()
+    return True
+
 @dataclass
 class Item:
     path: str
@@ -262,6 +363,10 @@ def main():
     if not chosen:
         return 0
 
+    if "--warm" in sys.argv[1:] and os.path.basename(chosen) in WARM_SCRIPTS:
+        if warm_attach(chosen):
+            return 0
+
     # ✅ 构造命令：跨平台最稳的方式是分平台 quote
     if sys.platform.startswith("win"):
         # Windows 用 list2cmdline，避免空格/反斜杠地狱